@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Baseline registry and regression gate for re-runs after an image bump.
+
+One JSON file (default ../baselines.json, --store PATH) holds one baseline per
+key engine/model/gpu/workload. A baseline is the compare.py summary of a run:
+the per-request TTFT / prefill / decode-tps distributions (vLLM: histogram
+bucket deltas, NInfer: request_done samples) plus summary statistics.
+
+`check` compares a new run against its key's baseline with a one-sided
+Mann-Whitney U test per metric (normal approximation, tie-corrected) in the
+"worse" direction — TTFT/prefill up, decode tok/s down. A metric REGRESSES
+when p < --alpha AND the median moved by more than --min-effect, so a huge
+run cannot fail on a statistically real but irrelevant shift. vLLM medians are
+interpolated linearly within their histogram bucket, so a shift inside one
+bucket is an estimate rather than 0%. Exit codes:
+0 no regression, 1 regression, 2 no baseline for the key.
+
+Key parts default from the run: engine (collector type), model (models.json /
+server_start artifact), gpu (context.env gpu_name, else node), workload
+(context.env label). Override with --engine/--model/--gpu/--workload.
+
+Usage:
+  baselines.py record <run-dir> [key overrides] [--store PATH]
+  baselines.py check  <run-dir> [key overrides] [--alpha 0.01] [--min-effect 5] [--store PATH]
+  baselines.py list   [--store PATH]
+"""
+import json, math, os, sys, time
+
+from compare import DISTS, read_ctx, samples, summarize
+from ninferlog import last_event
+
+STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "baselines.json")
+MAX_SAMPLES = 5000               # per metric kept in the store (even stride)
+WORSE = {"ttft_s": +1, "prefill_s": +1, "decode_tps": -1}
+
+
+def run_key(run, s, over):
+    ctx = read_ctx(run)
+    model = "?"
+    if s["engine"] == "vllm" and os.path.exists(f"{run}/models.json"):
+        try:
+            model = json.load(open(f"{run}/models.json"))["data"][0]["id"]
+        except (ValueError, KeyError, IndexError):
+            pass
+    elif s["engine"] == "ninfer":
+        st = last_event(f"{run}/requests.jsonl", "server_start")
+        if st:
+            model = str(st.get("artifact", "?"))
+    key = {"engine": s["engine"], "model": model,
+           "gpu": ctx.get("gpu_name") or ctx.get("node", "?"),
+           "workload": ctx.get("label", "?")}
+    key.update({k: v for k, v in over.items() if v})
+    return key, "/".join(key[k] for k in ("engine", "model", "gpu", "workload"))
+
+
+def thin(d):
+    if d["kind"] == "samples" and len(d["values"]) > MAX_SAMPLES:
+        step = len(d["values"]) / MAX_SAMPLES
+        return {"kind": "samples", "values": [d["values"][int(i * step)] for i in range(MAX_SAMPLES)]}
+    return d
+
+
+def quantile(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q / 100 * len(xs)))] if xs else None
+
+
+def median(d):
+    """Median of a distribution record. Histograms interpolate linearly inside the
+    median's bucket: samples() gives bucket midpoints, so any shift that stays
+    within one bucket would otherwise read as 0%."""
+    if d["kind"] == "samples":
+        return quantile(d["values"], 50)
+    bs = [(lo, hi, n) for lo, hi, n in d["buckets"] if n > 0 and (hi is None or lo + hi > 0)]
+    seen, half = 0, sum(n for _, _, n in bs) / 2
+    for lo, hi, n in bs:
+        if seen + n >= half:
+            v = lo if hi is None else lo + (hi - lo) * (half - seen) / n
+            # invert is monotone: 1/median(x) is the median of 1/x
+            return (1 / v if v > 0 else None) if d.get("invert") else v
+        seen += n
+    return None
+
+
+def stats(xs):
+    return {"n": len(xs), "mean": sum(xs) / len(xs) if xs else None,
+            **{f"p{q}": quantile(xs, q) for q in (50, 90, 99)}}
+
+
+def mann_whitney(a, b):
+    """One-sided P(b stochastically greater than a): (U_b, p), normal approx with tie correction."""
+    na, nb = len(a), len(b)
+    pooled = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    rank_b, ties, i = 0.0, 0.0, 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        r = (i + j) / 2 + 1
+        t = j - i + 1
+        ties += t ** 3 - t
+        rank_b += r * sum(1 for k in range(i, j + 1) if pooled[k][1])
+        i = j + 1
+    u = rank_b - nb * (nb + 1) / 2
+    n = na + nb
+    var = na * nb / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if var <= 0:
+        return u, 1.0
+    z = (u - na * nb / 2 - 0.5) / math.sqrt(var)   # continuity-corrected
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def load_store(path):
+    return json.load(open(path)) if os.path.exists(path) else {"baselines": {}}
+
+
+def save_store(path, store):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(store, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def check(base, s, alpha, min_effect):
+    """[(metric, base_stats, new_stats, p, effect_pct, regressed)]"""
+    out = []
+    for key, _ in DISTS:
+        da, db = base["dist"][key], s["dist"][key]
+        a, b = samples(da), samples(db)
+        if len(a) < 2 or len(b) < 2:
+            out.append((key, stats(a), stats(b), None, None, False))
+            continue
+        sign = WORSE[key]
+        _, p = mann_whitney(a, b) if sign > 0 else mann_whitney(b, a)
+        ma, mb = median(da), median(db)
+        effect = (mb - ma) / ma * 100 if ma and mb is not None else 0.0
+        out.append((key, {**stats(a), "p50": ma}, {**stats(b), "p50": mb}, p, effect,
+                    p < alpha and effect * sign > min_effect))
+    return out
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ("record", "check", "list"):
+        sys.exit(__doc__)
+    opt = lambda name, default=None: args[args.index(name) + 1] if name in args else default
+    path = opt("--store", STORE)
+    store = load_store(path)
+
+    if args[0] == "list":
+        for k, b in sorted(store["baselines"].items()):
+            st = b["stats"]
+            print(f"{k:<60} run={b['run']:<32} recorded={b['recorded_utc']}  "
+                  f"ttft p50={st['ttft_s']['p50'] or 0:.3f}s  decode p50={st['decode_tps']['p50'] or 0:.1f} tok/s")
+        return
+
+    if len(args) < 2:
+        sys.exit(__doc__)
+    run = args[1].rstrip("/")
+    s = summarize(run)
+    key, name = run_key(run, s, {k: opt(f"--{k}") for k in ("engine", "model", "gpu", "workload")})
+
+    if args[0] == "record":
+        dist = {k: thin(s["dist"][k]) for k, _ in DISTS}
+        store["baselines"][name] = {
+            "key": key, "run": s["run"], "recorded_utc": time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()),
+            "requests": s["requests"], "errors": s["errors"],
+            "prefix_reuse_pct": s["prefix_reuse_pct"], "kv_peak_tokens": s["kv_peak_tokens"],
+            "stats": {k: stats(samples(d)) for k, d in dist.items()}, "dist": dist}
+        save_store(path, store)
+        print(f"baseline recorded: {name} <- {s['run']}")
+        return
+
+    base = store["baselines"].get(name)
+    if base is None:
+        print(f"no baseline for {name} — record one with: baselines.py record {run}")
+        sys.exit(2)
+    alpha, min_effect = float(opt("--alpha", 0.01)), float(opt("--min-effect", 5))
+    print(f"{name}\n  baseline {base['run']} ({base['recorded_utc']})  vs  {s['run']}")
+    print(f"  one-sided Mann-Whitney U, alpha={alpha:g}, min median shift {min_effect:g}%")
+    bad = []
+    for key_, sa, sb, p, eff, reg in check(base, s, alpha, min_effect):
+        fmt = lambda v: f"{v:.3f}" if v is not None else "–"
+        verdict = "REGRESSION" if reg else ("n/a (too few samples)" if p is None else "ok")
+        print(f"  {key_:<11} p50 {fmt(sa['p50'])} -> {fmt(sb['p50'])}  "
+              f"({eff:+.1f}%)  p={p:.2g}  {verdict}" if p is not None else
+              f"  {key_:<11} n={sa['n']} vs {sb['n']}  {verdict}")
+        if reg:
+            bad.append(key_)
+    if s["errors"] > (base.get("errors") or 0):
+        print(f"  errors {base.get('errors')} -> {s['errors']}   (reported, not gated)")
+    if bad:
+        print(f"REGRESSED: {', '.join(bad)}")
+        sys.exit(1)
+    print("no significant regression")
+
+
+if __name__ == "__main__":
+    main()
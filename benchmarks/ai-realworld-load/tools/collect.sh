@@ -161,6 +161,11 @@ cmd_stop() {
     | grep -E '^vllm:' > "$run/metrics.final"
   kubectl -n "$NS" get events --sort-by=.lastTimestamp > "$run/events.txt" 2>/dev/null
 
+  # Columnar copy of metrics.stream (~10x smaller, mmap'd by report.py). The
+  # text stays unless you run: tools/runpack.py pack "$run" --drop-text
+  python3 "$ROOT/tools/runpack.py" pack "$run" 2>/dev/null \
+    || echo "runpack skipped — report.py will parse metrics.stream"
+
   rm -f "$STATE"
   echo "stopped. RUN=$run"
   echo "next: tools/report.py \"$run\""
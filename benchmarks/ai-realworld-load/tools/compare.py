@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Cross-run comparison — vLLM and NInfer runs in one normalized schema.
+
+Each run directory (either collector) is reduced to the same server-side
+fields, so A vs B tables stop being assembled by hand:
+
+  ttft_s, prefill_s, decode_tps   per-request distributions
+  prefix_reuse_pct                cached / prompt tokens over the run
+  kv_peak_tokens                  max(kv_cache_usage_perc) x capacity   (vLLM only; NInfer N/A)
+  requests, errors                completed requests; aborts (vLLM) / request_error (NInfer)
+
+Where the distributions come from differs, and the table says which:
+  req   NInfer request_done timings, one sample per request          [MEASURED]
+  hist  vLLM histogram bucket deltas expanded at bucket midpoints    [DERIVED]
+        (decode_tps = 1/TPOT per request; a (x, +Inf] bucket counts as x)
+
+The first run is the baseline (--base N picks another). Every other run gets
+Δ% of the mean and a 95% CI for it: bootstrap (--boot resamples) while both
+sides have <= BOOT_MAX samples, else the normal approximation; the CI column
+says which. Client-side probe numbers are never mixed in.
+
+Parsed summaries are cached as <run>/compare-summary.json, keyed by the size
+and mtime of the files they came from, so re-comparing 20 runs reads 20 small
+JSON files. Each run's CIs against a baseline are cached there too, keyed by
+the baseline's summary, --boot and the seed. --no-cache re-parses and
+recomputes.
+
+Usage: compare.py <run-dir> <run-dir>... [--base N] [--boot 1000] [--json] [--no-cache]
+"""
+import hashlib, json, math, os, random, sys
+
+from ninferlog import load_events, request_rows
+from report import bucket_range, ends, kv_capacity, load_store, zcol
+
+M, D = "MEASURED", "DERIVED"
+SCHEMA = 1
+CACHE = "compare-summary.json"
+BOOT_MAX = 5000
+
+DISTS = (("ttft_s", "TTFT mean (s)"), ("prefill_s", "prefill mean (s)"),
+         ("decode_tps", "decode tok/s mean"))
+SCALARS = (("prefix_reuse_pct", "prefix reuse %"), ("kv_peak_tokens", "KV peak tokens"),
+           ("requests", "requests"), ("errors", "errors"))
+
+
+# ---------------- per-run summary ---------------------------------------------
+
+def engine_of(run):
+    if os.path.exists(f"{run}/requests.jsonl.stream"):
+        return "ninfer"
+    if os.path.exists(f"{run}/metrics.stream") or os.path.exists(f"{run}/metrics.pack"):
+        return "vllm"
+    return None
+
+
+SOURCES = {"vllm": ("metrics.stream", "metrics.pack", "cache-config.txt"),
+           "ninfer": ("requests.jsonl.stream",)}
+
+
+def source_stamp(run, engine):
+    out = {}
+    for name in SOURCES[engine]:
+        p = f"{run}/{name}"
+        if os.path.exists(p):
+            st = os.stat(p)
+            out[name] = [st.st_size, st.st_mtime]
+    return out
+
+
+def read_ctx(run):
+    ctx = {}
+    if os.path.exists(f"{run}/context.env"):
+        for line in open(f"{run}/context.env"):
+            if "=" in line:
+                k, v = line.strip().split("=", 1)
+                ctx[k] = v
+    return ctx
+
+
+def hist_dist(store, name, invert=False):
+    b = bucket_range(store.buckets_at(name, 0), store.buckets_at(name, -1))
+    return {"kind": "hist", "invert": invert,
+            "buckets": [[lo, hi if hi != math.inf else None, n] for lo, hi, n in b]}
+
+
+def summarize_vllm(run):
+    store = load_store(run)
+    if not len(store):
+        return None
+    cap = kv_capacity(run)
+    (q0, q1), (h0, h1) = ends(store, "vllm:prefix_cache_queries_total", {}), \
+        ends(store, "vllm:prefix_cache_hits_total", {})
+    (c0, c1) = ends(store, "vllm:e2e_request_latency_seconds_count", {})
+    errors = 0
+    for lab, col in store.series("vllm:request_success_total"):
+        if lab.get("finished_reason") in ("abort", "error"):
+            a = next((v for v in col if v == v), 0.0)
+            b = next((col[i] for i in range(len(col) - 1, -1, -1) if col[i] == col[i]), 0.0)
+            errors += b - a
+    return {
+        "requests": int(c1 - c0) if None not in (c0, c1) else None,
+        "errors": int(errors),
+        "prefix_reuse_pct": (h1 - h0) / (q1 - q0) * 100
+        if None not in (q0, q1, h0, h1) and q1 > q0 else None,
+        "kv_peak_tokens": max(zcol(store, "vllm:kv_cache_usage_perc", {}, how="max"), default=0) * cap,
+        "dist": {"ttft_s": hist_dist(store, "vllm:time_to_first_token_seconds"),
+                 "prefill_s": hist_dist(store, "vllm:request_prefill_time_seconds"),
+                 "decode_tps": hist_dist(store, "vllm:request_time_per_output_token_seconds",
+                                         invert=True)},
+    }
+
+
+def summarize_ninfer(run):
+    rows, errs = request_rows(load_events(f"{run}/requests.jsonl.stream"))
+    col = lambda k: [r[k] for r in rows if r.get(k) is not None]
+    prompt, cache = sum(col("prompt")), sum(col("cache"))
+    return {
+        "requests": len(rows), "errors": len(errs),
+        "prefix_reuse_pct": cache / prompt * 100 if prompt else None,
+        "kv_peak_tokens": None,
+        "dist": {"ttft_s": {"kind": "samples", "values": col("ttft")},
+                 "prefill_s": {"kind": "samples", "values": col("prefill")},
+                 "decode_tps": {"kind": "samples", "values": col("decode_tps")}},
+    }
+
+
+def summarize(run, use_cache=True):
+    run = run.rstrip("/")
+    engine = engine_of(run)
+    if engine is None:
+        sys.exit(f"{run}: neither metrics.stream/metrics.pack (vLLM) nor requests.jsonl.stream (NInfer)")
+    stamp = source_stamp(run, engine)
+    cpath = f"{run}/{CACHE}"
+    if use_cache and os.path.exists(cpath):
+        try:
+            s = json.load(open(cpath))
+            if s.get("schema") == SCHEMA and s.get("sources") == stamp:
+                return s
+        except (OSError, ValueError):
+            pass
+    s = (summarize_vllm if engine == "vllm" else summarize_ninfer)(run)
+    if s is None:
+        sys.exit(f"{run}: no data captured")
+    ctx = read_ctx(run)
+    s.update(schema=SCHEMA, engine=engine, run=os.path.basename(run),
+             label=ctx.get("label", "?"), sources=stamp)
+    if use_cache:
+        save_summary(run, s)
+    return s
+
+
+def save_summary(run, s):
+    try:
+        with open(f"{run.rstrip('/')}/{CACHE}", "w") as f:
+            json.dump(s, f)
+    except OSError:
+        pass  # read-only run dir: just don't cache
+
+
+# ---------------- statistics --------------------------------------------------
+
+def samples(d):
+    """Distribution record -> list of per-request values."""
+    if d["kind"] == "samples":
+        return d["values"]
+    out = []
+    for lo, hi, n in d["buckets"]:
+        v = lo if hi is None else (lo + hi) / 2
+        if d.get("invert"):
+            if v <= 0:
+                continue
+            v = 1 / v
+        out.extend([v] * int(n))
+    return out
+
+
+def mean(xs):
+    return sum(xs) / len(xs) if xs else None
+
+
+def diff_ci(a, b, boot, rng):
+    """95% CI of mean(b) - mean(a) -> (lo, hi, method); None with < 2 samples a side."""
+    if len(a) < 2 or len(b) < 2:
+        return None
+    if len(a) <= BOOT_MAX and len(b) <= BOOT_MAX:
+        ds = sorted(mean(rng.choices(b, k=len(b))) - mean(rng.choices(a, k=len(a)))
+                    for _ in range(boot))
+        return ds[int(0.025 * boot)], ds[min(boot - 1, int(0.975 * boot))], "bootstrap"
+    var = lambda xs, m: sum((x - m) ** 2 for x in xs) / (len(xs) - 1)
+    ma, mb = mean(a), mean(b)
+    se = math.sqrt(var(a, ma) / len(a) + var(b, mb) / len(b))
+    return mb - ma - 1.96 * se, mb - ma + 1.96 * se, "normal"
+
+
+def compare(sums, base=0, boot=1000, seed=0, fresh=None):
+    """Comparison table against sums[base].
+
+    A CI is computed once per (baseline summary, boot, seed) and kept in the
+    run summary's "ci" map; indexes of summaries that gained one are added to
+    `fresh` so the caller can save them.
+    """
+    ref = sums[base]
+    ck = hashlib.sha1(json.dumps([ref["run"], ref.get("sources"), boot, seed],
+                                 sort_keys=True).encode()).hexdigest()[:16]
+    out = {"baseline": ref["run"], "runs": [s["run"] for s in sums], "metrics": {}}
+    for key, _ in DISTS:
+        a = samples(ref["dist"][key])
+        rows = []
+        for i, s in enumerate(sums):
+            b = samples(s["dist"][key])
+            r = {"run": s["run"], "engine": s["engine"], "n": len(b), "mean": mean(b),
+                 "source": "req" if s["dist"][key]["kind"] == "samples" else "hist"}
+            if s is not ref and r["mean"] is not None and mean(a):
+                r["delta_pct"] = (r["mean"] - mean(a)) / mean(a) * 100
+                cached = s.setdefault("ci", {}).setdefault(ck, {})
+                if key not in cached:
+                    # one RNG per pair: a CI does not depend on which other runs are listed
+                    cached[key] = diff_ci(a, b, boot, random.Random(seed))
+                    if fresh is not None:
+                        fresh.add(i)
+                ci = cached[key]
+                if ci:
+                    r["ci_pct"] = [ci[0] / mean(a) * 100, ci[1] / mean(a) * 100]
+                    r["ci_method"] = ci[2]
+            rows.append(r)
+        out["metrics"][key] = rows
+    for key, _ in SCALARS:
+        rows = []
+        for s in sums:
+            r = {"run": s["run"], "engine": s["engine"], "value": s.get(key)}
+            if s is not ref and None not in (r["value"], ref.get(key)) and ref[key]:
+                r["delta_pct"] = (r["value"] - ref[key]) / ref[key] * 100
+            rows.append(r)
+        out["metrics"][key] = rows
+    return out
+
+
+# ---------------- output --------------------------------------------------------
+
+def section(t):
+    print(f"\n{'='*78}\n{t}\n{'='*78}")
+
+
+def pct(v):
+    return f"{v:+.1f}%" if v is not None else "–"
+
+
+def num(v):
+    if v is None:
+        return "N/A"
+    if isinstance(v, int):
+        return f"{v:,}"
+    return f"{v:,.0f}" if abs(v) >= 1000 else f"{v:.3f}"
+
+
+def render(sums, cmp):
+    print(f"baseline = {cmp['baseline']}   ({len(sums)} runs)")
+    for s in sums:
+        print(f"  {s['run']:<40} engine={s['engine']:<6} label={s['label']}")
+    for key, title in DISTS:
+        section(f"{title}   [req: {M} per request | hist: {D} bucket midpoints]")
+        print(f"  {'run':<40} {'n':>6} {'mean':>9} {'Δ':>8}  {'95% CI of Δ':<20} src")
+        for r in cmp["metrics"][key]:
+            ci = (f"[{pct(r['ci_pct'][0])}, {pct(r['ci_pct'][1])}] {r['ci_method'][:4]}"
+                  if "ci_pct" in r else "")
+            print(f"  {r['run']:<40} {r['n']:>6} {num(r['mean']):>9} "
+                  f"{pct(r.get('delta_pct')) if r['run'] != cmp['baseline'] else 'base':>8}  "
+                  f"{ci:<20} {r['source']}")
+    section(f"Run totals   [{M} counters / {D} ratios; N/A = engine has no equivalent]")
+    print(f"  {'run':<40} " + " ".join(f"{t:>18}" for _, t in SCALARS))
+    for i, s in enumerate(sums):
+        cells = []
+        for key, _ in SCALARS:
+            r = cmp["metrics"][key][i]
+            d = f" ({pct(r['delta_pct'])})" if "delta_pct" in r else ""
+            cells.append(f"{num(r['value']) + d:>18}")
+        print(f"  {s['run']:<40} " + " ".join(cells))
+    engines = {s["engine"] for s in sums}
+    if len(engines) > 1:
+        print("\n  mixed engines: vLLM distributions are histogram-derived ranges collapsed to")
+        print("  midpoints; NInfer's are per-request. Deltas are indicative at bucket resolution.")
+
+
+def main():
+    args = [a for a in sys.argv[1:]]
+    opt = lambda name, default: type(default)(args[args.index(name) + 1]) if name in args else default
+    base, boot = opt("--base", 0), opt("--boot", 1000)
+    runs = [a for i, a in enumerate(args)
+            if not a.startswith("--") and (i == 0 or args[i - 1] not in ("--base", "--boot"))]
+    if len(runs) < 2:
+        sys.exit(__doc__)
+    if not 0 <= base < len(runs):
+        sys.exit(f"--base must be 0..{len(runs) - 1}")
+    use_cache = "--no-cache" not in args
+    sums = [summarize(r, use_cache=use_cache) for r in runs]
+    fresh = set()
+    cmp = compare(sums, base, boot, fresh=fresh)
+    if use_cache:
+        for i in sorted(fresh):
+            save_summary(runs[i], sums[i])
+    if "--json" in args:
+        print(json.dumps(cmp, indent=2))
+    else:
+        render(sums, cmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""nvidia-smi gpu.csv telemetry, shared by report.py and report-ninfer.py (stdlib).
+
+Both collectors sample with
+
+  nvidia-smi --query-gpu=timestamp,index,memory.used,memory.total,utilization.gpu,
+             utilization.memory,power.draw,power.limit,temperature.gpu,
+             pcie.link.gen.current,pcie.link.width.current --format=csv,noheader,nounits -l 2
+
+load() turns that into one array('d') per field per GPU index, with the
+timestamp as epoch seconds. nvidia-smi prints the sampling pod's local time
+without a zone; the DaemonSet runs in UTC, so timestamps are read as UTC
+(tz_offset_s corrects a pod that is not). Rows need at least the first nine
+fields (through temperature); power.limit and the PCIe fields may be absent.
+
+Everything here is DERIVED from MEASURED samples:
+  energy_j()          trapezoid integral of power.draw over a time span
+  throttle_spans()    contiguous samples at >= POWER_CAP_FRAC x power.limit
+                      or >= TEMP_LIMIT_C — when the card is held back
+  headroom()          memory.total - memory.used over time
+  imbalance()         per-window mean utilisation spread across GPUs
+  align()             nearest sample (within max_gap_s) for each metrics tick
+  idle_power()        summed draw when nothing is running, subtracted before
+                      energy is charged to prefill / decode
+  phase_energy()      above-idle energy shared between overlapping request
+                      phases sample by sample
+  efficiency()        tokens/J per phase, kWh and cost per million tokens
+"""
+import bisect, calendar, csv
+from array import array
+
+from timeline import sweep
+
+M, D = "MEASURED", "DERIVED"
+FIELDS = ("vram", "vram_total", "util", "mem_util", "power", "power_limit", "temp",
+          "pcie_gen", "pcie_width")
+NAN = float("nan")
+POWER_CAP_FRAC = 0.97
+TEMP_LIMIT_C = 83.0
+BUSY_UTIL = 10.0     # % mean util for a card to count as working in a window
+IDLE_MIN_SAMPLES = 5 # idle ticks needed before idle power is their median
+NET_MIN_FRAC = 0.02  # above-idle energy below this share of gross is noise, not load
+
+
+class Gpu:
+    def __init__(self, index):
+        self.index = index
+        self.t = array("d")
+        for f in FIELDS:
+            setattr(self, f, array("d"))
+
+    def __len__(self):
+        return len(self.t)
+
+
+def _epoch(s, tz_offset_s):
+    # "2026/08/10 12:00:00.123" sliced by position: strptime is ~10x slower and
+    # runs once per sample line
+    try:
+        t = calendar.timegm((int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                             int(s[11:13]), int(s[14:16]), int(s[17:19])))
+        frac = s[20:]
+        return t + (float("0." + frac) if frac.isdigit() else 0.0) - tz_offset_s
+    except (ValueError, IndexError):
+        return NAN
+
+
+def parse_line(line, tz_offset_s=0):
+    """One gpu.csv line -> (index, epoch, {field: value}); None for headers/garbage."""
+    p = [x.strip() for x in line.split(",")]
+    if len(p) < 9 or not p[1].isdigit():
+        return None
+    vals = {}
+    for name, x in zip(FIELDS, p[2:11]):
+        try:
+            vals[name] = float(x)
+        except ValueError:
+            vals[name] = NAN
+    return int(p[1]), _epoch(p[0], tz_offset_s), vals
+
+
+def load(path, tz_offset_s=0):
+    """gpu.csv -> {index: Gpu}; empty dict if the file is missing."""
+    gpus = {}
+    try:
+        f = open(path, errors="replace")
+    except OSError:
+        return gpus
+    with f:
+        for line in f:
+            r = parse_line(line, tz_offset_s)
+            if r is None:
+                continue
+            i, t, vals = r
+            g = gpus.get(i) or gpus.setdefault(i, Gpu(i))
+            g.t.append(t)
+            for name in FIELDS:
+                getattr(g, name).append(vals.get(name, NAN))
+    for g in gpus.values():
+        if g.t and all(v != v for v in g.t):
+            g.t = array("d", (2.0 * k for k in range(len(g.t))))  # unparseable clock: 2s cadence
+    return gpus
+
+
+def finite(col):
+    return [v for v in col if v == v]
+
+
+def energy_j(g, t0=None, t1=None):
+    """Joules drawn by one GPU between t0 and t1 (defaults: its whole sample span)."""
+    t, w = g.t, g.power
+    lo = 0 if t0 is None else bisect.bisect_left(t, t0)
+    hi = len(t) if t1 is None else bisect.bisect_right(t, t1)
+    e = 0.0
+    for k in range(lo + 1, hi):     # trapezoids with both ends inside [t0, t1]
+        a, b = w[k - 1], w[k]
+        if a == a and b == b:
+            e += (a + b) / 2 * (t[k] - t[k - 1])
+    return e
+
+
+def total_energy_j(gpus, t0=None, t1=None):
+    return sum(energy_j(g, t0, t1) for g in gpus.values())
+
+
+def throttle_spans(g, power_frac=POWER_CAP_FRAC, temp_c=TEMP_LIMIT_C):
+    """[(start, end, reason, peak)] of consecutive samples at the power cap or thermal limit.
+
+    A sample stands for the interval up to the next one, so a single capped
+    sample is a span of one sampling period, not zero.
+    """
+    out, cur = [], None
+    for k in range(len(g)):
+        nxt = g.t[k + 1] if k + 1 < len(g) else g.t[k]
+        w, lim, temp = g.power[k], g.power_limit[k], g.temp[k]
+        reason = ("power" if w == w and lim == lim and lim > 0 and w >= power_frac * lim
+                  else "thermal" if temp == temp and temp >= temp_c else None)
+        peak = w if reason == "power" else temp
+        if reason and cur and cur[2] == reason:
+            cur[1], cur[3] = nxt, max(cur[3], peak)
+        else:
+            if cur:
+                out.append(tuple(cur))
+            cur = [g.t[k], nxt, reason, peak] if reason else None
+    if cur:
+        out.append(tuple(cur))
+    return out
+
+
+def headroom(g):
+    """(min free MiB, time of min, mean free MiB) from memory.total - memory.used."""
+    free = [(tot - used, t) for t, used, tot in zip(g.t, g.vram, g.vram_total)
+            if used == used and tot == tot]
+    if not free:
+        return None
+    lo = min(free)
+    return lo[0], lo[1], sum(f for f, _ in free) / len(free)
+
+
+def window_mean(g, col, t0, t1):
+    lo, hi = bisect.bisect_left(g.t, t0), bisect.bisect_left(g.t, t1)
+    vals = [v for v in col[lo:hi] if v == v]
+    return sum(vals) / len(vals) if vals else None
+
+
+def imbalance(gpus, width):
+    """[(t0, {index: mean util}, spread)] per `width`-second window; spread = (max-min)/max."""
+    ts = [t for g in gpus.values() for t in (g.t[0], g.t[-1]) if len(g)]
+    if len(gpus) < 2 or not ts:
+        return []
+    out, t = [], min(ts)
+    end = max(ts)
+    while t < end:
+        means = {i: window_mean(g, g.util, t, t + width) for i, g in gpus.items()}
+        vals = [v for v in means.values() if v is not None]
+        if len(vals) == len(gpus):
+            out.append((t, means, (max(vals) - min(vals)) / max(vals) if max(vals) > 0 else 0.0))
+        t += width
+    return out
+
+
+def align(g, col, ticks, max_gap_s=3.0):
+    """For each tick time, the nearest sample of `col` within max_gap_s, else NaN."""
+    out = array("d")
+    t, n, k = g.t, len(g.t), 0
+    for tick in ticks:
+        if tick != tick or not n:
+            out.append(NAN)
+            continue
+        while k + 1 < n and abs(t[k + 1] - tick) <= abs(t[k] - tick):
+            k += 1
+        out.append(col[k] if abs(t[k] - tick) <= max_gap_s else NAN)
+    return out
+
+
+def fmt_span(s):
+    return f"{s / 60:.1f} min" if s >= 120 else f"{s:.0f}s"
+
+
+def describe(gpus, t0=None, t1=None, tokens=None, width=60, span="metrics window"):
+    """Report lines shared by both reports (tags included)."""
+    lines = []
+    for i, g in sorted(gpus.items()):
+        hr = headroom(g)
+        if hr:
+            lines.append(f"GPU{i}: VRAM headroom min {hr[0]:,.0f} MiB at t={int(hr[1])} "
+                         f"(mean {hr[2]:,.0f} MiB free)   [{D}, total - used]")
+        spans = throttle_spans(g)
+        if spans:
+            secs = sum(b - a for a, b, _, _ in spans)
+            kinds = sorted({r for _, _, r, _ in spans})
+            lines.append(f"GPU{i}: at power cap / thermal limit {fmt_span(secs)} in {len(spans)} span(s) "
+                         f"({', '.join(kinds)})   [{D}, >= {POWER_CAP_FRAC:.0%} of power.limit "
+                         f"or >= {TEMP_LIMIT_C:.0f}C]")
+            for a, b, r, peak in sorted(spans, key=lambda s: s[0] - s[1])[:3]:
+                lines.append(f"      {r:<7} t={int(a)} for {fmt_span(b - a)} (peak {peak:.0f}"
+                             f"{'W' if r == 'power' else 'C'})")
+    e = total_energy_j(gpus, t0, t1)
+    if e:
+        lines.append(f"energy, all GPUs{f' ({span})' if t0 is not None else ''}: "
+                     f"{e / 3600:,.1f} Wh   [{D}, ∫ power.draw dt]")
+        if tokens:
+            lines.append(f"energy per generated token: {e / tokens:,.2f} J/token over {int(tokens):,} tokens   "
+                         f"[{D}, includes idle draw]")
+    imb = imbalance(gpus, width)
+    if imb:
+        spread = sorted(s for _, _, s in imb)
+        busy = [s for _, m, s in imb if min(m.values()) >= BUSY_UTIL]
+        lines.append(f"utilisation imbalance per {width:g}s window: median {spread[len(spread) // 2] * 100:.0f}% "
+                     f"max {spread[-1] * 100:.0f}% over {len(imb)} windows"
+                     f"{f'; {len(busy)} with every card busy' if busy else ''}   [{D}]")
+    return lines
+
+
+# ---------------- efficiency -----------------------------------------------------
+
+def power_at(gpus, ticks, max_gap_s=3.0):
+    """Summed power.draw at each (ascending) tick — each GPU's nearest sample
+    within max_gap_s; NaN where no GPU has one."""
+    cols = [align(g, g.power, ticks, max_gap_s) for g in gpus.values() if len(g)]
+    out = array("d")
+    for vals in zip(*cols):
+        got = [v for v in vals if v == v]
+        out.append(sum(got) if got else NAN)
+    return out
+
+
+def idle_power(gpus, quiet=()):
+    """(watts, how) summed over GPUs: median draw at the `quiet` times (nothing
+    running or queued) when there are enough of them, else the 5th percentile."""
+    w = sorted(finite(power_at(gpus, sorted(quiet))))
+    if len(w) >= IDLE_MIN_SAMPLES:
+        return w[len(w) // 2], f"median of {len(w)} idle samples"
+    w = sorted(finite(power_at(gpus, sorted({t for g in gpus.values() for t in g.t}))))
+    if not w:
+        return None, "no power samples"
+    return w[len(w) // 20], "5th percentile of all samples (too few idle ones)"
+
+
+def phase_energy(gpus, phases, idle_w, t0=None, t1=None):
+    """{phase: joules above idle} from overlapping per-request phase intervals.
+
+    phases maps a name ("prefill", "decode") to [(start, end)]. Each GPU's
+    own sample pairs inside [t0, t1] (the trapezoids total_energy_j counts)
+    are shared by how many intervals of each phase were open at the pair's
+    midpoint; idle_w is charged the same way over [t0, t1] cut at every
+    sample time. With no phase open a slice goes to "unattributed", so the
+    three add up to total_energy_j(gpus, t0, t1) - idle_w * (t1 - t0)
+    however the GPUs' sample clocks are staggered.
+    """
+    steps = {k: sweep(iv) for k, iv in phases.items()}
+    out = dict.fromkeys(list(phases) + ["unattributed"], 0.0)
+
+    def charge(joules, mid):
+        n = {}
+        for k, (times, levels) in steps.items():
+            i = bisect.bisect_right(times, mid) - 1
+            n[k] = levels[i] if i >= 0 else 0
+        busy = sum(n.values())
+        if not busy:
+            out["unattributed"] += joules
+            return
+        for k, c in n.items():
+            out[k] += joules * c / busy
+
+    stamps = set()
+    for g in gpus.values():
+        t, w = g.t, g.power
+        lo = 0 if t0 is None else bisect.bisect_left(t, t0)
+        hi = len(t) if t1 is None else bisect.bisect_right(t, t1)
+        stamps.update(t[lo:hi])
+        for k in range(lo + 1, hi):
+            a, b = w[k - 1], w[k]
+            if a == a and b == b:
+                charge((a + b) / 2 * (t[k] - t[k - 1]), (t[k - 1] + t[k]) / 2)
+    if not stamps:
+        return out
+    ts = sorted(stamps | {t0 if t0 is not None else min(stamps), t1 if t1 is not None else max(stamps)})
+    for a, b in zip(ts, ts[1:]):
+        charge(-idle_w * (b - a), (a + b) / 2)
+    return out
+
+
+def efficiency(prefill_tok, decode_tok, e_prefill, e_decode, net_j, gross_j, price_kwh):
+    """[(metric, value, unit, how)] — tokens/J per phase, kWh and cost per million tokens."""
+    if not gross_j or net_j < NET_MIN_FRAC * gross_j:
+        e_prefill = e_decode = net_j = None   # load indistinguishable from idle draw
+    rate = lambda tok, j: tok / j if tok and j and j > 0 else None
+    per_m = lambda j, tok: j / 3.6e6 / tok * 1e6 if tok and j and j > 0 else None
+    tok = (prefill_tok or 0) + (decode_tok or 0)
+    rows = [("prefill tokens/J", rate(prefill_tok, e_prefill), "tok/J", "uncached prompt tokens / prefill J above idle"),
+            ("decode tokens/J", rate(decode_tok, e_decode), "tok/J", "generated tokens / decode J above idle"),
+            ("kWh per 1M tokens, net", per_m(net_j, tok), "kWh", "J above idle / all tokens"),
+            ("kWh per 1M tokens, gross", per_m(gross_j, tok), "kWh", "all J incl. idle / all tokens"),
+            ("kWh per 1M generated, gross", per_m(gross_j, decode_tok), "kWh", "all J incl. idle / generated tokens")]
+    for m, v, _, how in rows[2:]:
+        rows.append((m.replace("kWh", "cost"), v * price_kwh if v is not None else None,
+                     "currency", f"{how} x {price_kwh:g}/kWh"))
+    return rows
+
+
+def efficiency_lines(rows):
+    """Report lines for efficiency() rows (all DERIVED)."""
+    out = []
+    for m, v, unit, how in rows:
+        num = "N/A" if v is None else f"{v:,.2f}" if v >= 1 else f"{v:.4f}"
+        out.append(f"{m:<28}: {num:>10} {unit if unit != 'currency' else '':<5}  [{D}, {how}]")
+    if any(v is None for _, v, _, _ in rows):
+        out.append(f"N/A: no tokens, no phase split, or energy above idle < {NET_MIN_FRAC:.0%} of gross "
+                   f"(pass --idle-w if the idle estimate is off)")
+    return out
+
+
+def write_efficiency(rows, path, extra=()):
+    """rows (+ (name, value, unit, how) extras such as idle W) -> CSV."""
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(("metric", "value", "unit", "how"))
+        for m, v, unit, how in list(extra) + list(rows):
+            w.writerow((m, "" if v is None else f"{v:.6g}", unit, how))
@@ -0,0 +1,144 @@
+"""Keep-alive HTTP client for the probe tools (stdlib; HTTP/2 optional via httpx).
+
+urllib opens a fresh TCP (+TLS) connection per request, so under load every
+client-side TTFT silently includes a handshake the server never sees. This
+pool keeps HTTP/1.1 connections open per (scheme, host, port) and reports the
+connection-setup cost separately:
+
+  connect_s   TCP connect + TLS handshake for this request; 0.0 when reused   MEASURED (client)
+  reused      the request rode an already-open connection                    MEASURED (client)
+
+With a pooled client, ttft_s/e2e_s are timed from request send on an open
+connection, i.e. they exclude connect_s. Proxy environment variables are not
+honoured — point --base-url at the endpoint directly.
+
+HTTP/2 (http2=True) needs `pip install 'httpx[http2]'`; it is never required
+for HTTP/1.1 use.
+"""
+import http.client, ssl, threading, time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Errors that mean "the idle connection we reused was already closed by the
+# server" — safe to retry once on a fresh connection.
+_STALE = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+          BrokenPipeError, ConnectionResetError, ConnectionAbortedError)
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status, body):
+        super().__init__(f"HTTP {status}: {body[:300]}")
+        self.status, self.body = status, body
+
+
+class PooledClient:
+    def __init__(self, maxsize: int = 16, http2: bool = False):
+        self.maxsize = maxsize
+        self.http2 = http2
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._ssl = ssl.create_default_context()
+        self._h2 = None
+        if http2:
+            try:
+                import httpx
+            except ImportError:
+                raise SystemExit("--http2 needs httpx: pip install 'httpx[http2]'")
+            self._h2 = httpx.Client(http2=True, timeout=None,
+                                    limits=httpx.Limits(max_connections=maxsize,
+                                                        max_keepalive_connections=maxsize))
+
+    # ---------------- HTTP/1.1 keep-alive ------------------------------------
+
+    def _checkout(self, scheme, netloc, timeout):
+        key = (scheme, netloc)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, 0.0, True
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        kw = {"context": self._ssl} if scheme == "https" else {}
+        conn = cls(netloc, timeout=timeout, **kw)
+        t = time.monotonic()
+        conn.connect()
+        return conn, time.monotonic() - t, False
+
+    def _checkin(self, scheme, netloc, conn):
+        with self._lock:
+            idle = self._idle.setdefault((scheme, netloc), [])
+            if len(idle) < self.maxsize:
+                idle.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def stream_post(self, url: str, body: bytes, headers: dict, timeout: float):
+        """POST and yield (status, line_iterator, info). Raises HTTPStatusError on >=400."""
+        if self._h2 is not None:
+            with self._stream_h2(url, body, headers, timeout) as r:
+                yield r
+            return
+        u = urlsplit(url)
+        path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        for attempt in (0, 1):
+            conn, connect_s, reused = self._checkout(u.scheme, u.netloc, timeout)
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                resp = conn.getresponse()
+                break
+            except _STALE:
+                conn.close()
+                if not reused or attempt:
+                    raise
+            except BaseException:
+                conn.close()
+                raise
+        ok = False
+        try:
+            if resp.status >= 400:
+                raise HTTPStatusError(resp.status, resp.read().decode("utf-8", "replace"))
+            info = {"connect_s": round(connect_s, 4), "reused": reused,
+                    "http_version": "HTTP/1.1"}
+            yield resp.status, iter(resp.readline, b""), info
+            resp.read()  # drain the chunk terminator so the connection can be reused
+            ok = not resp.will_close
+        finally:
+            if ok:
+                self._checkin(u.scheme, u.netloc, conn)
+            else:
+                conn.close()
+
+    # ---------------- HTTP/2 (optional) ---------------------------------------
+
+    @contextmanager
+    def _stream_h2(self, url, body, headers, timeout):
+        marks = {}
+
+        def trace(event, _info):
+            # httpcore emits connect_tcp/start_tls only when it opens a connection
+            if event.endswith(".started") and "connect_tcp" in event:
+                marks["start"] = time.monotonic()
+            elif event.endswith(".complete") and ("connect_tcp" in event or "start_tls" in event):
+                marks["end"] = time.monotonic()
+
+        with self._h2.stream("POST", url, content=body, headers=headers, timeout=timeout,
+                             extensions={"trace": trace}) as r:
+            if r.status_code >= 400:
+                raise HTTPStatusError(r.status_code, r.read().decode("utf-8", "replace"))
+            opened = "start" in marks
+            info = {"connect_s": round(marks["end"] - marks["start"], 4) if opened else 0.0,
+                    "reused": not opened, "http_version": r.http_version}
+            yield r.status_code, (line.encode() for line in r.iter_lines()), info
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for c in conns:
+                    c.close()
+            self._idle.clear()
+        if self._h2 is not None:
+            self._h2.close()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Fixed-memory, mergeable latency histogram (HDR-style, stdlib only).
+
+Values land in logarithmic buckets whose width grows with the value, so any
+quantile read back is within ±rel_err of a real sample no matter how many
+samples went in. Memory is bounded by the bucket count (≈1k buckets for
+100µs..100000s at 1%), not by run length — an hours-long soak at high
+concurrency costs the same as a smoke test.
+
+Histograms with the same (rel_err, lo, hi) merge exactly: merge per-worker or
+per-run files and the quantiles are those of the combined sample set.
+
+Quantiles read from a histogram are DERIVED (bucket representative, ±rel_err),
+even when every sample fed into it was MEASURED.
+
+Usage:
+  loghist.py show  <hist.json>...            merged p50/p90/p99/p99.9 per metric
+  loghist.py merge <out.json> <hist.json>... write the merged set
+"""
+import json, math, sys
+
+QUANTILES = (50, 90, 99, 99.9)
+
+
+class LogHistogram:
+    def __init__(self, rel_err=0.01, lo=1e-4, hi=1e5):
+        self.rel_err, self.lo, self.hi = rel_err, lo, hi
+        self.gamma = (1 + rel_err) / (1 - rel_err)
+        self._lg = math.log(self.gamma)
+        self.top = int(math.ceil(math.log(hi / lo) / self._lg))
+        self.counts = {}
+        self.count, self.sum = 0, 0.0
+        self.min = self.max = None
+
+    def _index(self, v):
+        if v <= self.lo:
+            return 0
+        return min(self.top, int(math.ceil(math.log(v / self.lo) / self._lg)))
+
+    def _value(self, i):
+        # midpoint (in relative terms) of (lo*g^(i-1), lo*g^i]; bucket 0 is [0, lo]
+        # and reads back as the observed min via the clamp in quantile()
+        return 0.0 if i == 0 else self.lo * 2 * self.gamma ** i / (self.gamma + 1)
+
+    def record(self, v, n=1):
+        if v is None or v != v or v < 0:
+            return
+        i = self._index(v)
+        self.counts[i] = self.counts.get(i, 0) + n
+        self.count += n
+        self.sum += v * n
+        self.min = v if self.min is None else min(self.min, v)
+        self.max = v if self.max is None else max(self.max, v)
+
+    def merge(self, other):
+        if (other.rel_err, other.lo, other.hi) != (self.rel_err, self.lo, self.hi):
+            raise ValueError("cannot merge histograms with different bucket layouts")
+        for i, n in other.counts.items():
+            self.counts[i] = self.counts.get(i, 0) + n
+        self.count += other.count
+        self.sum += other.sum
+        for v in (other.min, other.max):
+            if v is not None:
+                self.min = v if self.min is None else min(self.min, v)
+                self.max = v if self.max is None else max(self.max, v)
+        return self
+
+    def quantile(self, q):
+        """q in [0, 100]. None when empty. Clamped to the exact observed min/max."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen >= rank:
+                return min(self.max, max(self.min, self._value(i)))
+        return self.max
+
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def to_json(self):
+        return {"rel_err": self.rel_err, "lo": self.lo, "hi": self.hi,
+                "count": self.count, "sum": self.sum, "min": self.min, "max": self.max,
+                "buckets": {str(i): n for i, n in sorted(self.counts.items())}}
+
+    @classmethod
+    def from_json(cls, d):
+        h = cls(d["rel_err"], d["lo"], d["hi"])
+        h.counts = {int(i): n for i, n in d["buckets"].items()}
+        h.count, h.sum, h.min, h.max = d["count"], d["sum"], d["min"], d["max"]
+        return h
+
+
+def dump(hists, path, **meta):
+    """{name: LogHistogram} -> JSON file (a 'histogram set')."""
+    with open(path, "w") as f:
+        json.dump({"kind": "loghist-set", **meta,
+                   "metrics": {k: h.to_json() for k, h in hists.items()}}, f)
+
+
+def load_merged(paths):
+    """Merge histogram-set files into one {name: LogHistogram}."""
+    out = {}
+    for p in paths:
+        with open(p) as f:
+            d = json.load(f)
+        for k, hd in d.get("metrics", {}).items():
+            h = LogHistogram.from_json(hd)
+            if k in out:
+                out[k].merge(h)
+            else:
+                out[k] = h
+    return out
+
+
+def summary_line(name, h, quantiles=QUANTILES):
+    qs = "  ".join(f"p{q:g} {h.quantile(q):8.3f}" for q in quantiles)
+    return f"{name:<14}: n={h.count:<7} {qs}  max {h.max:8.3f}"
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ("show", "merge"):
+        sys.exit(__doc__)
+    if sys.argv[1] == "merge":
+        if len(sys.argv) < 4:
+            sys.exit(__doc__)
+        dump(load_merged(sys.argv[3:]), sys.argv[2], sources=sys.argv[3:])
+        return
+    for name, h in sorted(load_merged(sys.argv[2:]).items()):
+        if h.count:
+            print(summary_line(name, h))
+
+
+if __name__ == "__main__":
+    main()
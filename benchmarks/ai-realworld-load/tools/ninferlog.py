@@ -0,0 +1,265 @@
+"""NInfer schema-v8 request-log JSONL: event loading and per-request rows.
+
+Shared by report-ninfer.py and compare.py so both read a request_done event
+the same way. Token counts and timings_seconds are engine-reported (MEASURED);
+decode_tps is DERIVED as completion / decode_s.
+
+The full log covers the server's whole lifetime, so nothing here loads it
+into a list:
+
+  iter_events(path, kinds, offset)   streams (event, end_offset); with `kinds`
+                                     a line's "event" value is sniffed from the
+                                     raw bytes and only matching lines are
+                                     JSON-parsed
+  last_event(path, kind)             seeks backwards from EOF in blocks — the
+                                     latest server_start costs O(tail), not O(log)
+  complete_size(path)                offset past the last complete line, also
+                                     found from EOF
+  Cursor(path, state)                rows/errors so far + byte offset, saved to
+                                     a state file and an append-only row file;
+                                     the next read parses only bytes appended
+                                     since, and a save writes only new rows
+"""
+import json, os, re
+from datetime import datetime
+
+EVENT_RE = re.compile(rb'"event"\s*:\s*"([^"]*)"')
+BLOCK = 1 << 16
+ROW_VERSION = 2     # bump when request_row() gains fields: invalidates cursor state
+
+
+def load_events(path):
+    """Every event in `path` as a list — fine for a run window, not for the full log."""
+    return [e for e, _ in iter_events(path, complete_only=False)]
+
+
+def _sniff(line, kinds):
+    m = EVENT_RE.search(line)
+    if m:
+        return m.group(1).decode() in kinds
+    # no top-level "event" key: same loose match the reports always used
+    return any(k.encode() in line[:200] for k in kinds)
+
+
+def iter_events(path, kinds=None, offset=0, complete_only=True):
+    """Yield (event, end_offset) for lines from `offset` on.
+
+    With complete_only, a trailing line without its newline (collector
+    mid-write) is left for the next call: end_offset never passes it.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if complete_only and not line.endswith(b"\n"):
+                return
+            offset += len(line)
+            if kinds is not None and not _sniff(line, kinds):
+                continue
+            try:
+                yield json.loads(line), offset
+            except ValueError:
+                continue
+
+
+def complete_size(path):
+    """Offset just past the last complete line: where iter_events() would stop."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            step = min(BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            k = f.read(step).rfind(b"\n")
+            if k >= 0:
+                return pos + k + 1
+    return 0
+
+
+def _lines_backwards(f):
+    """Complete lines from EOF towards the start, one BLOCK read at a time."""
+    f.seek(0, os.SEEK_END)
+    pos, tail = f.tell(), b""
+    while pos > 0:
+        step = min(BLOCK, pos)
+        pos -= step
+        f.seek(pos)
+        chunk = f.read(step) + tail
+        lines = chunk.split(b"\n")
+        tail = lines.pop(0)            # may continue in the previous block
+        for line in reversed(lines):
+            if line.strip():
+                yield line
+    if tail.strip():
+        yield tail
+
+
+def last_event(path, kind):
+    """Latest event with "event": kind, scanning from EOF; None if absent.
+
+    An event carrying `kind` only elsewhere in its first 200 bytes (older
+    schemas) is used when no exact match exists anywhere in the file.
+    """
+    if not os.path.exists(path):
+        return None
+    fallback, needle = None, kind.encode()
+    with open(path, "rb") as f:
+        for line in _lines_backwards(f):
+            if needle not in line:
+                continue
+            m = EVENT_RE.search(line)
+            if m and m.group(1) == needle:
+                try:
+                    return json.loads(line)
+                except ValueError:
+                    continue
+            if fallback is None and needle in line[:200]:
+                try:
+                    fallback = json.loads(line)
+                except ValueError:
+                    pass
+    return fallback
+
+
+class Cursor:
+    """Incremental request_done/request_error reader with a resumable byte offset.
+
+    `state` holds the offset, a head fingerprint and the valid length of
+    `state`.rows, an append-only JSONL of the rows and errors read so far — a
+    save appends only what is new instead of rewriting everything. If the log
+    was truncated or replaced (shorter than the offset, or its first bytes
+    changed) the cursor starts over from 0.
+    """
+
+    KINDS = ("request_done", "request_error")
+
+    def __init__(self, path, state=None):
+        self.path, self.state = path, state
+        self.offset, self.head, self.rows, self.errs = 0, "", [], []
+        self._saved, self._kept, self._new = None, 0, []
+        self._rowlog = state + ".rows" if state else None
+        if state and os.path.exists(state):
+            try:
+                with open(state) as f:
+                    d = json.load(f)
+                if d.get("path") == os.path.abspath(path) and d.get("version") == ROW_VERSION:
+                    with open(self._rowlog, "rb") as f:
+                        data = f.read(d["rows_bytes"])
+                    if len(data) == d["rows_bytes"]:
+                        for line in data.splitlines():
+                            kind, r = json.loads(line)
+                            (self.rows if kind == "done" else self.errs).append(r)
+                        self.offset, self.head = d["offset"], d["head"]
+                        self._kept = len(data)
+                        self._saved = self.offset
+            except (OSError, ValueError, KeyError):
+                self.rows, self.errs = [], []
+
+    def _head(self):
+        # only bytes below the offset: they never change while the log just grows
+        with open(self.path, "rb") as f:
+            return f.read(min(128, self.offset)).hex()
+
+    def read(self):
+        """Parse what was appended since the last read; returns (rows, errors) so far."""
+        if not os.path.exists(self.path):
+            return self.rows, self.errs
+        if os.path.getsize(self.path) < self.offset or (self.offset and self._head() != self.head):
+            self.offset, self.rows, self.errs = 0, [], []
+            self._kept, self._new, self._saved = 0, [], None
+        for e, self.offset in iter_events(self.path, self.KINDS, self.offset):
+            if e.get("event") == "request_done":
+                r = request_row(e)
+                self.rows.append(r)
+                self._new.append(("done", r))
+            elif e.get("event") == "request_error":
+                self.errs.append(e)
+                self._new.append(("error", e))
+        self.head = self._head()
+        return self.rows, self.errs
+
+    def save(self):
+        if not self.state or self.offset == self._saved:
+            return
+        # truncate first: a save that died before updating `state` may have left a tail
+        with open(self._rowlog, "a+b") as f:
+            f.truncate(self._kept)
+            f.write("".join(json.dumps(x) + "\n" for x in self._new).encode())
+            self._kept = f.tell()
+        self._new = []
+        tmp = self.state + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(json.dumps({"path": os.path.abspath(self.path), "version": ROW_VERSION,
+                                "offset": self.offset, "head": self.head,
+                                "rows_bytes": self._kept}))
+        os.replace(tmp, self.state)
+        self._saved = self.offset
+
+
+def epoch(v):
+    """Event timestamp (epoch number or ISO-8601 string) -> float seconds, None if unusable."""
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, str):
+        try:
+            return datetime.fromisoformat(v.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def request_row(e):
+    """request_done event -> flat row; missing fields are None."""
+    t = e.get("timings_seconds", {}) or {}
+    spec = (t.get("speculative") or e.get("speculative") or {})
+    prompt = e.get("prompt_tokens") or e.get("tokens", {}).get("prompt")
+    comp = e.get("completion_tokens") or e.get("tokens", {}).get("completion")
+    cache = e.get("cache_tokens") or e.get("tokens", {}).get("cache")
+    row = {
+        "prompt": prompt, "completion": comp, "cache": cache,
+        "ttft": t.get("ttft"), "prefill": t.get("prefill"),
+        "decode": t.get("decode"), "vision": t.get("vision"),
+        "total": t.get("total"),
+        "finish": e.get("finish_reason"),
+        "reuse_path": e.get("prefix_reuse_path"),
+        "drafted": spec.get("drafted_tokens"),
+        "accepted": spec.get("accepted_tokens"),
+        # request_done is logged at completion: end is MEASURED, start = end - total
+        "end": epoch(e.get("ts") or e.get("time") or e.get("timestamp")),
+    }
+    if comp and t.get("decode"):
+        row["decode_tps"] = round(comp / t["decode"], 2)
+    if t.get("ttft") is not None and t.get("prefill") is not None:
+        # time to first token not spent in prefill: admission wait + scheduling [DERIVED]
+        row["wait"] = round(max(0.0, t["ttft"] - t["prefill"]), 6)
+    return row
+
+
+def request_rows(events):
+    """(rows for request_done events, request_error events)."""
+    rows = [request_row(e) for e in events if e.get("event") == "request_done"]
+    errs = [e for e in events if e.get("event") == "request_error"]
+    return rows, errs
+
+
+# ---------------- timeline ------------------------------------------------------
+
+def intervals(rows, phase="total"):
+    """[(start, end)] per request with a usable timestamp.
+
+    phase "total" = whole request; "wait" = start .. start + wait (admission
+    queue, DERIVED from ttft - prefill).
+    """
+    out = []
+    for r in rows:
+        if r.get("end") is None or r.get("total") is None:
+            continue
+        start = r["end"] - r["total"]
+        if phase == "total":
+            out.append((start, r["end"]))
+        elif r.get("wait"):
+            out.append((start, start + r["wait"]))
+    return out
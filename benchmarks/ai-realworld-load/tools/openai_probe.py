@@ -8,6 +8,12 @@ by construction:
   decode_tps  completion_tokens / (last_delta - first_delta)                  DERIVED
   e2e_s       request send -> stream close                                    MEASURED (client)
   usage       engine-reported final-chunk usage (include_usage)               MEASURED (server)
+  itl         gaps between consecutive streamed deltas (--itl-trace)          MEASURED (client)
+
+ITL is per streamed DELTA, not per token: an engine that flushes several
+tokens per chunk (MTP drafts, batched detokenisation) shows fewer, longer gaps.
+decode_tps is an average and hides stalls; the ITL trace is where a TP/PCIe
+hiccup or a recompute preemption shows up as a single long gap.
 
 Server-side TTFT/prefill/decode come from each engine's own instrumentation
 (vLLM /metrics, NInfer request-log JSONL) and are reported separately — client
@@ -20,25 +26,49 @@ Examples:
   openai_probe.py ... --image photo.jpg --prompt "Describe every object you see."
   openai_probe.py ... --tools-demo
   openai_probe.py ... --reasoning-effort medium --prompt "23*17?"
-  openai_probe.py ... --synthetic-tokens 64000   # context ladder w/ needle recall
+  openai_probe.py ... --synthetic-tokens 64000   # one needle prompt, needle at 40% depth
+  openai_probe.py ... --sweep --sizes 4k,16k,64k,200k --depths 0.1,0.5,0.9 --out ladder.jsonl
+  openai_probe.py ... --itl-trace --itl-file itl.f64   # per-delta timing + stall timeline
+  openai_probe.py ... --prompt-file w.txt --load --concurrency 4 --arrival poisson \
+      --rate 0.5 --requests 200 --cold-tag 'knee-{i}' --out runs/<dir>/probe.jsonl
+
+Sweep mode runs the context ladder: every size x needle depth cell is one
+request, sent one at a time so TTFT is prefill alone, each with its own
+--cold-tag line so no cell hits the prefix cache: size, depth and repeat are
+always appended to the tag ({size}, {depth}, {i} also expand inside it).
+It prints prefill tok/s per size (usage.prompt_tokens / ttft_s, DERIVED), a
+TTFT fit (a + b*n + c*n^2 and the log-log exponent) and a recall grid.
+
+Load mode is open-loop: arrivals follow the schedule (constant / poisson / burst)
+whether or not earlier requests finished, capped at --concurrency in flight.
+Every request is timed by the same probe() as a single run, so per-request
+ttft_s/decode_tps/e2e_s mean exactly what they mean above.
 """
-import argparse, base64, json, mimetypes, sys, time, urllib.request
+import argparse, asyncio, base64, json, math, mimetypes, random, sys, time, urllib.request
+from array import array
+from contextlib import contextmanager
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from httppool import PooledClient
+from loghist import QUANTILES, LogHistogram, dump
 
 NEEDLE = "The maintenance access code for rack seven is JADE-4471."
 
 
-def synthetic_prompt(n_tokens: int) -> str:
-    """Deterministic ~n_tokens filler with a retrieval needle at ~40% depth."""
+def synthetic_prompt(n_tokens: int, depth: float = 0.4) -> str:
+    """Deterministic ~n_tokens filler with a retrieval needle at `depth` (0..1)."""
     para = ("Sensor block %d reported nominal drift within tolerance; the "
             "calibration ledger recorded offset %d micro-units against reference "
             "channel %d, and the supervisor thread rotated its checkpoint without "
             "raising an alert. ")
-    parts, i = [], 0
-    # ~40 tokens per paragraph at ~4 chars/token
-    while sum(len(p) for p in parts) < n_tokens * 4:
+    parts, i, size = [], 0, 0
+    # ~40 tokens per paragraph at ~4 chars/token; running size keeps this O(n)
+    while size < n_tokens * 4:
         parts.append(para % (i, (i * 37) % 997, i % 16))
+        size += len(parts[-1])
         i += 1
-    parts.insert(int(len(parts) * 0.4), NEEDLE + " ")
+    parts.insert(int(len(parts) * depth), NEEDLE + " ")
     parts.append("\n\nQuestion: What is the maintenance access code for rack "
                  "seven? Answer with the code only.")
     return "".join(parts)
@@ -50,33 +80,8 @@ def data_uri(path: str) -> str:
         return f"data:{mime};base64," + base64.b64encode(f.read()).decode()
 
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--base-url", required=True)
-    ap.add_argument("--model", required=True)
-    ap.add_argument("--prompt")
-    ap.add_argument("--prompt-file")
-    ap.add_argument("--image", help="local image file, sent as a base64 data URI part")
-    ap.add_argument("--max-tokens", type=int, default=1024)
-    ap.add_argument("--cold-tag", help="unique first line -> defeats prefix reuse for a cold run")
-    ap.add_argument("--reasoning-effort", choices=["none", "low", "medium", "xhigh"])
-    ap.add_argument("--tools-demo", action="store_true")
-    ap.add_argument("--synthetic-tokens", type=int, help="generate ~N-token needle prompt")
-    ap.add_argument("--timeout", type=int, default=1800)
-    ap.add_argument("--api-key", default="benchmark")
-    args = ap.parse_args()
-
-    if args.synthetic_tokens:
-        text = synthetic_prompt(args.synthetic_tokens)
-    elif args.prompt_file:
-        text = open(args.prompt_file).read()
-    elif args.prompt:
-        text = args.prompt
-    else:
-        ap.error("need --prompt, --prompt-file, or --synthetic-tokens")
-    if args.cold_tag:
-        text = f"[run-id {args.cold_tag} — ignore this line]\n" + text
-
+def build_body(args, text: str) -> dict:
+    """OpenAI chat body for one request; identical across single and load modes."""
     content = [{"type": "text", "text": text}]
     if args.image:
         content.insert(0, {"type": "image_url", "image_url": {"url": data_uri(args.image)}})
@@ -106,26 +111,82 @@ def main():
         body["tool_choice"] = "auto"
         body["messages"] = [{"role": "user",
                              "content": "What's the weather in Rotterdam right now?"}]
+    return body
+
 
-    req = urllib.request.Request(
-        args.base_url.rstrip("/") + "/chat/completions",
-        data=json.dumps(body).encode(),
-        headers={"Content-Type": "application/json",
-                 "Authorization": f"Bearer {args.api_key}"},
-    )
+def itl_stats(stamps, t0: float, stall_s=None, top: int = 20) -> dict:
+    """Inter-delta gaps from monotonic delta stamps -> percentiles, longest stall, timeline.
 
-    out = {"base_url": args.base_url, "model": args.model, "status": None,
+    A stall is a gap longer than stall_s (default 5x the median gap). The
+    timeline lists the `top` longest stalls in stream order, each with its
+    offset from request send, so it can be lined up against vllm.log.
+    """
+    gaps = array("d", (stamps[i] - stamps[i - 1] for i in range(1, len(stamps))))
+    if not gaps:
+        return {"deltas": len(stamps), "gaps": 0}
+    srt = sorted(gaps)
+    q = lambda p: srt[min(len(srt) - 1, int(len(srt) * p / 100))]
+    thresh = stall_s if stall_s is not None else 5 * q(50)
+    stalls = [(i, g) for i, g in enumerate(gaps) if g > thresh]
+    worst = sorted(sorted(stalls, key=lambda x: -x[1])[:top])
+    longest = max(range(len(gaps)), key=gaps.__getitem__)
+    return {
+        "deltas": len(stamps), "gaps": len(gaps),
+        "p50_s": round(q(50), 4), "p90_s": round(q(90), 4),
+        "p99_s": round(q(99), 4), "p99_9_s": round(q(99.9), 4),
+        "longest_stall_s": round(gaps[longest], 4),
+        "longest_stall_at_s": round(stamps[longest] - t0, 3),
+        "stall_threshold_s": round(thresh, 4),
+        "stalls": len(stalls),
+        "stall_time_s": round(sum(g for _, g in stalls), 3),
+        "stall_timeline": [{"at_s": round(stamps[i] - t0, 3), "gap_s": round(g, 4),
+                            "after_delta": i} for i, g in worst],
+    }
+
+
+@contextmanager
+def _urllib_stream(url, data, headers, timeout):
+    req = urllib.request.Request(url, data=data, headers=headers)
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        yield resp.status, resp, None
+
+
+def probe(base_url: str, body: dict, api_key: str, timeout: float,
+          trace: bool = False, client=None) -> dict:
+    """Send one streamed request and time it. Never raises — errors land in out["error"].
+
+    trace=True also stamps every delta into an array('d') (one C-level append
+    per chunk; no per-chunk allocation), returned as out["_stamps"] with t0.
+    client=httppool.PooledClient reuses keep-alive connections; setup cost is
+    then reported as connect_s and excluded from ttft_s/e2e_s.
+    """
+    url = base_url.rstrip("/") + "/chat/completions"
+    data = json.dumps(body).encode()
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
+
+    out = {"base_url": base_url, "model": body.get("model"), "status": None,
            "ttft_s": None, "decode_tps": None, "e2e_s": None, "usage": None,
            "finish_reason": None, "tool_calls": [], "reasoning_chars": 0,
            "content_chars": 0, "text_head": "", "needle_found": None, "error": None}
+    if client is not None:
+        out.update(connect_s=None, conn_reused=None, http_version=None)
 
     t0 = time.monotonic()
     t_first = t_last = None
     text_out, reasoning_len = [], 0
+    stamps = array("d")
+    stamp = stamps.append if trace else None
+    setup = 0.0
+    stream = (_urllib_stream(url, data, headers, timeout) if client is None
+              else client.stream_post(url, data, headers, timeout))
     try:
-        with urllib.request.urlopen(req, timeout=args.timeout) as resp:
-            out["status"] = resp.status
-            for raw in resp:
+        with stream as (status, lines, info):
+            out["status"] = status
+            if info:
+                setup = info["connect_s"]
+                out.update(connect_s=setup, conn_reused=info["reused"],
+                           http_version=info["http_version"])
+            for raw in lines:
                 line = raw.decode("utf-8", "replace").strip()
                 if not line.startswith("data:"):
                     continue
@@ -153,6 +214,8 @@ def main():
                         if t_first is None:
                             t_first = now
                         t_last = now
+                        if stamp:
+                            stamp(now)
                     if ch.get("finish_reason"):
                         out["finish_reason"] = ch["finish_reason"]
                     # some engines put usage on the last choices chunk
@@ -162,6 +225,7 @@ def main():
         out["error"] = f"{type(e).__name__}: {e}"
 
     t_end = time.monotonic()
+    t0 += setup  # pooled: time from request send on an open connection
     full = "".join(text_out)
     out["e2e_s"] = round(t_end - t0, 3)
     out["ttft_s"] = round(t_first - t0, 3) if t_first else None
@@ -171,8 +235,449 @@ def main():
     comp = (out["usage"] or {}).get("completion_tokens")
     if comp and t_first and t_last and t_last > t_first:
         out["decode_tps"] = round(comp / (t_last - t_first), 2)
+    out["_text"] = full
+    if trace:
+        out["_stamps"], out["_t0"] = stamps, t0
+    return out
+
+
+# ---------------- load mode ---------------------------------------------------
+
+def arrival_offsets(kind: str, rate: float, burst: int, rng: random.Random):
+    """Open-loop send times (seconds from start). Infinite; the caller applies the budget.
+
+    constant  one request every 1/rate s
+    poisson   exponential inter-arrival gaps with mean 1/rate
+    burst     `burst` simultaneous requests every burst/rate s (same mean rate)
+    """
+    t, i = 0.0, 0
+    while True:
+        if kind == "constant":
+            yield i / rate
+        elif kind == "poisson":
+            yield t
+            t += rng.expovariate(rate)
+        else:
+            yield (i // burst) * burst / rate
+        i += 1
+
+
+async def run_load(send, offsets, concurrency: int, max_requests=None, duration=None,
+                   sink=None):
+    """Fire send(i) at each offset, open loop, at most `concurrency` in flight.
+
+    Arrivals follow the schedule regardless of completions. When the in-flight cap
+    is hit, requests wait client-side; that wait is recorded as client_queue_s and
+    is NOT part of ttft_s/e2e_s, which keep their single-probe definitions.
+    Results go to sink() as they complete and are not retained, so a soak run's
+    memory does not grow with its length.
+    """
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    gate = asyncio.Semaphore(concurrency)
+    t0 = time.monotonic()
+
+    async def one(i, off):
+        async with gate:
+            started = time.monotonic()
+            res = await loop.run_in_executor(pool, send, i)
+        res["req_index"] = i
+        res["scheduled_s"] = round(off, 3)
+        res["started_s"] = round(started - t0, 3)
+        res["client_queue_s"] = round(max(0.0, started - (t0 + off)), 3)
+        if sink:
+            sink(res)
+
+    pending, failed = set(), []
+
+    def done(task):
+        pending.discard(task)
+        if not task.cancelled() and task.exception():
+            failed.append(task.exception())
+
+    for i, off in enumerate(offsets):
+        if max_requests is not None and i >= max_requests:
+            break
+        if duration is not None and off >= duration:
+            break
+        delay = t0 + off - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(one(i, off))
+        pending.add(task)
+        task.add_done_callback(done)
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    pool.shutdown(wait=False)
+    if failed:
+        raise failed[0]   # a bug in send(), not a request error: probe() never raises
+
+
+class LoadStats:
+    """Running totals + fixed-memory histograms for a load run (nothing per-request kept)."""
+
+    HISTS = ("ttft_s", "tpot_s", "e2e_s", "decode_tps", "client_queue_s",
+             "itl_s", "longest_stall_s", "connect_s")
+
+    def __init__(self):
+        self.requests = self.ok = self.completion_tokens = 0
+        self.errors = Counter()
+        self.hists = {k: LogHistogram() for k in self.HISTS}
+
+    def add(self, r):
+        self.requests += 1
+        stamps = r.pop("_stamps", None)
+        if r["error"]:
+            self.errors[r["error"].split(":")[0]] += 1
+            return
+        self.ok += 1
+        self.completion_tokens += (r["usage"] or {}).get("completion_tokens") or 0
+        for k in ("ttft_s", "e2e_s", "decode_tps", "client_queue_s", "connect_s"):
+            self.hists[k].record(r.get(k))
+        if r.get("decode_tps"):
+            # per-request mean inter-token time, DERIVED as 1/decode_tps
+            self.hists["tpot_s"].record(1.0 / r["decode_tps"])
+        if stamps:
+            itl = self.hists["itl_s"]
+            for i in range(1, len(stamps)):
+                itl.record(stamps[i] - stamps[i - 1])
+            self.hists["longest_stall_s"].record((r.get("itl") or {}).get("longest_stall_s"))
+
+    def summary(self, wall_s):
+        summ = {"requests": self.requests, "ok": self.ok,
+                "errors": sum(self.errors.values()), "error_kinds": dict(self.errors),
+                "wall_s": round(wall_s, 3),
+                "completed_rps": round(self.ok / wall_s, 3) if wall_s > 0 else None,
+                "completion_tokens": self.completion_tokens,
+                "output_tps": round(self.completion_tokens / wall_s, 2) if wall_s > 0 else None}
+        for k, h in self.hists.items():
+            summ[k] = {"n": h.count} | {f"p{q:g}": (round(h.quantile(q), 4) if h.count else None)
+                                        for q in QUANTILES}
+        return summ
+
+
+def make_client(args, size):
+    if args.keepalive or args.http2:
+        return PooledClient(maxsize=size, http2=args.http2)
+    return None
+
+
+def stall_s(args):
+    return args.stall_ms / 1000 if args.stall_ms is not None else None
+
+
+class _KeepUnknown(dict):
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def format_tag(tag, **fields):
+    """--cold-tag with the known {fields} expanded; unknown placeholders,
+    positional "{}" and stray braces are left as typed instead of raising."""
+    try:
+        return tag.format_map(_KeepUnknown(fields))
+    except (ValueError, IndexError, AttributeError):
+        return tag
+
+
+def request_tag(tag, i):
+    """Per-request run-id: a tag that does not vary with {i} gets "-i" appended,
+    so two requests never share the run-id line (and with it, a cached prefix)."""
+    t = format_tag(tag, i=i)
+    return t if t != format_tag(tag, i=i + 1) else f"{t}-{i}"
+
+
+def main_load(args, text: str):
+    rng = random.Random(args.seed)
+    if args.max_requests is None and args.duration is None:
+        sys.exit("load mode needs --requests and/or --duration")
+    sink_f = open(args.out, "a") if args.out else None
+    stats = LoadStats()
+    client = make_client(args, args.concurrency)
+
+    def send(i):
+        t = text
+        if args.cold_tag:
+            t = f"[run-id {request_tag(args.cold_tag, i)} — ignore this line]\n" + text
+        r = probe(args.base_url, build_body(args, t), args.api_key, args.timeout,
+                  trace=args.itl_trace, client=client)
+        if args.synthetic_tokens:
+            r["needle_found"] = "JADE-4471" in r["_text"]
+        del r["_text"]
+        if args.itl_trace:
+            r["itl"] = itl_stats(r["_stamps"], r.pop("_t0"), stall_s(args))
+        return r
+
+    def sink(r):
+        stats.add(r)  # consumes the raw stamps; only the itl summary is written out
+        if sink_f:
+            sink_f.write(json.dumps(r) + "\n")
+            sink_f.flush()
+
+    t0 = time.monotonic()
+    try:
+        asyncio.run(run_load(
+            send, arrival_offsets(args.arrival, args.rate, args.burst_size, rng),
+            args.concurrency, args.max_requests, args.duration, sink))
+    finally:
+        if client:
+            client.close()
+    summ = stats.summary(time.monotonic() - t0)
+    summ.update({"base_url": args.base_url, "model": args.model, "arrival": args.arrival,
+                 "rate": args.rate, "concurrency": args.concurrency})
+    if sink_f:
+        sink_f.close()
+    if args.hist_out:
+        dump(stats.hists, args.hist_out, base_url=args.base_url, model=args.model,
+             arrival=args.arrival, rate=args.rate, concurrency=args.concurrency)
+    print(json.dumps(summ, indent=2))
+    sys.exit(0 if stats.ok else 1)
+
+
+# ---------------- context-ladder sweep -----------------------------------------
+
+SWEEP_SIZES = "4000,8000,16000,32000,64000,128000,200000"
+SWEEP_DEPTHS = "0.1,0.3,0.5,0.7,0.9"
+
+
+def grid(spec: str, kind):
+    """'4000,8000' -> [4000, 8000]; 'k' suffix accepted for sizes ('4k,200k')."""
+    out = []
+    for x in spec.split(","):
+        x = x.strip().lower()
+        out.append(kind(float(x[:-1]) * 1000) if x.endswith("k") else kind(x))
+    return out
+
+
+def median(xs):
+    xs = sorted(xs)
+    return xs[len(xs) // 2] if xs else None
+
+
+def solve(a, b):
+    """Gaussian elimination with partial pivoting; None if singular."""
+    n = len(b)
+    m = [row[:] + [v] for row, v in zip(a, b)]
+    for c in range(n):
+        p = max(range(c, n), key=lambda r: abs(m[r][c]))
+        if abs(m[p][c]) < 1e-12:
+            return None
+        m[c], m[p] = m[p], m[c]
+        for r in range(c + 1, n):
+            f = m[r][c] / m[c][c]
+            for k in range(c, n + 1):
+                m[r][k] -= f * m[c][k]
+    x = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        x[r] = (m[r][n] - sum(m[r][k] * x[k] for k in range(r + 1, n))) / m[r][r]
+    return x
+
+
+def fit_ttft(points):
+    """TTFT scaling over (prompt_tokens, ttft_s) points.
+
+    quad   ttft = a + b*n + c*n^2 (n in k-tokens): b ~ linear layers, c ~ attention
+    power  ttft ~ n^k from a log-log line: k near 1 is linear, near 2 attention-bound
+    """
+    pts = [(n / 1000, t) for n, t in points if n and t and t > 0]
+    out = {"points": len(pts)}
+    if len({n for n, _ in pts}) >= 3:
+        basis = lambda n: (1.0, n, n * n)
+        ata = [[sum(basis(n)[i] * basis(n)[j] for n, _ in pts) for j in range(3)] for i in range(3)]
+        aty = [sum(basis(n)[i] * t for n, t in pts) for i in range(3)]
+        coef = solve(ata, aty)
+        if coef:
+            my = sum(t for _, t in pts) / len(pts)
+            ss_tot = sum((t - my) ** 2 for _, t in pts)
+            ss_res = sum((t - sum(c * b for c, b in zip(coef, basis(n)))) ** 2 for n, t in pts)
+            out["quad"] = {"a_s": coef[0], "b_s_per_ktok": coef[1], "c_s_per_ktok2": coef[2],
+                           "r2": 1 - ss_res / ss_tot if ss_tot else None}
+    if len({n for n, _ in pts}) >= 2:
+        lx = [math.log(n) for n, _ in pts]
+        ly = [math.log(t) for _, t in pts]
+        mx, my = sum(lx) / len(lx), sum(ly) / len(ly)
+        sxx = sum((x - mx) ** 2 for x in lx)
+        if sxx:
+            k = sum((x - mx) * (y - my) for x, y in zip(lx, ly)) / sxx
+            out["power"] = {"k": k, "ttft_at_1ktok_s": math.exp(my - k * mx)}
+    return out
+
+
+def cell_tag(tag, size, depth, rep):
+    """Sweep-cell run-id: the user's tag with known fields expanded (anything else
+    left verbatim), then size/depth/rep appended so no two cells share a prefix."""
+    return f"{format_tag(tag, size=size, depth=depth, i=rep)}-{size}-{depth}-{rep}"
+
+
+def main_sweep(args):
+    """Sequential grid of context sizes x needle depths, one cold request per cell."""
+    sizes, depths = grid(args.sizes, int), grid(args.depths, float)
+    if not sizes or not depths or any(not 0 <= d <= 1 for d in depths):
+        sys.exit("--sizes must be token counts, --depths fractions in 0..1")
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    tag = args.cold_tag or "sweep-" + stamp
+    sink_f = open(args.out, "a") if args.out else None
+    client = make_client(args, 1)
+    cells = []
+    try:
+        for size in sizes:
+            for depth in depths:
+                for rep in range(args.repeat):
+                    # unique first line per cell: the filler is shared across sizes
+                    # and depths, so without it every cell would be a prefix-cache hit
+                    text = (f"[run-id {cell_tag(tag, size, depth, rep)} — ignore this line]\n"
+                            + synthetic_prompt(size, depth))
+                    r = probe(args.base_url, build_body(args, text), args.api_key, args.timeout,
+                              client=client)
+                    full = r.pop("_text")
+                    usage = r["usage"] or {}
+                    cell = {"size": size, "depth": depth, "rep": rep, "status": r["status"],
+                            "error": r["error"], "ttft_s": r["ttft_s"], "e2e_s": r["e2e_s"],
+                            "prompt_tokens": usage.get("prompt_tokens"),
+                            "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens"),
+                            "needle_found": None if r["error"] else "JADE-4471" in full}
+                    if cell["prompt_tokens"] and cell["ttft_s"]:
+                        cell["prefill_tps"] = round(cell["prompt_tokens"] / cell["ttft_s"], 1)
+                    cells.append(cell)
+                    if sink_f:
+                        sink_f.write(json.dumps(cell) + "\n")
+                        sink_f.flush()
+                    print(f"  {size:>7} tok  depth {depth:.0%}  ttft {cell['ttft_s'] or 0:7.2f}s  "
+                          f"{'recall' if cell['needle_found'] else 'MISS' if cell['needle_found'] is False else 'error'}",
+                          file=sys.stderr)
+    finally:
+        if client:
+            client.close()
+    if sink_f:
+        sink_f.close()
+
+    ok = [c for c in cells if not c["error"] and c["ttft_s"]]
+    print(f"context ladder: {len(sizes)} sizes x {len(depths)} depths x {args.repeat}, cold tag per cell")
+    print("\nprefill throughput vs context   [DERIVED, usage.prompt_tokens / client ttft_s]")
+    print(f"  {'size':>8} {'prompt_tok':>11} {'ttft p50':>9} {'tok/s p50':>10} {'cached':>7}")
+    for size in sizes:
+        row = [c for c in ok if c["size"] == size]
+        if not row:
+            print(f"  {size:>8} {'–':>11}")
+            continue
+        med = lambda k: median([c[k] for c in row if c.get(k) is not None])
+        cached = sum(c["cached_tokens"] or 0 for c in row)
+        print(f"  {size:>8} {med('prompt_tokens') or 0:>11,} {med('ttft_s'):>8.2f}s "
+              f"{med('prefill_tps') or 0:>10,.0f} {cached:>7,}")
+    if any(c["cached_tokens"] for c in ok):
+        print("  !! cached_tokens > 0: the engine reused a prefix — ttft is not a cold prefill")
+
+    fit = fit_ttft([(c["prompt_tokens"] or c["size"], c["ttft_s"]) for c in ok])
+    print("\nTTFT scaling fit   [DERIVED, least squares over every cell]")
+    if "quad" in fit:
+        q = fit["quad"]
+        r2 = f", R^2 {q['r2']:.3f}" if q["r2"] is not None else ""
+        print(f"  ttft = {q['a_s']:.3f} + {q['b_s_per_ktok']:.4g}*n + {q['c_s_per_ktok2']:.3g}*n^2 s"
+              f"  (n in k-tokens{r2})")
+    if "power" in fit:
+        print(f"  ttft ~ n^{fit['power']['k']:.2f}   (1 linear, 2 attention-bound)")
+    if len(fit) == 1:
+        print("  too few distinct sizes for a fit")
+
+    print("\nneedle recall   [MEASURED, 'JADE-4471' in the reply; n/m = found/ok requests]")
+    print(f"  {'size':>8} " + " ".join(f"{d:>6.0%}" for d in depths))
+    for size in sizes:
+        cellstr = []
+        for d in depths:
+            cs = [c for c in cells if c["size"] == size and c["depth"] == d]
+            good = [c for c in cs if c["needle_found"] is not None]
+            found = sum(1 for c in good if c["needle_found"])
+            cellstr.append("err" if not good else "ok" if found == len(good) == 1
+                           else "MISS" if len(good) == 1 else f"{found}/{len(good)}")
+        print(f"  {size:>8} " + " ".join(f"{x:>6}" for x in cellstr))
+    errors = len(cells) - len(ok)
+    if errors:
+        print(f"\n{errors} request(s) failed or streamed nothing — see --out for details")
+    sys.exit(0 if not errors else 1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base-url", required=True)
+    ap.add_argument("--model", required=True)
+    ap.add_argument("--prompt")
+    ap.add_argument("--prompt-file")
+    ap.add_argument("--image", help="local image file, sent as a base64 data URI part")
+    ap.add_argument("--max-tokens", type=int, default=1024)
+    ap.add_argument("--cold-tag", help="unique first line -> defeats prefix reuse for a cold run"
+                                       " (load mode: '{i}' expands to the request index, appended if absent)")
+    ap.add_argument("--reasoning-effort", choices=["none", "low", "medium", "xhigh"])
+    ap.add_argument("--tools-demo", action="store_true")
+    ap.add_argument("--synthetic-tokens", type=int, help="generate ~N-token needle prompt")
+    ap.add_argument("--timeout", type=int, default=1800)
+    ap.add_argument("--api-key", default="benchmark")
+    ap.add_argument("--itl-trace", action="store_true",
+                    help="stamp every streamed delta; report ITL percentiles + stall timeline")
+    ap.add_argument("--itl-file", help="also write per-delta offsets as raw float64 (single run)")
+    ap.add_argument("--stall-ms", type=float, help="stall threshold (default 5x median ITL)")
+    ap.add_argument("--keepalive", action="store_true",
+                    help="pooled HTTP/1.1 keep-alive client; reports connect_s separately"
+                         " and times ttft_s/e2e_s from send on an open connection")
+    ap.add_argument("--http2", action="store_true", help="like --keepalive over HTTP/2 (needs httpx[http2])")
+    lg = ap.add_argument_group("load mode (open-loop; same per-request timing as one probe)")
+    lg.add_argument("--load", action="store_true", help="run many requests instead of one")
+    lg.add_argument("--concurrency", type=int, default=4, help="max requests in flight")
+    lg.add_argument("--arrival", choices=["constant", "poisson", "burst"], default="poisson")
+    lg.add_argument("--rate", type=float, default=1.0, help="mean arrivals per second")
+    lg.add_argument("--burst-size", type=int, default=4, help="requests per burst (--arrival burst)")
+    lg.add_argument("--requests", dest="max_requests", type=int, help="request budget")
+    lg.add_argument("--duration", type=float, help="stop scheduling arrivals after S seconds")
+    lg.add_argument("--seed", type=int, default=0, help="poisson schedule seed (reproducible)")
+    lg.add_argument("--out", help="append one JSON line per completed request")
+    lg.add_argument("--hist-out", help="write mergeable latency histograms (loghist.py format);"
+                                       " name it <run-dir>/probe-hist*.json for the reports")
+    sg = ap.add_argument_group("context-ladder sweep (sequential, one cold request per cell)")
+    sg.add_argument("--sweep", action="store_true", help="grid of --sizes x --depths needle prompts")
+    sg.add_argument("--sizes", default=SWEEP_SIZES, help=f"prompt sizes in tokens (default {SWEEP_SIZES})")
+    sg.add_argument("--depths", default=SWEEP_DEPTHS, help=f"needle depths 0..1 (default {SWEEP_DEPTHS})")
+    sg.add_argument("--repeat", type=int, default=1, help="requests per cell")
+    args = ap.parse_args()
+
+    if args.sweep:
+        if args.load or args.repeat < 1:
+            ap.error("--sweep runs its own grid: drop --load; --repeat must be >= 1")
+        return main_sweep(args)
+    if args.synthetic_tokens:
+        text = synthetic_prompt(args.synthetic_tokens)
+    elif args.prompt_file:
+        text = open(args.prompt_file).read()
+    elif args.prompt:
+        text = args.prompt
+    else:
+        ap.error("need --prompt, --prompt-file, or --synthetic-tokens")
+    if args.load:
+        if args.rate <= 0 or args.concurrency < 1 or args.burst_size < 1:
+            ap.error("--rate, --concurrency and --burst-size must be positive")
+        return main_load(args, text)
+    if args.cold_tag:
+        text = f"[run-id {args.cold_tag} — ignore this line]\n" + text
+
+    client = make_client(args, 1)
+    try:
+        out = probe(args.base_url, build_body(args, text), args.api_key, args.timeout,
+                    trace=args.itl_trace or bool(args.itl_file), client=client)
+    finally:
+        if client:
+            client.close()
+    full = out.pop("_text")
     if args.synthetic_tokens:
         out["needle_found"] = "JADE-4471" in full
+    if "_stamps" in out:
+        stamps, t0 = out.pop("_stamps"), out.pop("_t0")
+        out["itl"] = itl_stats(stamps, t0, stall_s(args))
+        if args.itl_file:
+            # raw little-endian float64 seconds since request send, one per delta
+            rel = array("d", (x - t0 for x in stamps))
+            if sys.byteorder != "little":
+                rel.byteswap()
+            with open(args.itl_file, "wb") as f:
+                rel.tofile(f)
+            out["itl"]["file"] = args.itl_file
     print(json.dumps(out, indent=2))
     sys.exit(0 if not out["error"] else 1)
 
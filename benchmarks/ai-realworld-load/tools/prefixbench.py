@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Prefix-cache payoff under concurrency: shared-prefix branch workloads.
+
+ab-smallload.sh only contrasts a cold prompt with its verbatim repeat. Real
+traffic (Open WebUI chats, Perplexica) shares a system prompt and conversation
+history and then diverges. Here every cell of a grid is one such family:
+
+  shared prefix   system message, --fraction of ~--tokens (the divergence point)
+  branches        --branches requests with distinct user suffixes after it
+  mode  primed    one request warms the prefix, then all branches fire at once
+        cold      all branches fire at once on a prefix nobody has seen
+
+Each cell's prefix starts with its own run-id line, so cells never reuse each
+other's KV. Per cell the harness reports:
+
+  ttft_s          client TTFT p50 / max over the branches          MEASURED (client)
+  cached (usage)  usage.prompt_tokens_details.cached_tokens summed MEASURED (server, per request)
+  cached (server) --metrics-url: vllm:prompt_tokens_cached_total delta across the cell,
+                  --ninfer-log: cache_tokens of the cell's request_done events
+                                                                   MEASURED (server)
+  reuse %         cached / prompt tokens of the branches           DERIVED
+  payoff          TTFT p50 of the 0%-shared cell (same branches/mode) / this cell's
+                                                                   DERIVED
+
+Server counters are read between cells and cells run one after another, so
+nothing else should be using the endpoint. The usage field is optional in the
+OpenAI schema; engines that omit it show "–".
+
+Usage:
+  prefixbench.py --base-url URL --model MODEL [--tokens 8000]
+      [--fractions 0,0.25,0.5,0.75,0.95] [--branches 1,4,8] [--modes primed,cold]
+      [--metrics-url http://vllm:8000/metrics | --ninfer-log runs/<dir>/requests.jsonl.stream]
+      [--max-tokens 16] [--keepalive] [--out runs/<dir>/prefixbench.jsonl]
+"""
+import argparse, json, sys, time, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from ninferlog import complete_size, iter_events, request_row
+from openai_probe import make_client, median, probe
+
+M, D = "MEASURED", "DERIVED"
+CHARS_PER_TOKEN = 4
+SETTLE_S = 1.0    # wait after a cell before reading server counters
+
+
+def filler(n_tokens: int, seed: str) -> str:
+    """Deterministic ~n_tokens of prose, different for every seed; O(n)."""
+    para = ("Ticket %s-%d: the operator noted that queue %d drained in %d ms after the "
+            "rollout, the dashboard for shard %d stayed green, and the follow-up owner "
+            "was asked to confirm the retention window before Friday. ")
+    parts, i, size = [], 0, 0
+    while size < n_tokens * CHARS_PER_TOKEN:
+        parts.append(para % (seed, i, i % 29, (i * 53) % 991, i % 7))
+        size += len(parts[-1])
+        i += 1
+    return "".join(parts)
+
+
+def branch_body(model, tag, tokens, fraction, b, max_tokens):
+    """System = run-id line + shared prefix; user = this branch's own suffix."""
+    shared = int(tokens * fraction)
+    system = f"[run-id {tag} — ignore this line]\n" + filler(shared, "shared")
+    user = (filler(tokens - shared, f"branch{b}")
+            + f"\n\nQuestion {b}: in one short sentence, which shard is mentioned most?")
+    return {"model": model, "max_tokens": max_tokens, "stream": True,
+            "stream_options": {"include_usage": True},
+            "messages": [{"role": "system", "content": system},
+                         {"role": "user", "content": user}]}
+
+
+class VllmCounters:
+    """prompt / cached token counters from a vLLM /metrics endpoint, summed over series."""
+
+    NAMES = ("vllm:prompt_tokens_total", "vllm:prompt_tokens_cached_total")
+
+    def __init__(self, url):
+        self.url = url
+
+    def read(self):
+        out = dict.fromkeys(self.NAMES, 0.0)
+        with urllib.request.urlopen(self.url, timeout=30) as resp:
+            for line in resp.read().decode("utf-8", "replace").splitlines():
+                name = line.split("{", 1)[0].split(" ", 1)[0]
+                if name in out:
+                    try:
+                        out[name] += float(line.rsplit(" ", 1)[1])
+                    except ValueError:
+                        pass
+        return out
+
+    def delta(self, before, after):
+        return {"prompt": after[self.NAMES[0]] - before[self.NAMES[0]],
+                "cached": after[self.NAMES[1]] - before[self.NAMES[1]]}
+
+
+class NinferLog:
+    """prompt / cache tokens of request_done events appended to a collected log."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        # never mid-line: a half-written event belongs to the next cell's window
+        return complete_size(self.path)
+
+    def delta(self, before, after):
+        prompt = cached = 0
+        for e, end in iter_events(self.path, ("request_done",), before):
+            if end > after:
+                break
+            r = request_row(e)
+            prompt += r["prompt"] or 0
+            cached += r["cache"] or 0
+        return {"prompt": prompt, "cached": cached}
+
+
+def run_cell(args, client, server, fraction, branches, mode, tag):
+    """One family: optional primer, then `branches` concurrent requests."""
+    before = server.read() if server else None
+    primer = None
+    if mode == "primed":
+        primer = probe(args.base_url, branch_body(args.model, tag, args.tokens, fraction, "primer",
+                                                  args.max_tokens),
+                       args.api_key, args.timeout, client=client)
+        primer.pop("_text")
+    bodies = [branch_body(args.model, tag, args.tokens, fraction, b, args.max_tokens)
+              for b in range(branches)]
+    with ThreadPoolExecutor(max_workers=branches) as ex:
+        rs = list(ex.map(lambda body: probe(args.base_url, body, args.api_key, args.timeout,
+                                            client=client), bodies))
+    for r in rs:
+        r.pop("_text")
+    cell = {"fraction": fraction, "branches": branches, "mode": mode, "tag": tag,
+            "errors": sum(1 for r in rs if r["error"]),
+            "ttft_s": [r["ttft_s"] for r in rs],
+            "prompt_tokens": [(r["usage"] or {}).get("prompt_tokens") for r in rs],
+            "cached_tokens": [((r["usage"] or {}).get("prompt_tokens_details") or {})
+                              .get("cached_tokens") for r in rs]}
+    if primer:
+        cell["primer"] = {k: primer[k] for k in ("ttft_s", "usage", "error")}
+    if server:
+        time.sleep(SETTLE_S)
+        cell["server"] = server.delta(before, server.read())   # includes the primer
+    return cell
+
+
+def fmt(v, f="{:,.0f}"):
+    return f.format(v) if v is not None else "–"
+
+
+def render(cells, args):
+    print(f"prefixbench: ~{args.tokens:,} prompt tokens, {len(cells)} cells, "
+          f"server counters: {'vLLM /metrics' if args.metrics_url else 'NInfer log' if args.ninfer_log else 'none'}")
+    print(f"\n  {'shared':>6} {'br':>3} {'mode':<6} {'ttft p50':>9} {'ttft max':>9} {'prompt':>9} "
+          f"{'cached(usage)':>13} {'cached(srv)':>11} {'reuse%':>7} {'payoff':>7}")
+    base = {(c["branches"], c["mode"]): c for c in cells if c["fraction"] == 0}
+    for c in cells:
+        ttft = [t for t in c["ttft_s"] if t is not None]
+        p50 = median(ttft)
+        prompt = sum(p for p in c["prompt_tokens"] if p)
+        usage = [x for x in c["cached_tokens"] if x is not None]
+        cached_u = sum(usage) if usage else None
+        cached_s = c.get("server", {}).get("cached")
+        cached = cached_u if cached_u is not None else cached_s
+        ref = base.get((c["branches"], c["mode"]))
+        ref50 = median([t for t in ref["ttft_s"] if t is not None]) if ref else None
+        payoff = ref50 / p50 if ref50 and p50 and ref is not c else None
+        print(f"  {c['fraction']:>6.0%} {c['branches']:>3} {c['mode']:<6} {fmt(p50, '{:.3f}s'):>9} "
+              f"{fmt(max(ttft) if ttft else None, '{:.3f}s'):>9} {fmt(prompt or None):>9} "
+              f"{fmt(cached_u):>13} {fmt(cached_s):>11} "
+              f"{fmt(cached / prompt * 100 if cached is not None and prompt else None, '{:.1f}'):>7} "
+              f"{fmt(payoff, '{:.2f}x'):>7}" + (f"  {c['errors']} error(s)" if c["errors"] else ""))
+    print(f"\n  ttft [{M}, client]; cached(usage) [{M}, per-request usage, branches only]; "
+          f"cached(srv) [{M}, server counters, primer included]")
+    print(f"  reuse% [{D}, cached / prompt of the branches]; payoff [{D}, 0%-shared ttft p50 / this p50]")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--base-url", required=True)
+    ap.add_argument("--model", required=True)
+    ap.add_argument("--tokens", type=int, default=8000, help="approximate prompt size per request")
+    ap.add_argument("--fractions", default="0,0.25,0.5,0.75,0.95",
+                    help="shared-prefix share of the prompt (divergence point), each in [0, 1)")
+    ap.add_argument("--branches", default="1,4,8", help="concurrent divergent requests per family")
+    ap.add_argument("--modes", default="primed,cold", help="primed and/or cold")
+    ap.add_argument("--max-tokens", type=int, default=16)
+    ap.add_argument("--metrics-url", help="vLLM /metrics URL for prompt_tokens_cached_total deltas")
+    ap.add_argument("--ninfer-log", help="collected NInfer requests.jsonl.stream for cache_tokens")
+    ap.add_argument("--keepalive", action="store_true")
+    ap.add_argument("--http2", action="store_true")
+    ap.add_argument("--timeout", type=int, default=1800)
+    ap.add_argument("--api-key", default="benchmark")
+    ap.add_argument("--out", help="append one JSON line per cell")
+    args = ap.parse_args()
+
+    fractions = [float(x) for x in args.fractions.split(",")]
+    branches = [int(x) for x in args.branches.split(",")]
+    modes = args.modes.split(",")
+    if any(not 0 <= f < 1 for f in fractions) or any(b < 1 for b in branches) \
+            or any(m not in ("primed", "cold") for m in modes):
+        ap.error("--fractions in [0, 1), --branches >= 1, --modes primed|cold")
+    if args.metrics_url and args.ninfer_log:
+        ap.error("pick one of --metrics-url / --ninfer-log")
+    server = (VllmCounters(args.metrics_url) if args.metrics_url
+              else NinferLog(args.ninfer_log) if args.ninfer_log else None)
+    client = make_client(args, max(branches))
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    sink_f = open(args.out, "a") if args.out else None
+
+    cells = []
+    try:
+        for mode in modes:
+            for b in branches:
+                for f in fractions:
+                    tag = f"prefix-{stamp}-{mode}-{b}-{f:g}"
+                    print(f"  {mode:<6} branches={b:<3} shared={f:.0%}", file=sys.stderr)
+                    c = run_cell(args, client, server, f, b, mode, tag)
+                    cells.append(c)
+                    if sink_f:
+                        sink_f.write(json.dumps(c) + "\n")
+                        sink_f.flush()
+    finally:
+        if client:
+            client.close()
+    if sink_f:
+        sink_f.close()
+    render(cells, args)
+    sys.exit(0 if not any(c["errors"] for c in cells) else 1)
+
+
+if __name__ == "__main__":
+    main()
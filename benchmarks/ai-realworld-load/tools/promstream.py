@@ -0,0 +1,294 @@
+"""Single-pass columnar reader for collector metrics.stream files (stdlib only).
+
+collect.sh appends one block per ~2s tick:
+
+  ===TICK 2026-08-10T12:00:00Z 1786363200
+  vllm:num_requests_running{engine="0",model_name="qwen3.8-27b"} 2.0
+  ...
+
+The old reader kept every tick as a dict keyed by the full Prometheus label
+string and prefix-scanned it per lookup. Here each series key is interned once
+and gets one array('d') column, NaN-padded for ticks where it was absent, plus
+one shared array of tick epochs. Memory is ~8 bytes x ticks x kept-series, and
+every report section is a pass over a few columns: O(ticks).
+
+Pass keep=<predicate on metric name> to materialise only the series a report
+uses — a multi-hour run then costs a few columns, not the whole scrape.
+
+Each key is also parsed once into (name, labels) and indexed by name, so
+lookups are by metric name plus a label filter, never by string prefix:
+
+  store.series("vllm:kv_cache_usage_perc", engine="0")   -> [(labels, column)]
+  store.total("vllm:num_requests_running")                -> column summed over series
+  store.buckets("vllm:request_prompt_tokens")             -> [(le, column)] per bucket
+
+With several engines or models scraped, "first key with this prefix" silently
+picked one of them; here the caller filters by label or aggregates explicitly.
+"""
+import math, os, re, sys
+from array import array
+
+NAN = float("nan")
+LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def split_key(key):
+    """'name{labels}' -> (name, 'labels'); labels '' when absent."""
+    i = key.find("{")
+    if i < 0:
+        return key, ""
+    return key[:i], key[i + 1:key.rindex("}")]
+
+
+class TickStore:
+    def __init__(self, keep=None):
+        self.keep = keep
+        self.ts = array("d")   # tick epoch seconds (NaN when the marker had none)
+        self.keys = []         # series id -> interned full key
+        self.sid = {}          # full key -> series id
+        self.cols = []         # series id -> array('d'), one slot per tick
+        self.labels = []       # series id -> {label: value}
+        self.names = {}        # metric name -> [series id]
+        self._hist = {}        # (name, filter) -> [(le, column)], built on first use
+        self._skip = set()     # keys rejected by `keep`, so they are tested once
+        self._open = False
+        self._got = False      # current tick has at least one kept value
+
+    def __len__(self):
+        return len(self.ts)
+
+    # ---------------- ingestion ---------------------------------------------
+
+    def _series(self, key):
+        sid = self.sid.get(key)
+        if sid is None:
+            if key in self._skip:
+                return None
+            if self.keep is not None and not self.keep(split_key(key)[0]):
+                self._skip.add(key)
+                return None
+            key = sys.intern(key)
+            sid = self.sid[key] = len(self.keys)
+            self.keys.append(key)
+            name, lab = split_key(key)
+            self.labels.append(dict(LABEL_RE.findall(lab)))
+            self.names.setdefault(sys.intern(name), []).append(sid)
+            self._hist.clear()
+            # back-fill ticks before this series first appeared
+            self.cols.append(array("d", [NAN]) * len(self.ts))
+        return sid
+
+    def _start_tick(self, line):
+        if self._open and not self._got:
+            self._drop_last()
+        p = line.split()
+        self.ts.append(float(p[2]) if len(p) > 2 and p[2].isdigit() else NAN)
+        for c in self.cols:
+            c.append(NAN)
+        self._open, self._got = True, False
+
+    def _drop_last(self):
+        self.ts.pop()
+        for c in self.cols:
+            c.pop()
+
+    def adopt(self, key, col):
+        """Add a fully-built column (len == ticks) for `key`, e.g. from a runpack file."""
+        name, lab = split_key(key)
+        if self.keep is not None and not self.keep(name):
+            return None
+        key = sys.intern(key)
+        sid = self.sid[key] = len(self.keys)
+        self.keys.append(key)
+        self.labels.append(dict(LABEL_RE.findall(lab)))
+        self.names.setdefault(sys.intern(name), []).append(sid)
+        self.cols.append(col)
+        self._hist.clear()
+        return sid
+
+    def finish(self):
+        """Drop a trailing tick with no values (collector stopped mid-scrape)."""
+        if self._open and not self._got:
+            self._drop_last()
+            self._open = False
+        return self
+
+    def feed(self, line):
+        """Consume one line of metrics.stream (trailing newline optional)."""
+        if line.startswith("===TICK"):
+            self._start_tick(line)
+        elif self._open and line.startswith("vllm:"):
+            key, _, val = line.rpartition(" ")
+            try:
+                v = float(val)
+            except ValueError:
+                return
+            sid = self._series(key)
+            if sid is not None:
+                self.cols[sid][-1] = v
+                self._got = True
+
+    def feed_file(self, path):
+        # feed() inlined: this loop runs once per scraped line, millions per run
+        sid_of, skip, series = self.sid, self._skip, self._series
+        with open(path, errors="replace") as f:
+            for line in f:
+                if line[0] == "v":
+                    if not self._open or not line.startswith("vllm:"):
+                        continue
+                    key, _, val = line.rpartition(" ")
+                    sid = sid_of.get(key)
+                    if sid is None:
+                        if key in skip:
+                            continue
+                        sid = series(key)
+                        if sid is None:
+                            continue
+                    try:
+                        self.cols[sid][-1] = float(val)
+                    except ValueError:
+                        continue
+                    self._got = True
+                elif line.startswith("===TICK"):
+                    self._start_tick(line)
+        return self.finish()
+
+    # ---------------- lookup --------------------------------------------------
+
+    def series(self, name, **match):
+        """[(labels, column)] for metric `name` whose labels include every `match` pair."""
+        out = []
+        for sid in self.names.get(name, ()):
+            lab = self.labels[sid]
+            if all(lab.get(k) == v for k, v in match.items()):
+                out.append((lab, self.cols[sid]))
+        return out
+
+    def total(self, name, how="sum", **match):
+        """One column combining every matching series ('sum' or 'max'); None if none match."""
+        cols = [c for _, c in self.series(name, **match)]
+        return combine(cols, how) if cols else None
+
+    def at(self, key, i):
+        """Value of series `key` at tick i, None when absent."""
+        sid = self.sid.get(key)
+        if sid is None:
+            return None
+        v = self.cols[sid][i]
+        return None if v != v else v
+
+    def buckets(self, name, **match):
+        """[(le, column)] ascending for histogram `name`, summed across matching series."""
+        ck = (name, tuple(sorted(match.items())))
+        if ck not in self._hist:
+            by_le = {}
+            for lab, c in self.series(name + "_bucket", **match):
+                le = lab.get("le")
+                if le is not None:
+                    le = math.inf if le in ("+Inf", "Inf") else float(le)
+                    by_le.setdefault(le, []).append(c)
+            self._hist[ck] = [(le, combine(cs, "sum")) for le, cs in sorted(by_le.items())]
+        return self._hist[ck]
+
+    def buckets_at(self, name, i, **match):
+        """[(le, cumulative_count)] ascending for histogram `name` at tick i."""
+        return [(le, c[i]) for le, c in self.buckets(name, **match) if c[i] == c[i]]
+
+    def label_values(self, label, names=None):
+        """Distinct values of `label` across all (or the named) metrics."""
+        sids = (range(len(self.keys)) if names is None
+                else [s for n in names for s in self.names.get(n, ())])
+        return sorted({self.labels[s][label] for s in sids if label in self.labels[s]})
+
+
+def combine(cols, how="sum"):
+    """Element-wise sum/max of columns; a tick where every input is NaN stays NaN."""
+    if len(cols) == 1:
+        return cols[0]
+    out = array("d", [NAN]) * len(cols[0])
+    for c in cols:
+        for i, v in enumerate(c):
+            if v == v:
+                o = out[i]
+                out[i] = v if o != o else (o + v if how == "sum" else max(o, v))
+    return out
+
+
+def first_last(col):
+    """(first, last) non-NaN values of a column, None for missing."""
+    if col is None:
+        return None, None
+    a = next((v for v in col if v == v), None)
+    b = next((col[i] for i in range(len(col) - 1, -1, -1) if col[i] == col[i]), None)
+    return a, b
+
+
+def load(path, keep=None):
+    return TickStore(keep).feed_file(path)
+
+
+class Tail:
+    """Follow a growing file by byte offset; read() costs O(new bytes), not O(file).
+
+    Only complete lines are returned — a partial last line waits for its
+    newline. A file that shrinks (truncated / recreated) is re-read from 0.
+    """
+
+    def __init__(self, path):
+        self.path, self.off, self.buf = path, 0, b""
+
+    def read(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size < self.off:
+            self.off, self.buf = 0, b""
+        if size == self.off:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.off)
+            data = f.read(size - self.off)
+        self.off += len(data)
+        *lines, self.buf = (self.buf + data).split(b"\n")
+        return [l.decode("utf-8", "replace") for l in lines]
+
+
+class TickTail:
+    """Incremental metrics.stream reader yielding each tick once it is complete.
+
+    A tick is complete when the next ===TICK marker arrives, so the newest
+    tick (possibly mid-scrape) is never reported half-filled. Nothing is
+    retained between ticks: memory is one tick's worth of series.
+    """
+
+    def __init__(self, path):
+        self.tail = Tail(path)
+        self.ts, self.cur = None, None
+        self._parsed = {}  # key -> (name, labels); bounded by distinct series
+
+    def parse(self, key):
+        nl = self._parsed.get(key)
+        if nl is None:
+            name, lab = split_key(key)
+            nl = self._parsed[key] = (name, dict(LABEL_RE.findall(lab)))
+        return nl
+
+    def ticks(self):
+        """[(epoch, {key: value})] for ticks completed since the last call."""
+        out = []
+        for line in self.tail.read():
+            if line.startswith("===TICK"):
+                if self.cur:
+                    out.append((self.ts, self.cur))
+                p = line.split()
+                self.ts = float(p[2]) if len(p) > 2 and p[2].isdigit() else None
+                self.cur = {}
+            elif self.cur is not None and line.startswith("vllm:"):
+                key, _, val = line.rpartition(" ")
+                try:
+                    self.cur[key] = float(val)
+                except ValueError:
+                    pass
+        return out
+
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Deterministic workload replay against any OpenAI-compatible endpoint.
+
+Replays a recorded JSONL trace so an A/B does not depend on driving the real
+apps (Pi, Perplexica, Deal Scout) by hand with "tight launch spacing". One
+request per line:
+
+  {"offset_s": 0.0,  "label": "perplexica", "prompt_file": "prompts/a.txt", "max_tokens": 4096}
+  {"offset_s": 12.5, "label": "pi", "messages": [...], "max_tokens": 2048}
+  {"offset_s": 30.0, "label": "vision", "prompt": "Describe it.", "images": ["img/1.jpg"]}
+
+  offset_s          send time relative to replay start (required)
+  prompt | prompt_file | messages   the request content (paths relative to the trace)
+  images            image files sent as base64 data-URI parts before the text
+  max_tokens, reasoning_effort, model, label   optional; label groups the summary
+
+Timing: every body is built (files read, images encoded) BEFORE the clock
+starts, and sends are scheduled against absolute deadlines from one monotonic
+anchor — lateness never accumulates. --speed 2 replays twice as fast (offsets
+halved), --speed 0.5 at half speed. The achieved schedule error is reported as
+schedule_lag (MEASURED, client), so an inexact replay is visible, not assumed.
+
+Each request is timed by openai_probe.probe(), so ttft_s/decode_tps/e2e_s mean
+exactly what they mean for a single probe and for load mode.
+
+Usage:
+  replay.py --trace trace.jsonl --base-url URL --model MODEL \
+      [--speed 1.0] [--cold-tag 'rep7-{i}'] [--keepalive] [--itl-trace] \
+      [--out runs/<dir>/replay.jsonl] [--hist-out runs/<dir>/probe-hist-replay.json]
+"""
+import argparse, asyncio, json, os, sys, time
+
+from httppool import PooledClient
+from loghist import dump
+from openai_probe import LoadStats, data_uri, itl_stats, probe, request_tag, run_load
+
+
+def load_trace(path):
+    base = os.path.dirname(os.path.abspath(path))
+    recs = []
+    for n, line in enumerate(open(path), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            r = json.loads(line)
+        except json.JSONDecodeError as e:
+            sys.exit(f"{path}:{n}: {e}")
+        if "offset_s" not in r:
+            sys.exit(f"{path}:{n}: missing offset_s")
+        r["_base"] = base
+        recs.append(r)
+    recs.sort(key=lambda r: r["offset_s"])  # stable: equal offsets keep file order
+    return recs
+
+
+def tag_messages(messages, line):
+    """Copy of messages with line prepended to the first system/user message,
+    or None when there is no such message with text content to prefix."""
+    for n, m in enumerate(messages):
+        if m.get("role") not in ("system", "user"):
+            continue
+        c = m.get("content")
+        if isinstance(c, str):
+            c = line + c
+        elif isinstance(c, list):
+            c = [{"type": "text", "text": line}] + c
+        else:
+            return None
+        return messages[:n] + [dict(m, content=c)] + messages[n + 1:]
+    return None
+
+
+def trace_body(rec, model, i, cold_tag=None):
+    rel = lambda p: p if os.path.isabs(p) else os.path.join(rec["_base"], p)
+    line = f"[run-id {request_tag(cold_tag, i)} — ignore this line]\n" if cold_tag else ""
+    if "messages" in rec:
+        messages = rec["messages"]
+        if line:
+            tagged = tag_messages(messages, line)
+            if tagged is None:
+                print(f"warning: trace record {i} has no system/user message to tag;"
+                      " it is sent warm", file=sys.stderr)
+            messages = tagged or messages
+    else:
+        text = rec.get("prompt")
+        if text is None and "prompt_file" in rec:
+            text = open(rel(rec["prompt_file"])).read()
+        if text is None:
+            raise ValueError(f"trace record {i} has no prompt, prompt_file or messages")
+        text = line + text
+        content = text
+        if rec.get("images"):
+            content = [{"type": "image_url", "image_url": {"url": data_uri(rel(p))}}
+                       for p in rec["images"]] + [{"type": "text", "text": text}]
+        messages = [{"role": "user", "content": content}]
+    body = {"model": rec.get("model", model), "messages": messages,
+            "max_tokens": rec.get("max_tokens", 1024), "stream": True,
+            "stream_options": {"include_usage": True}}
+    if rec.get("reasoning_effort"):
+        body["reasoning_effort"] = rec["reasoning_effort"]
+    return body
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--trace", required=True)
+    ap.add_argument("--base-url", required=True)
+    ap.add_argument("--model", required=True, help="default model; a record's 'model' wins")
+    ap.add_argument("--speed", type=float, default=1.0, help="time scale: 2 = twice as fast")
+    ap.add_argument("--max-inflight", type=int, help="client-side cap (default: none — exact replay)")
+    ap.add_argument("--cold-tag", help="prefix each prompt (first system/user message) with a unique"
+                    " run-id line; '{i}' = record index, appended if absent")
+    ap.add_argument("--keepalive", action="store_true")
+    ap.add_argument("--http2", action="store_true")
+    ap.add_argument("--itl-trace", action="store_true")
+    ap.add_argument("--timeout", type=int, default=1800)
+    ap.add_argument("--api-key", default="benchmark")
+    ap.add_argument("--out", help="append one JSON line per completed request")
+    ap.add_argument("--hist-out", help="mergeable latency histograms (all labels)")
+    args = ap.parse_args()
+    if args.speed <= 0:
+        ap.error("--speed must be positive")
+
+    recs = load_trace(args.trace)
+    if not recs:
+        sys.exit("empty trace")
+    bodies = [trace_body(r, args.model, i, args.cold_tag) for i, r in enumerate(recs)]
+    offsets = [r["offset_s"] / args.speed for r in recs]
+    inflight = args.max_inflight or len(recs)
+    client = (PooledClient(maxsize=inflight, http2=args.http2)
+              if args.keepalive or args.http2 else None)
+
+    overall, per_label = LoadStats(), {}
+    lag_max = [0.0]
+    sink_f = open(args.out, "a") if args.out else None
+
+    def send(i):
+        r = probe(args.base_url, bodies[i], args.api_key, args.timeout,
+                  trace=args.itl_trace, client=client)
+        r.pop("_text")
+        if args.itl_trace:
+            r["itl"] = itl_stats(r["_stamps"], r.pop("_t0"))
+        r["label"] = recs[i].get("label", "-")
+        return r
+
+    def sink(r):
+        # started_s - scheduled_s is the replay's own timing error for this send
+        r["schedule_lag_s"] = round(r["started_s"] - r["scheduled_s"], 4)
+        lag_max[0] = max(lag_max[0], r["schedule_lag_s"])
+        per_label.setdefault(r["label"], LoadStats()).add(dict(r))  # copy: add() pops _stamps
+        overall.add(r)
+        if sink_f:
+            sink_f.write(json.dumps(r) + "\n")
+            sink_f.flush()
+
+    print(f"replaying {len(recs)} requests over {offsets[-1]:.1f}s "
+          f"(speed {args.speed:g}x, max in flight {inflight})", file=sys.stderr)
+    t0 = time.monotonic()
+    asyncio.run(run_load(send, offsets, inflight, sink=sink))
+    wall = time.monotonic() - t0
+    if sink_f:
+        sink_f.close()
+    if args.hist_out:
+        dump(overall.hists, args.hist_out, base_url=args.base_url, model=args.model,
+             trace=os.path.basename(args.trace), speed=args.speed)
+
+    summ = overall.summary(wall)
+    summ.update({"trace": args.trace, "speed": args.speed, "base_url": args.base_url,
+                 "schedule_lag_max_s": round(lag_max[0], 4),
+                 "by_label": {k: v.summary(wall) for k, v in sorted(per_label.items())}})
+    print(json.dumps(summ, indent=2))
+    sys.exit(0 if overall.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
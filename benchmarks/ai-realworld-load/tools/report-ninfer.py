@@ -6,27 +6,26 @@ Metrics that exist in vLLM but have no NInfer equivalent are printed as N/A —
 never fabricated (there is no KV-usage gauge, and no preemption concept: NInfer
 admission reserves the full prompt+output entitlement and queues instead).
 
-Usage: report-ninfer.py <run-dir>
+Usage: report-ninfer.py <run-dir> [--all-rows] [--idle-w W] [--price-kwh P]
+
+requests.jsonl.stream is read incrementally: the byte offset and rows so far
+are kept in <run>/.ninfer-cursor.json, so re-running during a long window only
+parses what was appended since.
 """
-import json, os, sys
+import bisect, glob, json, os, sys
 from collections import Counter
 
-M, D = "MEASURED", "DERIVED"
-
+import gputelemetry
+from gputelemetry import finite
+from loghist import load_merged, summary_line
+from ninferlog import Cursor, intervals, last_event
+from timeline import level_stats, sweep
 
-def load_events(path):
-    evs = []
-    if not os.path.exists(path):
-        return evs
-    for line in open(path, errors="replace"):
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            evs.append(json.loads(line))
-        except json.JSONDecodeError:
-            pass
-    return evs
+M, D = "MEASURED", "DERIVED"
+ROW_LIMIT = 200     # per-request table rows printed unless --all-rows
+GANTT_ROWS, WIDTH = 40, 60
+PROMPT_BUCKETS = (2048, 8192, 32768, 131072)   # prompt-token edges for per-size tables
+PRICE_KWH = 0.30    # --price-kwh default, in whatever currency the bill uses
 
 
 def fmt(n):
@@ -37,19 +36,203 @@ def section(t):
     print(f"\n=== {t} " + "=" * max(0, 60 - len(t)))
 
 
+def pctl(xs, q):
+    """Nearest-rank percentile of a sorted list."""
+    return xs[min(len(xs) - 1, max(0, -(-len(xs) * q // 100) - 1))]
+
+
+def timeline(rows):
+    run_iv = intervals(rows)
+    section("Timeline — concurrency and admission wait")
+    if not run_iv:
+        print("  request_done events carry no timestamp — timeline N/A")
+        return
+    t0 = min(a for a, _ in run_iv)
+    t1 = max(b for _, b in run_iv)
+    times, lv = sweep(run_iv)
+    wtimes, wlv = sweep(intervals(rows, "wait"))
+    span = max(t1 - t0, 1e-9)
+    mean_inflight = sum(b - a for a, b in run_iv) / span
+    k = max(range(len(lv)), key=lv.__getitem__)
+    print(f"  window {span:,.1f}s, {len(run_iv):,} timed requests")
+    print(f"  in flight: peak {lv[k]} at +{times[k] - t0:,.1f}s, time-weighted mean {mean_inflight:.2f}   [{D}]")
+    if wlv:
+        print(f"  waiting for admission: peak {max(wlv)}   [{D}, intervals start..start+(ttft-prefill)]")
+    nb = 30
+    bins = [t0 + span * i / nb for i in range(nb + 1)]
+    run_b, wait_b = level_stats(times, lv, bins), level_stats(wtimes, wlv, bins)
+    top = max(p for p, _ in run_b) or 1
+    print(f"\n  {'t+s':>8} {'inflight':>8} {'mean':>5} {'wait':>4}")
+    for a, (pk, mn), (wp, _) in zip(bins, run_b, wait_b):
+        bar = "#" * round(mn / top * 40) + "·" * round((pk - mn) / top * 40)
+        print(f"  {a - t0:>8.1f} {pk:>8} {mn:>5.1f} {wp:>4}  {bar}")
+    print("  bar: # time-weighted mean in flight, · up to the bin's peak")
+
+    # Gantt of the requests around the peak-concurrency instant
+    at = times[k]
+    timed = sorted((r for r in rows if r.get("end") is not None and r.get("total") is not None),
+                   key=lambda r: r["end"] - r["total"])
+    near = sorted(timed, key=lambda r: 0 if r["end"] - r["total"] <= at <= r["end"]
+                  else min(abs(r["end"] - r["total"] - at), abs(r["end"] - at)))[:GANTT_ROWS]
+    near.sort(key=lambda r: r["end"] - r["total"])
+    g0 = min(r["end"] - r["total"] for r in near)
+    g1 = max(r["end"] for r in near)
+    scale = WIDTH / max(g1 - g0, 1e-9)
+    print(f"\n  Gantt — {len(near)} requests around the peak (+{g0 - t0:,.1f}s .. +{g1 - t0:,.1f}s)")
+    print(f"  . admission wait   = prefill   # decode/rest      [{M} timings, {D} placement]")
+    for r in near:
+        start = r["end"] - r["total"]
+        w, pf = r.get("wait") or 0.0, r.get("prefill") or 0.0
+        cols = lambda x: int(round(x * scale))
+        lead = cols(start - g0)
+        seg = "." * cols(w) + "=" * cols(pf)
+        seg += "#" * max(1, cols(r["end"] - g0) - lead - len(seg))
+        print(f"  {fmt(r.get('prompt') or 0):>8} |{' ' * lead}{seg}")
+
+
+def prompt_bucket(n):
+    lo = 0
+    for hi in PROMPT_BUCKETS:
+        if n <= hi:
+            return f"{lo // 1024}k-{hi // 1024}k"
+        lo = hi
+    return f">{lo // 1024}k"
+
+
+def pearson(xs, ys):
+    n = len(xs)
+    if n < 3:
+        return None
+    mx, my = sum(xs) / n, sum(ys) / n
+    sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    sxx = sum((x - mx) ** 2 for x in xs)
+    syy = sum((y - my) ** 2 for y in ys)
+    return sxy / (sxx * syy) ** 0.5 if sxx and syy else None
+
+
+def mtp(rows):
+    spec = [r for r in rows if r.get("drafted")]
+    plain = [r for r in rows if not r.get("drafted") and r.get("decode_tps")]
+    section("Speculative decoding (MTP)")
+    if not spec:
+        print("  no request drafted tokens — MTP off or not reported (N/A)")
+        return
+    acc = lambda rs: sum(r["accepted"] or 0 for r in rs) / max(1, sum(r["drafted"] for r in rs))
+    rates = sorted((r["accepted"] or 0) / r["drafted"] for r in spec)
+    print(f"  per-request acceptance: p10 {pctl(rates, 10)*100:.1f}%  p50 {pctl(rates, 50)*100:.1f}%  "
+          f"p90 {pctl(rates, 90)*100:.1f}%  over {len(rates)} requests   [{D}, accepted/drafted]")
+
+    # upper bound without a control: each accepted token saves one target forward,
+    # drafting itself counted free — so real speedup is at most this
+    ub = lambda rs: (sum(r["completion"] or 0 for r in rs) /
+                     max(1, sum((r["completion"] or 0) - (r["accepted"] or 0) for r in rs)))
+    by = {}
+    for r in rows:
+        if r.get("prompt"):
+            by.setdefault(prompt_bucket(r["prompt"]), []).append(r)
+    print(f"\n  {'prompt':<10} {'n':>5} {'accept':>7} {'tps MTP':>8} {'tps off':>8} {'speedup':>9}")
+    for b in sorted(by, key=lambda k: min(r["prompt"] for r in by[k])):
+        rs = by[b]
+        on = [r["decode_tps"] for r in rs if r.get("drafted") and r.get("decode_tps")]
+        off = [r["decode_tps"] for r in rs if not r.get("drafted") and r.get("decode_tps")]
+        s_on = [r for r in rs if r.get("drafted")]
+        if on and off:
+            sp = f"{(sum(on)/len(on)) / (sum(off)/len(off)):.2f}x M"
+        elif s_on:
+            sp = f"<={ub(s_on):.2f}x B"
+        else:
+            sp = "–"
+        avg = lambda xs: f"{sum(xs)/len(xs):.2f}" if xs else "–"
+        print(f"  {b:<10} {len(rs):>5} {(f'{acc(s_on)*100:.1f}%' if s_on else '–'):>7} "
+              f"{avg(on):>8} {avg(off):>8} {sp:>9}")
+    print(f"  speedup M = mean decode tok/s with / without drafting in the same prompt bucket [{D}]")
+    print(f"          B = bound completion/(completion - accepted) when no undrafted control exists [{D}]")
+    if not plain:
+        print("  no undrafted requests in this window: run an MTP-off control for a measured speedup")
+
+    timed = sorted((r for r in spec if r.get("end") is not None), key=lambda r: r["end"])
+    if len(timed) >= 10:
+        nb = 10
+        print(f"\n  acceptance over time ({nb} equal-count slices by completion time):")
+        for i in range(nb):
+            sl = timed[len(timed) * i // nb:len(timed) * (i + 1) // nb]
+            a = acc(sl)
+            print(f"   +{sl[0]['end'] - timed[0]['end']:>9.1f}s  {a*100:5.1f}%  {'#' * round(a * 40)}")
+
+    print("\n  by prefix_reuse_path:")
+    paths = {}
+    for r in spec:
+        paths.setdefault(r.get("reuse_path"), []).append(r)
+    for pth, rs in sorted(paths.items(), key=lambda kv: str(kv[0])):
+        print(f"   {str(pth):<12} n={len(rs):<6} acceptance {acc(rs)*100:5.1f}%")
+    pairs = [((r["cache"] or 0) / r["prompt"], (r["accepted"] or 0) / r["drafted"])
+             for r in spec if r.get("prompt")]
+    c = pearson([x for x, _ in pairs], [y for _, y in pairs])
+    if c is not None:
+        print(f"  Pearson r(cached fraction of prompt, acceptance) = {c:+.2f}   [{D}]")
+
+
+def efficiency(run, rows, gpus):
+    """Tokens/J per phase from request_done prefill/decode intervals joined with gpu.csv."""
+    section("Efficiency (tokens per joule, cost per million tokens)")
+    iv = intervals(rows)
+    if not iv:
+        print("  no timestamped requests — nothing to join with power samples")
+        return
+    t0, t1 = min(a for a, _ in iv), max(b for _, b in iv)
+    price = float(sys.argv[sys.argv.index("--price-kwh") + 1]) if "--price-kwh" in sys.argv else PRICE_KWH
+    if "--idle-w" in sys.argv:
+        idle_w, how = float(sys.argv[sys.argv.index("--idle-w") + 1]), "--idle-w"
+    else:
+        times, levels = sweep(iv)
+        level = lambda t: levels[bisect.bisect_right(times, t) - 1] if t >= times[0] else 0
+        quiet = sorted({t for g in gpus.values() for t in g.t if not level(t)})
+        idle_w, how = gputelemetry.idle_power(gpus, quiet)
+    gross = gputelemetry.total_energy_j(gpus, t0, t1)
+    if idle_w is None or not gross:
+        print("  no power samples in the request window")
+        return
+    # phases per request: prefill ends where decode starts; end is the event ts
+    pre, dec = [], []
+    for r in rows:
+        if None in (r.get("end"), r.get("decode"), r.get("prefill")):
+            continue
+        pre.append((r["end"] - r["decode"] - r["prefill"], r["end"] - r["decode"]))
+        dec.append((r["end"] - r["decode"], r["end"]))
+    e = gputelemetry.phase_energy(gpus, {"prefill": pre, "decode": dec}, idle_w, t0, t1)
+    net = max(0.0, gross - idle_w * (t1 - t0))
+    computed = sum((r["prompt"] or 0) - (r["cache"] or 0) for r in rows)
+    comp = sum(r["completion"] or 0 for r in rows)
+    print(f"  {'idle draw, all GPUs':<28}: {idle_w:>10,.1f} W      [{D}, {how}]")
+    print(f"  {'energy gross / above idle':<28}: {gross / 3.6e6:>10.4f} / {net / 3.6e6:.4f} kWh   "
+          f"[{D}, ∫ power.draw dt over the request window]")
+    print(f"  {'prefill / decode / no phase':<28}: {e['prefill'] / 3.6e3:>10.2f} / {e['decode'] / 3.6e3:.2f} / "
+          f"{e['unattributed'] / 3.6e3:.2f} Wh   [{D}, each sample's above-idle J split by open phases]")
+    rows_ = gputelemetry.efficiency(computed, comp, e["prefill"], e["decode"], net, gross, price)
+    for line in gputelemetry.efficiency_lines(rows_):
+        print("  " + line)
+    print(f"  tokens: {computed:,} prompt computed (prompt - cache), {comp:,} generated   [{M}, request_done]")
+    try:
+        gputelemetry.write_efficiency(rows_, os.path.join(run, "efficiency.csv"), [
+            ("idle_w", idle_w, "W", how), ("energy_gross_j", gross, "J", "request window"),
+            ("energy_net_j", net, "J", "gross - idle"), ("prefill_tokens", computed, "tok", "prompt - cache"),
+            ("decode_tokens", comp, "tok", "completion tokens")])
+        print(f"  -> {os.path.join(run, 'efficiency.csv')}")
+    except OSError:
+        pass  # read-only run dir
+
+
 def main():
     if len(sys.argv) < 2:
         sys.exit("usage: report-ninfer.py <run-dir>")
     run = sys.argv[1]
 
-    window = [e for e in load_events(os.path.join(run, "requests.jsonl.stream"))]
-    full = load_events(os.path.join(run, "requests.jsonl"))
-    starts = [e for e in full if e.get("event") == "server_start"] or \
-             [e for e in full if "server_start" in json.dumps(e)[:200]]
+    # the full log spans the server's lifetime: seek back from EOF for the
+    # latest server_start instead of parsing every request before it
+    s = last_event(os.path.join(run, "requests.jsonl"), "server_start")
 
     section("Server (from server_start, full log)")
-    if starts:
-        s = starts[-1]
+    if s:
         for key in ("artifact", "target", "weights", "kv", "engine", "argv", "cuda", "gpu"):
             for k, v in s.items():
                 if key in k.lower():
@@ -57,36 +240,23 @@ def main():
     else:
         print("  no server_start event captured — KV sizing ledger unavailable (N/A)")
 
-    done = [e for e in window if e.get("event") == "request_done"]
-    errs = [e for e in window if e.get("event") == "request_error"]
-
-    section(f"Requests in window: {len(done)} done, {len(errs)} errors")
-    rows = []
-    for e in done:
-        t = e.get("timings_seconds", {}) or {}
-        spec = (t.get("speculative") or e.get("speculative") or {})
-        prompt = e.get("prompt_tokens") or e.get("tokens", {}).get("prompt")
-        comp = e.get("completion_tokens") or e.get("tokens", {}).get("completion")
-        cache = e.get("cache_tokens") or e.get("tokens", {}).get("cache")
-        row = {
-            "prompt": prompt, "completion": comp, "cache": cache,
-            "ttft": t.get("ttft"), "prefill": t.get("prefill"),
-            "decode": t.get("decode"), "vision": t.get("vision"),
-            "total": t.get("total"),
-            "finish": e.get("finish_reason"),
-            "reuse_path": e.get("prefix_reuse_path"),
-            "drafted": spec.get("drafted_tokens"),
-            "accepted": spec.get("accepted_tokens"),
-        }
-        if comp and t.get("decode"):
-            row["decode_tps"] = round(comp / t["decode"], 2)
-        rows.append(row)
+    # window rows resume from the byte offset of the previous report run
+    cur = Cursor(os.path.join(run, "requests.jsonl.stream"), os.path.join(run, ".ninfer-cursor.json"))
+    rows, errs = cur.read()
+    try:
+        cur.save()
+    except OSError:
+        pass  # read-only run dir: just don't persist the offset
 
+    section(f"Requests in window: {len(rows)} done, {len(errs)} errors")
     if rows:
         hdr = ["prompt", "cache", "completion", "ttft", "prefill", "decode",
                "decode_tps", "total", "finish", "reuse_path"]
         print("  " + " | ".join(f"{h:>10}" for h in hdr))
-        for r in rows:
+        shown = rows if "--all-rows" in sys.argv or len(rows) <= ROW_LIMIT else rows[-ROW_LIMIT:]
+        if len(shown) < len(rows):
+            print(f"  (last {len(shown)} of {len(rows):,} requests; --all-rows prints every one)")
+        for r in shown:
             print("  " + " | ".join(f"{fmt(r.get(h)) if r.get(h) is not None else '-':>10}" for h in hdr))
         print(f"  [{M}] tokens/seconds are engine-reported; decode_tps is [{D}] completion/decode_s")
 
@@ -108,25 +278,41 @@ def main():
     for e in errs:
         print(f"  ERROR: {json.dumps(e)[:300]}")
 
+    if rows:
+        section("Latency distribution (per request)")
+        print(f"  {'':<11} {'n':>6} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+        for k, tag in (("ttft", M), ("wait", D), ("prefill", M), ("decode", M),
+                       ("decode_tps", D), ("total", M)):
+            xs = sorted(r[k] for r in rows if r.get(k) is not None)
+            if xs:
+                print(f"  {k:<11} {len(xs):>6} " + " ".join(f"{pctl(xs, q):>9.3f}" for q in (50, 90, 99))
+                      + f" {xs[-1]:>9.3f}  [{tag}]")
+        print(f"  percentiles are nearest-rank over per-request values; wait = ttft - prefill [{D}]")
+        timeline(rows)
+        mtp(rows)
+
+    hist_files = sorted(glob.glob(os.path.join(run, "probe-hist*.json")))
+    if hist_files:
+        section(f"Client latency ({len(hist_files)} probe histogram file(s), merged)")
+        for name, h in sorted(load_merged(hist_files).items()):
+            if h.count:
+                print("  " + summary_line(name, h))
+        print(f"  [{D}] log-bucket quantiles (±1%) of [{M}] client-side per-request timings")
+
     section("GPU (per index — the run's context.env says which card is NInfer's)")
-    gpath = os.path.join(run, "gpu.csv")
-    if os.path.exists(gpath):
-        peak = {}
-        for line in open(gpath, errors="replace"):
-            p = [x.strip() for x in line.split(",")]
-            if len(p) < 8:
-                continue
-            try:
-                idx = p[1]
-                d = peak.setdefault(idx, {"mem": 0.0, "util": 0.0, "power": 0.0})
-                d["mem"] = max(d["mem"], float(p[2]))
-                d["util"] = max(d["util"], float(p[4]))
-                d["power"] = max(d["power"], float(p[6]))
-            except ValueError:
-                continue
-        for idx, d in sorted(peak.items()):
-            print(f"  GPU {idx}: peak {d['mem']:.0f} MiB, peak util {d['util']:.0f}%, "
-                  f"peak power {d['power']:.0f} W  [{M}]")
+    gpus = gputelemetry.load(os.path.join(run, "gpu.csv"))
+    if gpus:
+        for idx, g in sorted(gpus.items()):
+            mem, util, power = finite(g.vram), finite(g.util), finite(g.power)
+            if mem and util and power:
+                print(f"  GPU {idx}: peak {max(mem):.0f} MiB, peak util {max(util):.0f}%, "
+                      f"peak power {max(power):.0f} W  [{M}]")
+        iv = intervals(rows)
+        t0, t1 = (min(a for a, _ in iv), max(b for _, b in iv)) if iv else (None, None)
+        comp = sum(r["completion"] or 0 for r in rows)
+        for line in gputelemetry.describe(gpus, t0, t1, comp or None, span="request window"):
+            print("  " + line)
+        efficiency(run, rows, gpus)
     else:
         print("  no gpu.csv")
 
@@ -9,56 +9,72 @@ derived number that looks measured would quietly corrupt it.
   DERIVED   computed from those (e.g. kv_usage_perc x capacity), stated with its
             formula, and given as a RANGE when the source is a histogram bucket
 
-Usage: report.py <run-dir> [--pi-session <path>]
+Usage: report.py <run-dir> [--pi-session <path>] [--engine N] [--model-name M]
+       report.py <run-dir> --follow [--interval S]     live dashboard during a run
+       report.py <run-dir> --window N [--parquet]     also per-N-second windows -> windows.csv
+       report.py <run-dir> [--idle-w W] [--price-kwh P]  efficiency.csv: tokens/J, cost per 1M tokens
+
+--engine / --model-name select one engine's or model's series when a scrape
+carries several; otherwise counters and queue gauges are summed across them
+and KV usage takes the max (stated in the header when it happens).
 """
-import sys, os, json, re, glob
+import sys, os, json, re, glob, time
 from collections import defaultdict
 
+import gputelemetry
+from gputelemetry import finite
+from loghist import load_merged, summary_line
+from promstream import Tail, TickStore, TickTail, combine, first_last
+import runpack
+from windows import bucket_quantile, steady_spans, tick_windows, window_rows, write_csv, write_parquet
+
 M, D = "MEASURED", "DERIVED"
 
 
-def parse_ticks(path):
-    """metrics.stream -> [(epoch, {metric_key: value})]"""
-    ticks, cur, ts = [], None, None
-    if not os.path.exists(path):
-        return ticks
-    for line in open(path, errors="replace"):
-        line = line.rstrip("\n")
-        if line.startswith("===TICK"):
-            if cur is not None:
-                ticks.append((ts, cur))
-            p = line.split()
-            ts = int(p[2]) if len(p) > 2 and p[2].isdigit() else None
-            cur = {}
-        elif cur is not None and line.startswith("vllm:"):
-            try:
-                key, val = line.rsplit(" ", 1)
-                cur[key] = float(val)
-            except ValueError:
-                pass
-    if cur:
-        ticks.append((ts, cur))
-    return ticks
-
-
-def g(sample, prefix):
-    """First metric whose name starts with prefix (labels vary)."""
-    for k, v in sample.items():
-        if k.startswith(prefix):
-            return v
-    return None
-
-
-def hist_buckets(sample, name):
-    """[(le, cumulative_count)] sorted ascending for a histogram."""
-    out = []
-    for k, v in sample.items():
-        if k.startswith(name + "_bucket"):
-            m = re.search(r'le="([^"]+)"', k)
-            if m:
-                le = float("inf") if m.group(1) in ("+Inf", "Inf") else float(m.group(1))
-                out.append((le, v))
-    return sorted(out)
+# Everything the sections below read. The stream reader drops every other
+# series at parse time, so memory tracks this list, not the scrape size.
+REPORT_METRICS = (
+    "vllm:kv_cache_usage_perc", "vllm:num_requests_running", "vllm:num_requests_waiting",
+    "vllm:num_preemptions_total", "vllm:request_prompt_tokens_bucket",
+    "vllm:time_to_first_token_seconds", "vllm:request_time_per_output_token_seconds",
+    "vllm:e2e_request_latency_seconds", "vllm:request_queue_time_seconds",
+    "vllm:request_prefill_time_seconds", "vllm:prompt_tokens_total",
+    "vllm:generation_tokens_total", "vllm:prompt_tokens_cached_total",
+    "vllm:prefix_cache_queries_total", "vllm:prefix_cache_hits_total",
+    "vllm:request_success_total",
+)
+
+
+def load_store(run):
+    """<run>/metrics.pack (if current) or metrics.stream -> TickStore of REPORT_METRICS."""
+    keep = lambda name: name.startswith(REPORT_METRICS)
+    pack = runpack.fresh(run)
+    if pack:
+        return runpack.load(pack, keep)
+    path = f"{run}/metrics.stream"
+    store = TickStore(keep)
+    return store.feed_file(path) if os.path.exists(path) else store
+
+
+def kv_capacity(run, default=313367):
+    """KV pool size in tokens from the engine's cache_config_info, else `default`."""
+    cc = f"{run}/cache-config.txt"
+    if os.path.exists(cc):
+        m = re.search(r'kv_cache_size_tokens="(\d+)"', open(cc).read())
+        if m:
+            return int(m.group(1))
+    return default
+
+
+def zcol(store, name, flt, how="sum"):
+    """Metric `name` (label-filtered, combined across series), missing ticks read as 0."""
+    c = store.total(name, how, **flt)
+    return [v if v == v else 0.0 for v in c] if c is not None else [0.0] * len(store)
+
+
+def ends(store, name, flt):
+    """(first, last) observed value of metric `name`, summed across matching series."""
+    return first_last(store.total(name, **flt))
 
 
 def bucket_range(before, after):
@@ -82,6 +98,14 @@ def bucket_range(before, after):
     return out
 
 
+def fmt_q(r):
+    if r is None:
+        return "–"
+    lo, hi, est = r
+    hs = "inf" if hi == float("inf") else f"{hi:g}"
+    return f"{est:.3f}s ({lo:g}–{hs}]"
+
+
 def fmt(n):
     return f"{int(n):,}" if n is not None else "–"
 
@@ -90,6 +114,152 @@ def section(t):
     print(f"\n{'='*78}\n{t}\n{'='*78}")
 
 
+LAT_WINDOW_S, LAT_STEP_S = 60, 30    # sliding windows for the latency tail
+PRICE_KWH = 0.30                     # --price-kwh default, in whatever currency the bill uses
+
+LOG_PATTERNS = ((r"OOM|OutOfMemory", "OOM"),
+                (r"context length|maximum context|too long", "CONTEXT-LIMIT"),
+                (r"Cache allocation|cannot allocate", "CACHE-ALLOC"),
+                (r"Preempt", "PREEMPT-LOG"))
+
+LATENCY = (("TTFT", "vllm:time_to_first_token_seconds"),
+           ("TPOT", "vllm:request_time_per_output_token_seconds"),
+           ("E2E ", "vllm:e2e_request_latency_seconds"),
+           ("queue", "vllm:request_queue_time_seconds"),
+           ("prefill", "vllm:request_prefill_time_seconds"))
+
+COUNTERS = ("vllm:num_preemptions_total", "vllm:prompt_tokens_total",
+            "vllm:generation_tokens_total", "vllm:prompt_tokens_cached_total",
+            "vllm:prefix_cache_queries_total", "vllm:prefix_cache_hits_total") + \
+    tuple(n + sfx for _, n in LATENCY for sfx in ("_sum", "_count"))
+
+
+class Live:
+    """Running aggregates for --follow. State is O(series + GPUs), never O(ticks)."""
+
+    def __init__(self, run, cap, flt):
+        self.cap, self.flt = cap, flt
+        self.metrics = TickTail(f"{run}/metrics.stream")
+        self.gpu = Tail(f"{run}/gpu.csv")
+        self.log = Tail(f"{run}/vllm.log")
+        self.log_re = [(re.compile(p, re.I), lbl) for p, lbl in LOG_PATTERNS]
+        self.log_hits = defaultdict(int)
+        self.ticks = 0
+        self.now = {}           # latest value per metric name (filtered, summed / max)
+        self.first = {}         # first observed value per counter
+        self.peak_kv, self.peak_kv_t = 0.0, None
+        self.max_run = self.max_wait = 0
+        self.pre_events = []    # last few (t, delta, kv_before)
+        self.gpus = {}          # idx -> running stats
+
+    def _tick_values(self, vals):
+        agg = {}
+        for key, v in vals.items():
+            name, lab = self.metrics.parse(key)
+            if any(lab.get(k) != x for k, x in self.flt.items()):
+                continue
+            if name == "vllm:kv_cache_usage_perc":
+                agg[name] = max(agg.get(name, v), v)
+            else:
+                agg[name] = agg.get(name, 0.0) + v
+        return agg
+
+    def update(self):
+        for t, vals in self.metrics.ticks():
+            cur = self._tick_values(vals)
+            self.ticks += 1
+            kv_before = self.now.get("vllm:kv_cache_usage_perc", 0.0)
+            pre_before = self.now.get("vllm:num_preemptions_total")
+            kv = cur.get("vllm:kv_cache_usage_perc", 0.0)
+            if kv > self.peak_kv:
+                self.peak_kv, self.peak_kv_t = kv, t
+            self.max_run = max(self.max_run, cur.get("vllm:num_requests_running", 0))
+            self.max_wait = max(self.max_wait, cur.get("vllm:num_requests_waiting", 0))
+            pre = cur.get("vllm:num_preemptions_total")
+            if pre is not None and pre_before is not None and pre > pre_before:
+                self.pre_events = (self.pre_events + [(t, pre - pre_before, kv_before)])[-5:]
+            for n in COUNTERS:
+                if n in cur:
+                    self.first.setdefault(n, cur[n])
+            self.now = cur
+        for line in self.gpu.read():
+            r = gputelemetry.parse_line(line)
+            if r is None:
+                continue
+            i, _, v = r
+            vram, util, power, temp = v["vram"], v["util"], v["power"], v["temp"]
+            if vram != vram or util != util or power != power or temp != temp:
+                continue
+            g = self.gpus.setdefault(i, {"n": 0, "util_sum": 0.0, "vram_peak": 0.0,
+                                                 "power_peak": 0.0, "temp_peak": 0.0})
+            g["n"] += 1
+            g["util_sum"] += util
+            g["vram_peak"] = max(g["vram_peak"], vram)
+            g["power_peak"] = max(g["power_peak"], power)
+            g["temp_peak"] = max(g["temp_peak"], temp)
+            g["last"] = (vram, util, power, temp)
+        for line in self.log.read():
+            for rx, lbl in self.log_re:
+                if rx.search(line):
+                    self.log_hits[lbl] += 1
+
+    def delta(self, name):
+        if name in self.now and name in self.first:
+            return self.now[name] - self.first[name]
+        return None
+
+    def render(self):
+        c = self.now
+        kv = c.get("vllm:kv_cache_usage_perc", 0.0)
+        out = [f"ticks={self.ticks}   bytes read: metrics {self.metrics.tail.off:,}  "
+               f"gpu {self.gpu.off:,}  log {self.log.off:,}",
+               "",
+               f"running {int(c.get('vllm:num_requests_running', 0)):>3} (max {int(self.max_run)})   "
+               f"waiting {int(c.get('vllm:num_requests_waiting', 0)):>3} (max {int(self.max_wait)})   [{M}]",
+               f"KV now {kv*100:5.1f}% = {fmt(kv*self.cap)} tokens   "
+               f"PEAK {self.peak_kv*100:5.1f}% = {fmt(self.peak_kv*self.cap)} tokens "
+               f"at t={int(self.peak_kv_t) if self.peak_kv_t else '?'}   [{D}]"]
+        pre = self.delta("vllm:num_preemptions_total")
+        out.append(f"preemptions this run: {fmt(pre) if pre is not None else '–'}   [{M}]")
+        for t, d, kvb in self.pre_events:
+            out.append(f"   +{int(d)} at t={int(t) if t else '?'}  KV just before = {kvb*100:.1f}%")
+        out.append("")
+        for label, name in LATENCY:
+            s_, n_ = self.delta(name + "_sum"), self.delta(name + "_count")
+            mean = f"{s_/n_:7.3f}s over {int(n_)}" if s_ is not None and n_ else "      –"
+            out.append(f"{label:<8}: mean {mean}   [{D}, sum/count delta]")
+        pq, ph = self.delta("vllm:prefix_cache_queries_total"), self.delta("vllm:prefix_cache_hits_total")
+        if pq and ph is not None:
+            out.append(f"prefix cache hit rate: {ph/pq*100:5.1f}%   [{D}, hits/queries delta]")
+        gen = self.delta("vllm:generation_tokens_total")
+        if gen is not None:
+            out.append(f"generation tokens: {fmt(gen)}   prompt tokens: "
+                       f"{fmt(self.delta('vllm:prompt_tokens_total'))}   [{M}, counter delta]")
+        out.append("")
+        for i, g in sorted(self.gpus.items()):
+            vram, util, power, temp = g["last"]
+            out.append(f"GPU{i}: {vram:6.0f} MiB (peak {g['vram_peak']:.0f}) | util {util:5.1f}% "
+                       f"(avg {g['util_sum']/g['n']:5.1f}%) | {power:5.1f}W (peak {g['power_peak']:.1f}) "
+                       f"| {temp:4.1f}C   [{M}]")
+        if self.log_hits:
+            out.append("vllm.log: " + "  ".join(f"{k}={v}" for k, v in sorted(self.log_hits.items())))
+        return "\n".join(out)
+
+
+def follow(run, cap, flt, interval):
+    live = Live(run, cap, flt)
+    try:
+        while True:
+            live.update()
+            sys.stdout.write("\033[H\033[J")  # home + clear: redraw in place
+            print(f"LIVE — {os.path.basename(run)}   capacity={cap:,}   "
+                  f"{time.strftime('%H:%M:%S')}   (Ctrl-C to stop)\n")
+            print(live.render(), flush=True)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print()
+
+
 def main():
     if len(sys.argv) < 2:
         print(__doc__)
@@ -98,6 +268,10 @@ def main():
     pi_session = None
     if "--pi-session" in sys.argv:
         pi_session = sys.argv[sys.argv.index("--pi-session") + 1]
+    flt = {}
+    for opt, label in (("--engine", "engine"), ("--model-name", "model_name")):
+        if opt in sys.argv:
+            flt[label] = sys.argv[sys.argv.index(opt) + 1]
 
     ctx = {}
     if os.path.exists(f"{run}/context.env"):
@@ -106,15 +280,24 @@ def main():
                 k, v = line.strip().split("=", 1)
                 ctx[k] = v
 
-    cap = 313367
-    cc = f"{run}/cache-config.txt"
-    if os.path.exists(cc):
-        m = re.search(r'kv_cache_size_tokens="(\d+)"', open(cc).read())
-        if m:
-            cap = int(m.group(1))
+    width = None
+    if "--window" in sys.argv:
+        try:
+            width = float(sys.argv[sys.argv.index("--window") + 1])
+        except (IndexError, ValueError):
+            sys.exit("--window needs a width in seconds, e.g. --window 60")
+        if not width > 0:
+            sys.exit(f"--window must be a positive number of seconds, got {width:g}")
+
+    cap = kv_capacity(run)
 
-    ticks = parse_ticks(f"{run}/metrics.stream")
-    if not ticks:
+    if "--follow" in sys.argv:
+        interval = float(sys.argv[sys.argv.index("--interval") + 1]) if "--interval" in sys.argv else 2.0
+        return follow(run, cap, flt, interval)
+
+    store = load_store(run)
+    ts = store.ts
+    if not len(store):
         print("no metric ticks captured — was the collector running?")
         sys.exit(1)
 
@@ -123,18 +306,24 @@ def main():
     print(f"window={ctx.get('run_started_utc','?')} .. {ctx.get('run_ended_utc','in progress')}")
     print(f"KV capacity ceiling = {cap:,} tokens   [{M}, from engine cache_config_info]")
     print(f"gpu sampling source = {ctx.get('gpu_source','?')}")
-    print(f"ticks captured = {len(ticks)} (~2s apart)")
+    print(f"ticks captured = {len(store)} (~2s apart)")
+    for label in ("engine", "model_name"):
+        vals = store.label_values(label, ["vllm:kv_cache_usage_perc"])
+        if len(vals) > 1 and label not in flt:
+            print(f"!! {len(vals)} {label} values scraped {vals}: counters/queues summed, "
+                  f"KV% = max across them. Pass --{label.replace('_', '-')} to pick one.")
+    if flt:
+        print(f"series filter = {flt}")
 
     # ---------------- headline numbers -------------------------------------
     section("THE FOUR NUMBERS")
 
     # NB: every metric key carries Prometheus labels
     # (vllm:num_requests_running{engine="0",model_name="..."}), so these MUST go
-    # through the prefix helper. Exact-key lookups silently return 0 and make a
-    # loaded run look idle.
-    resident = [(t, (g(s, "vllm:kv_cache_usage_perc") or 0.0) * cap) for t, s in ticks]
-    peak_res = max((r for _, r in resident), default=0)
-    peak_t = max(resident, key=lambda x: x[1])[0] if resident else None
+    # through the store's name+label index. Exact-key lookups silently return 0
+    # and make a loaded run look idle.
+    kv = zcol(store, "vllm:kv_cache_usage_perc", flt, how="max")
+    peak_res = max(kv, default=0) * cap
 
     print(f"\n4. PEAK SIMULTANEOUS RESIDENT CONTEXT : {fmt(peak_res)} tokens   [{D}]")
     print(f"   formula: max(vllm:kv_cache_usage_perc) x {cap:,}")
@@ -143,9 +332,8 @@ def main():
     print(f"         so this is an upper bound on live request context.")
 
     # Per-workload: histogram bucket deltas across the whole run.
-    first, last = ticks[0][1], ticks[-1][1]
-    hb = bucket_range(hist_buckets(first, "vllm:request_prompt_tokens"),
-                      hist_buckets(last, "vllm:request_prompt_tokens"))
+    hb = bucket_range(store.buckets_at("vllm:request_prompt_tokens", 0, **flt),
+                      store.buckets_at("vllm:request_prompt_tokens", -1, **flt))
     print(f"\n   completed-request prompt sizes this run (histogram buckets) [{D}, range]:")
     if hb:
         for lo, hi, n in hb:
@@ -180,31 +368,30 @@ def main():
 
     # ---------------- scheduling / preemption ------------------------------
     section("SCHEDULING — PREEMPTION IS RECOMPUTE-ONLY IN vLLM V1")
-    runq = [(t, g(s, "vllm:num_requests_running") or 0) for t, s in ticks]
-    waitq = [(t, g(s, "vllm:num_requests_waiting{") or 0) for t, s in ticks]
-    pre = [(t, g(s, "vllm:num_preemptions_total") or 0) for t, s in ticks]
-
-    print(f"max concurrent RUNNING sequences : {int(max(v for _,v in runq)):>4}   [{M}]")
-    print(f"max WAITING sequences            : {int(max(v for _,v in waitq)):>4}   [{M}]")
-    print(f"peak KV utilisation              : {max((g(s,'vllm:kv_cache_usage_perc') or 0) for _,s in ticks)*100:>7.1f}%  [{M}]")
-    total_pre = (pre[-1][1] - pre[0][1]) if pre else 0
+    runq = zcol(store, "vllm:num_requests_running", flt)
+    waitq = zcol(store, "vllm:num_requests_waiting", flt)
+    pre = zcol(store, "vllm:num_preemptions_total", flt)
+
+    print(f"max concurrent RUNNING sequences : {int(max(runq)):>4}   [{M}]")
+    print(f"max WAITING sequences            : {int(max(waitq)):>4}   [{M}]")
+    print(f"peak KV utilisation              : {max(kv)*100:>7.1f}%  [{M}]")
+    total_pre = pre[-1] - pre[0]
     print(f"preemptions during run           : {int(total_pre):>4}   [{M}]")
 
-    peak_conc = int(max((v for _, v in runq), default=0))
-    overlapped = sum(1 for _, v in runq if v >= 2)
-    print(f"ticks with >=2 running           : {overlapped:>4} of {len(ticks)}   [{M}]")
+    peak_conc = int(max(runq, default=0))
+    overlapped = sum(1 for v in runq if v >= 2)
+    print(f"ticks with >=2 running           : {overlapped:>4} of {len(store)}   [{M}]")
     if peak_conc < 2:
         print("  !! the workloads never overlapped — the run does not test concurrency.")
         print("     Re-run with tighter launch spacing.")
 
     if total_pre > 0:
         print("\n  PREEMPTION FORENSICS (recompute restarts prefill from token 0):")
-        for i in range(1, len(ticks)):
-            d = (g(ticks[i][1], "vllm:num_preemptions_total") or 0) - \
-                (g(ticks[i-1][1], "vllm:num_preemptions_total") or 0)
+        for i in range(1, len(pre)):
+            d = pre[i] - pre[i-1]
             if d > 0:
-                kvb = g(ticks[i-1][1], "vllm:kv_cache_usage_perc") or 0
-                print(f"   +{int(d)} at t={ticks[i][0]}  KV just before = {kvb*100:.1f}% "
+                kvb = kv[i-1]
+                print(f"   +{int(d)} at t={int(ts[i]) if ts[i] == ts[i] else '?'}  KV just before = {kvb*100:.1f}% "
                       f"({fmt(kvb*cap)} tokens resident)   [{M}]")
         print("   grep vllm.log for the surrounding engine lines to attribute a request id.")
     else:
@@ -212,56 +399,101 @@ def main():
 
     # ---------------- latency ----------------------------------------------
     section("LATENCY")
-    for label, name in (("TTFT", "vllm:time_to_first_token_seconds"),
-                        ("TPOT", "vllm:request_time_per_output_token_seconds"),
-                        ("E2E ", "vllm:e2e_request_latency_seconds"),
-                        ("queue", "vllm:request_queue_time_seconds"),
-                        ("prefill", "vllm:request_prefill_time_seconds")):
-        s0, c0 = g(first, name + "_sum"), g(first, name + "_count")
-        s1, c1 = g(last, name + "_sum"), g(last, name + "_count")
+    windows = tick_windows(ts, LAT_WINDOW_S, LAT_STEP_S)
+    for label, name in LATENCY:
+        (s0, s1), (c0, c1) = ends(store, name + "_sum", flt), ends(store, name + "_count", flt)
         if None in (s0, c0, s1, c1) or (c1 - c0) <= 0:
             print(f"{label:<8}: no completions in window")
             continue
         print(f"{label:<8}: mean {(s1-s0)/(c1-c0):7.3f}s over {int(c1-c0)} requests   [{D}, sum/count delta]")
+        b0, b1 = store.buckets_at(name, 0, **flt), store.buckets_at(name, -1, **flt)
+        if b1:
+            print("          " + "  ".join(f"p{q} {fmt_q(bucket_quantile(b0, b1, q))}" for q in (50, 90, 99))
+                  + f"   [{D}, range]")
+        worst = None
+        for i, j in windows:
+            r = bucket_quantile(store.buckets_at(name, i, **flt), store.buckets_at(name, j, **flt), 99)
+            if r and (worst is None or r[2] > worst[0][2]):
+                worst = (r, i)
+        if worst:
+            r, i = worst
+            print(f"          worst {LAT_WINDOW_S}s window p99 {fmt_q(r)} "
+                  f"from t={int(ts[i]) if ts[i] == ts[i] else '?'}   [{D}, range]")
+    print("  pXX = bucket-delta interpolation; the true value lies in the (lo–hi] bucket.")
+    print("  means hide the tail — the prefill p99 is the number that decides a single-card verdict.")
+
+    hist_files = sorted(glob.glob(f"{run}/probe-hist*.json"))
+    if hist_files:
+        print(f"\nclient-side, {len(hist_files)} probe histogram file(s) merged "
+              f"[{D}, log buckets ±1%, from {M} per-request timings]:")
+        for name, h in sorted(load_merged(hist_files).items()):
+            if h.count:
+                print("  " + summary_line(name, h))
 
     # ---------------- throughput / cache ------------------------------------
     section("THROUGHPUT & CACHE")
     for label, name in (("prompt tokens processed", "vllm:prompt_tokens_total"),
                         ("generation tokens", "vllm:generation_tokens_total"),
                         ("prompt tokens from cache", "vllm:prompt_tokens_cached_total")):
-        a, b = g(first, name), g(last, name)
+        a, b = ends(store, name, flt)
         if a is not None and b is not None:
             print(f"{label:<26}: {fmt(b-a):>12}   [{M}, counter delta]")
-    pq0, ph0 = g(first, "vllm:prefix_cache_queries_total"), g(first, "vllm:prefix_cache_hits_total")
-    pq1, ph1 = g(last, "vllm:prefix_cache_queries_total"), g(last, "vllm:prefix_cache_hits_total")
+    (pq0, pq1), (ph0, ph1) = ends(store, "vllm:prefix_cache_queries_total", flt), \
+        ends(store, "vllm:prefix_cache_hits_total", flt)
     if None not in (pq0, ph0, pq1, ph1) and (pq1 - pq0) > 0:
         print(f"{'prefix cache hit rate':<26}: {(ph1-ph0)/(pq1-pq0)*100:>11.1f}%   [{D}, hits/queries delta]")
 
+    # ---------------- windows -----------------------------------------------
+    if width is not None:
+        rows = window_rows(store, width, flt, cap)
+        section(f"WINDOWS — {width:g}s, every metric per window   [{D}]")
+        if not rows:
+            print("run shorter than two ticks — nothing to window")
+        else:
+            q = lambda v, f="{:.2f}": f.format(v) if v is not None else "–"
+            print(f"{'t':>10} {'gen/s':>7} {'prompt/s':>9} {'hit%':>6} {'KVmax%':>7} "
+                  f"{'run':>4} {'wait':>4} {'pre':>4} {'TTFTp99':>8} {'prefillp99':>10}  steady")
+            for r in rows:
+                print(f"{int(r['t_start']):>10} {q(r['gen_tps'], '{:.1f}'):>7} "
+                      f"{q(r['prompt_tps'], '{:.0f}'):>9} "
+                      f"{q(r['prefix_hit_rate'] and r['prefix_hit_rate'] * 100, '{:.1f}'):>6} "
+                      f"{q(r['kv_max'] and r['kv_max'] * 100, '{:.1f}'):>7} "
+                      f"{q(r['running_max'], '{:.0f}'):>4} {q(r['waiting_max'], '{:.0f}'):>4} "
+                      f"{q(r['preemptions'], '{:.0f}'):>4} {q(r['ttft_p99']):>8} "
+                      f"{q(r['prefill_p99']):>10}  {'yes' if r['steady'] else ''}")
+            spans = steady_spans(rows)
+            if spans:
+                print("steady-state spans (gen tok/s CV <= 15% over 3 windows, queue not growing):")
+                for a, b in spans:
+                    print(f"   windows {a}..{b}  t={int(rows[a]['t_start'])}..{int(rows[b]['t_end'])}")
+            else:
+                print("no steady-state span detected — the run never settled")
+            write_csv(rows, f"{run}/windows.csv")
+            print(f"per-window rows -> {run}/windows.csv")
+            if "--parquet" in sys.argv:
+                write_parquet(rows, f"{run}/windows.parquet")
+                print(f"per-window rows -> {run}/windows.parquet")
+
     # ---------------- outcomes ----------------------------------------------
     section("REQUEST OUTCOMES")
-    for k in sorted(last):
-        if k.startswith("vllm:request_success_total"):
-            r = re.search(r'finished_reason="([^"]+)"', k)
-            d = last[k] - first.get(k, 0)
-            if d:
-                flag = "  <-- CONTEXT LIMIT / TRUNCATION" if r and r.group(1) == "length" else ""
-                print(f"  {r.group(1) if r else '?':<12}: {int(d):>4}{flag}   [{M}]")
+    outcomes = defaultdict(list)
+    for lab, c in store.series("vllm:request_success_total", **flt):
+        outcomes[lab.get("finished_reason", "?")].append(c)
+    for reason, cols in sorted(outcomes.items()):
+        c = combine(cols)
+        if c[-1] != c[-1]:
+            continue
+        d = c[-1] - (c[0] if c[0] == c[0] else 0)
+        if d:
+            flag = "  <-- CONTEXT LIMIT / TRUNCATION" if reason == "length" else ""
+            print(f"  {reason:<12}: {int(d):>4}{flag}   [{M}]")
 
     # ---------------- GPUs ---------------------------------------------------
     section("PER-GPU (was one card doing less work?)")
-    per = defaultdict(lambda: defaultdict(list))
-    gp = f"{run}/gpu.csv"
-    if os.path.exists(gp):
-        for line in open(gp, errors="replace"):
-            p = [x.strip() for x in line.split(",")]
-            if len(p) < 9 or not p[1].isdigit():
-                continue
-            i = int(p[1])
-            for key, idx in (("vram", 2), ("util", 4), ("power", 6), ("temp", 8)):
-                try:
-                    per[i][key].append(float(p[idx]))
-                except ValueError:
-                    pass
+    gpus = gputelemetry.load(f"{run}/gpu.csv")
+    per = {i: {k: finite(getattr(g, f)) for k, f in (("vram", "vram"), ("util", "util"),
+                                                     ("power", "power"), ("temp", "temp"))}
+           for i, g in gpus.items()}
     for i in sorted(per):
         v, u, w, t = per[i]["vram"], per[i]["util"], per[i]["power"], per[i]["temp"]
         if not v:
@@ -278,6 +510,79 @@ def main():
                 print("  TP over PCIe with no NVLink — large sustained imbalance would")
                 print("  point at NCCL/PCIe stalls rather than genuine idle.")
 
+    if gpus:
+        g0, g1 = ends(store, "vllm:generation_tokens_total", flt)
+        tt = [v for v in ts if v == v]
+        print()
+        for line in gputelemetry.describe(gpus, tt[0] if tt else None, tt[-1] if tt else None,
+                                          g1 - g0 if None not in (g0, g1) else None, LAT_WINDOW_S):
+            print(line)
+        # time-aligned join: what the cards were doing at the peak-KV tick
+        k = max(range(len(kv)), key=kv.__getitem__)
+        if ts[k] == ts[k]:
+            for i, g in sorted(gpus.items()):
+                u, w = (gputelemetry.align(g, c, [ts[k]])[0] for c in (g.util, g.power))
+                if u == u:
+                    print(f"GPU{i} at peak KV (t={int(ts[k])}): util {u:.0f}%, {w:.0f}W   "
+                          f"[{M}, nearest sample within 3s]")
+
+    # ---------------- efficiency -------------------------------------------
+    if gpus and tt:
+        section("EFFICIENCY (tokens per joule, cost per million tokens)")
+        price = float(sys.argv[sys.argv.index("--price-kwh") + 1]) if "--price-kwh" in sys.argv else PRICE_KWH
+        if "--idle-w" in sys.argv:
+            idle_w, how = float(sys.argv[sys.argv.index("--idle-w") + 1]), "--idle-w"
+        else:
+            busy = [r + w for r, w in zip(zcol(store, "vllm:num_requests_running", flt),
+                                          zcol(store, "vllm:num_requests_waiting", flt))]
+            idle_w, how = gputelemetry.idle_power(gpus, [t for t, b in zip(ts, busy) if t == t and not b])
+        gross = gputelemetry.total_energy_j(gpus, tt[0], tt[-1])
+        if idle_w is None or not gross:
+            print("no power samples in the metrics window")
+        else:
+            net = max(0.0, gross - idle_w * (tt[-1] - tt[0]))
+            def delta(name):
+                a, b = ends(store, name, flt)
+                return b - a if None not in (a, b) else None
+            prompt = delta("vllm:prompt_tokens_total")
+            cached = delta("vllm:prompt_tokens_cached_total")
+            gen = delta("vllm:generation_tokens_total")
+            # without the cached counter every prompt token would count as computed
+            computed = prompt - cached if None not in (prompt, cached) else None
+            # request-seconds in each phase, summed by the engine at completion
+            pre_s = delta("vllm:request_prefill_time_seconds_sum")
+            e2e_s, q_s = delta("vllm:e2e_request_latency_seconds_sum"), delta("vllm:request_queue_time_seconds_sum")
+            dec_s = e2e_s - (q_s or 0) - pre_s if None not in (pre_s, e2e_s) else None
+            share = e_pre = e_dec = None
+            if dec_s is not None and pre_s + max(0.0, dec_s) > 0:
+                share = pre_s / (pre_s + max(0.0, dec_s))
+                e_pre, e_dec = net * share, net * (1 - share)
+            print(f"{'idle draw, all GPUs':<28}: {idle_w:>10,.1f} W      [{D}, {how}]")
+            print(f"{'energy gross / above idle':<28}: {gross / 3.6e6:>10.4f} / {net / 3.6e6:.4f} kWh   "
+                  f"[{D}, ∫ power.draw dt over the metrics window]")
+            if share is not None:
+                print(f"{'prefill / decode share':<28}: {share * 100:>9.0f}% / {(1 - share) * 100:.0f}%   "
+                      f"[{D}, request-seconds from "
+                      f"prefill_time vs e2e - queue - prefill _sum deltas]")
+            else:
+                print("prefill / decode split: N/A (phase time _sum series not scraped)")
+            rows = gputelemetry.efficiency(computed, gen, e_pre, e_dec, net, gross, price)
+            for line in gputelemetry.efficiency_lines(rows):
+                print(line)
+            if computed is None:
+                print("prefill tokens: N/A (prompt_tokens_total / prompt_tokens_cached_total not scraped)")
+            else:
+                print(f"tokens: {fmt(computed)} prompt computed = {fmt(prompt)} prompt - {fmt(cached)} cached, "
+                      f"{fmt(gen)} generated   [{M}, counter deltas]")
+            try:
+                gputelemetry.write_efficiency(rows, f"{run}/efficiency.csv", [
+                    ("idle_w", idle_w, "W", how), ("energy_gross_j", gross, "J", "metrics window"),
+                    ("energy_net_j", net, "J", "gross - idle"), ("prefill_tokens", computed, "tok", "prompt - cached"),
+                    ("decode_tokens", gen, "tok", "generation_tokens_total delta")])
+                print(f"-> {run}/efficiency.csv")
+            except OSError:
+                pass  # read-only run dir
+
     # ---------------- health -------------------------------------------------
     section("POD HEALTH")
     pp = f"{run}/pod.csv"
@@ -291,10 +596,7 @@ def main():
                     restarts.add(f_[3])
             print(f"samples={len(rows)}  restart counts seen: {sorted(restarts) or 'n/a'}   [{M}]")
             print(f"last: {rows[-1]}")
-    for pat, lbl in ((r"OOM|OutOfMemory", "OOM"),
-                     (r"context length|maximum context|too long", "CONTEXT-LIMIT"),
-                     (r"Cache allocation|cannot allocate", "CACHE-ALLOC"),
-                     (r"Preempt", "PREEMPT-LOG")):
+    for pat, lbl in LOG_PATTERNS:
         lp = f"{run}/vllm.log"
         if os.path.exists(lp):
             n = len(re.findall(pat, open(lp, errors="replace").read(), re.I))
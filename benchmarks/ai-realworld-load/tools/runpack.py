@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Compact columnar run format for metrics.stream (stdlib; zstd optional).
+
+metrics.stream is Prometheus text repeated every ~2s: the same few hundred
+series keys re-sent on every tick. A pack stores each key ONCE and its values
+as one float64 column, so a run shrinks ~10x before any compression and
+loading is a memory map instead of a parse:
+
+  b"RPK1" | u32 header length | header JSON | pad to 8 | float64 LE data
+  header: {"version", "ticks", "keys", "codec", "source_size", "source_mtime"}
+  data:   tick epochs, then one column per key in header order (NaN = absent)
+
+codec "none" is mmap'd: a column is a zero-copy memoryview, and only the
+series a report asks for are ever touched. codec "zstd" (`--zstd`, needs
+`pip install zstandard`) trades that for another ~5-10x on disk and one
+decompress on load.
+
+report.py reads <run>/metrics.pack when its recorded source size matches
+metrics.stream (or the text was dropped); otherwise it re-parses the text.
+live.sh keeps reading the text — a pack is written after the run ends.
+The text stays by default: the round-trip check compares parsed values only,
+so `--drop-text` loses the ISO tick stamps and ticks with no samples.
+
+Usage:
+  runpack.py pack <run-dir> [--zstd] [--drop-text]   metrics.stream -> metrics.pack
+  runpack.py info <run-dir>
+"""
+import json, mmap, os, struct, sys
+from array import array
+
+from promstream import TickStore
+
+MAGIC = b"RPK1"
+NAME = "metrics.pack"
+
+
+def write(store, path, codec="none", source=None):
+    """Write every column of `store` (built with keep=None) to `path`."""
+    keys = list(store.keys)
+    header = {"version": 1, "ticks": len(store), "keys": keys, "codec": codec}
+    if source and os.path.exists(source):
+        st = os.stat(source)
+        header.update(source_size=st.st_size, source_mtime=st.st_mtime)
+    hb = json.dumps(header).encode()
+    pad = -(len(MAGIC) + 4 + len(hb)) % 8
+    cols = [store.ts] + [store.cols[store.sid[k]] for k in keys]
+    if sys.byteorder != "little":
+        cols = [array("d", c) for c in cols]
+        for c in cols:
+            c.byteswap()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(hb)) + hb + b"\0" * pad)
+        if codec == "zstd":
+            zstd = _zstd()
+            with zstd.ZstdCompressor(level=10).stream_writer(f, closefd=False) as z:
+                for c in cols:
+                    z.write(memoryview(c).cast("B"))
+        else:
+            for c in cols:
+                f.write(memoryview(c).cast("B"))
+    os.replace(tmp, path)
+    return header
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(4) != MAGIC:
+            raise ValueError(f"{path}: not a runpack file")
+        (n,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(n))
+    header["_data_off"] = 8 + n + (-(8 + n) % 8)
+    return header
+
+
+def load(path, keep=None):
+    """runpack file -> promstream.TickStore holding the kept series."""
+    h = read_header(path)
+    n, off = h["ticks"], h["_data_off"]
+    with open(path, "rb") as f:
+        if h["codec"] == "zstd":
+            f.seek(off)
+            buf = memoryview(_zstd().ZstdDecompressor().stream_reader(f).read())
+            base = 0
+        else:
+            buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            base = off
+    swap = sys.byteorder != "little"
+
+    def col(i):
+        m = buf[base + 8 * n * i:base + 8 * n * (i + 1)].cast("d")
+        if swap:
+            m = array("d", m)
+            m.byteswap()
+        return m
+
+    store = TickStore(keep)
+    store.ts = col(0)
+    for i, key in enumerate(h["keys"], 1):
+        store.adopt(key, col(i))
+    return store
+
+
+def fresh(run):
+    """Path of a pack usable in place of <run>/metrics.stream, else None."""
+    pack, text = os.path.join(run, NAME), os.path.join(run, "metrics.stream")
+    if not os.path.exists(pack):
+        return None
+    if not os.path.exists(text):
+        return pack
+    try:
+        return pack if read_header(pack).get("source_size") == os.path.getsize(text) else None
+    except (ValueError, OSError):
+        return None
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise SystemExit("zstd packs need zstandard: pip install zstandard")
+    return zstandard
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ("pack", "info"):
+        sys.exit(__doc__)
+    run = sys.argv[2].rstrip("/")
+    text, pack = os.path.join(run, "metrics.stream"), os.path.join(run, NAME)
+    if sys.argv[1] == "info":
+        h = read_header(pack)
+        print(f"{pack}: {h['ticks']} ticks x {len(h['keys'])} series, codec={h['codec']}, "
+              f"{os.path.getsize(pack):,} bytes (text was {h.get('source_size', 0):,})")
+        return
+    if not os.path.exists(text):
+        sys.exit(f"{text}: not found")
+    store = TickStore().feed_file(text)
+    h = write(store, pack, "zstd" if "--zstd" in sys.argv else "none", source=text)
+    # verify before anything is deleted: every column must round-trip exactly
+    back = load(pack)
+    same = lambda a, b: all(x == y or (x != x and y != y) for x, y in zip(a, b))
+    if back.keys != store.keys or not same(back.ts, store.ts) or not all(
+            same(back.cols[i], store.cols[i]) for i in range(len(store.keys))):
+        os.remove(pack)
+        sys.exit(f"{pack}: round-trip mismatch — pack removed, text kept")
+    size = os.path.getsize(pack)
+    print(f"{pack}: {h['ticks']} ticks x {len(h['keys'])} series, {size:,} bytes "
+          f"({h['source_size'] / max(1, size):.1f}x smaller than metrics.stream)")
+    if "--drop-text" in sys.argv:
+        os.remove(text)
+        print(f"removed {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Concurrency step functions over [(start, end)] intervals (stdlib).
+
+Shared by report-ninfer.py (in-flight / waiting requests) and gputelemetry.py
+(overlapping phases), which otherwise have nothing to do with each other:
+
+  sweep(iv)                          (times, levels): intervals open from each instant on
+  level_stats(times, levels, bins)   per-bin (peak, time-weighted mean) of a sweep
+"""
+import bisect
+from itertools import accumulate
+
+
+def sweep(iv):
+    """Interval sweep -> (times, levels): level[k] holds on [times[k], times[k+1]).
+
+    One sort of 2N edges and a running sum — O(N log N) for any N. Ends sort
+    before starts at the same instant, so back-to-back requests do not overlap.
+    """
+    edges = sorted([(a, 1) for a, _ in iv] + [(b, -1) for _, b in iv], key=lambda x: (x[0], x[1]))
+    return [t for t, _ in edges], list(accumulate(d for _, d in edges))
+
+
+def level_stats(times, levels, bins):
+    """Per-bin (max, time-weighted mean) of a sweep step function over `bins` edges."""
+    out = []
+    for a, b in zip(bins, bins[1:]):
+        i = max(0, bisect.bisect_right(times, a) - 1)
+        lvl = levels[i] if times and times[0] <= a else 0
+        peak, area, t = lvl, 0.0, a
+        for j in range(bisect.bisect_right(times, a), len(times)):
+            if times[j] >= b:
+                break
+            area += lvl * (times[j] - t)
+            t, lvl = times[j], levels[j]
+            peak = max(peak, lvl)
+        area += lvl * (b - t)
+        out.append((peak, area / (b - a) if b > a else 0.0))
+    return out
@@ -0,0 +1,219 @@
+"""Per-window analysis over a promstream.TickStore (stdlib; Parquet optional).
+
+Whole-run first/last deltas blend load phases — the Perplexica burst and the
+Pi long-context step come out as one average. This cuts the run into
+N-second windows that tile it exactly: window k covers ticks (b[k], b[k+1]],
+so counter deltas across all windows sum to the whole-run delta and no
+increment is dropped at a boundary.
+
+Per window: throughput and cache counters (counter delta / window seconds),
+KV% / running / waiting mean+max (gauges over the window's ticks), preemptions,
+latency means (Δsum/Δcount) and p50/p90/p99 from bucket deltas. All DERIVED.
+
+Steady state: a window is steady when it and its STEADY_SPAN-1 predecessors
+have generation throughput within STEADY_CV (coefficient of variation) of
+each other, work was running, and the waiting queue was not growing.
+
+Columns are processed one pass each (boundary-indexed diffs), so cost is
+O(ticks x columns) regardless of the window count.
+"""
+import csv, math
+
+LATENCY = (("ttft", "vllm:time_to_first_token_seconds"),
+           ("tpot", "vllm:request_time_per_output_token_seconds"),
+           ("e2e", "vllm:e2e_request_latency_seconds"),
+           ("queue", "vllm:request_queue_time_seconds"),
+           ("prefill", "vllm:request_prefill_time_seconds"))
+
+RATES = (("prompt_tps", "vllm:prompt_tokens_total"),
+         ("gen_tps", "vllm:generation_tokens_total"),
+         ("cached_tps", "vllm:prompt_tokens_cached_total"))
+
+GAUGES = (("kv", "vllm:kv_cache_usage_perc", "max"),
+          ("running", "vllm:num_requests_running", "sum"),
+          ("waiting", "vllm:num_requests_waiting", "sum"))
+
+STEADY_SPAN, STEADY_CV = 3, 0.15
+
+
+def bucket_quantile(before, after, q):
+    """q-th percentile of the observations that landed between two snapshots.
+
+    Returns (lo, hi, est) or None when nothing completed: the true value is in
+    the bucket (lo, hi]; est interpolates linearly inside it (Prometheus
+    histogram_quantile), and is lo when the bucket is (…, +Inf].
+    """
+    b = dict(before)
+    cum = [(le, c - b.get(le, 0)) for le, c in after]
+    if not cum or cum[-1][1] <= 0:
+        return None
+    rank = cum[-1][1] * q / 100
+    prev_le, prev_c = 0.0, 0.0
+    for le, c in cum:
+        if c >= rank and c > prev_c:
+            if le == math.inf:
+                return prev_le, le, prev_le
+            return prev_le, le, prev_le + (le - prev_le) * (rank - prev_c) / (c - prev_c)
+        prev_le, prev_c = le, c
+    return None
+
+
+def tick_times(ts):
+    """Tick epochs with missing markers filled at 2s spacing."""
+    return [v if v == v else 2.0 * i for i, v in enumerate(ts)]
+
+
+def tick_windows(ts, width, step):
+    """(i, j) tick-index pairs spanning each `width`-second window, advancing by `step`.
+
+    Two-pointer pass, O(ticks).
+    """
+    t = tick_times(ts)
+    out, j = [], 0
+    if not t:
+        return out
+    start = t[0]
+    for i in range(len(t)):
+        if t[i] < start:
+            continue
+        while j + 1 < len(t) and t[j + 1] <= t[i] + width:
+            j += 1
+        if j > i:
+            out.append((i, j))
+        start = t[i] + step
+        if t[j] >= t[-1]:
+            break
+    return out
+
+
+def boundaries(ts, width):
+    """Tick indices b[0]=0 < b[1] < … < b[-1]=last closing each `width`-second window."""
+    if not width > 0:
+        raise ValueError(f"window width must be > 0 seconds, got {width!r}")
+    t = tick_times(ts)
+    if len(t) < 2:
+        return []
+    b, edge = [0], t[0] + width
+    for i in range(1, len(t)):
+        if t[i] >= edge:
+            b.append(i)
+            while edge <= t[i]:
+                edge += width
+    if b[-1] != len(t) - 1:
+        b.append(len(t) - 1)
+    return b
+
+
+def ffill(col):
+    """Carry the last observed value over NaN gaps (counters missing from a scrape)."""
+    out, last = [], math.nan
+    for v in col:
+        if v == v:
+            last = v
+        out.append(last)
+    return out
+
+
+def _diffs(col, b):
+    if col is None:
+        return [None] * (len(b) - 1)
+    c = ffill(col)
+    return [None if c[j] != c[j] or c[i] != c[i] else max(0.0, c[j] - c[i])
+            for i, j in zip(b, b[1:])]
+
+
+def _gauge(col, b):
+    if col is None:
+        return [(None, None)] * (len(b) - 1)
+    out = []
+    for i, j in zip(b, b[1:]):
+        vals = [v for v in col[i + 1:j + 1] if v == v]
+        out.append((sum(vals) / len(vals), max(vals)) if vals else (None, None))
+    return out
+
+
+def window_rows(store, width, flt=None, cap=None):
+    """One dict per window; keys are CSV columns. Empty list if the run is too short."""
+    flt = flt or {}
+    b = boundaries(store.ts, width)
+    if not b:
+        return []
+    t = tick_times(store.ts)
+    rows = [{"window": k, "t_start": t[i], "t_end": t[j], "secs": t[j] - t[i], "ticks": j - i}
+            for k, (i, j) in enumerate(zip(b, b[1:]))]
+    for key, name in RATES:
+        for r, d in zip(rows, _diffs(store.total(name, **flt), b)):
+            r[key] = d / r["secs"] if d is not None and r["secs"] > 0 else None
+    q = _diffs(store.total("vllm:prefix_cache_queries_total", **flt), b)
+    h = _diffs(store.total("vllm:prefix_cache_hits_total", **flt), b)
+    for r, dq, dh in zip(rows, q, h):
+        r["prefix_hit_rate"] = dh / dq if dq and dh is not None else None
+    for r, d in zip(rows, _diffs(store.total("vllm:num_preemptions_total", **flt), b)):
+        r["preemptions"] = d
+    for key, name, how in GAUGES:
+        for r, (mean, peak) in zip(rows, _gauge(store.total(name, how, **flt), b)):
+            r[key + "_mean"], r[key + "_max"] = mean, peak
+    if cap:
+        for r in rows:
+            r["kv_tokens_max"] = r["kv_max"] * cap if r["kv_max"] is not None else None
+    for key, name in LATENCY:
+        s = _diffs(store.total(name + "_sum", **flt), b)
+        n = _diffs(store.total(name + "_count", **flt), b)
+        for k, (r, ds, dn) in enumerate(zip(rows, s, n)):
+            r[key + "_n"] = dn
+            r[key + "_mean"] = ds / dn if dn and ds is not None else None
+            b0, b1 = store.buckets_at(name, b[k], **flt), store.buckets_at(name, b[k + 1], **flt)
+            for p in (50, 90, 99):
+                qr = bucket_quantile(b0, b1, p) if b1 else None
+                r[f"{key}_p{p}"] = qr[2] if qr else None
+    mark_steady(rows)
+    return rows
+
+
+def mark_steady(rows, span=STEADY_SPAN, cv=STEADY_CV):
+    """Set row['steady'] (see module doc). The first span-1 windows are never steady."""
+    for k, r in enumerate(rows):
+        r["steady"] = False
+        if k + 1 < span:
+            continue
+        run = rows[k + 1 - span:k + 1]
+        g = [x["gen_tps"] for x in run]
+        if None in g or not all(x["running_mean"] for x in run):
+            continue
+        mean = sum(g) / span
+        if mean <= 0:
+            continue
+        sd = math.sqrt(sum((v - mean) ** 2 for v in g) / span)
+        wq = [x["waiting_mean"] or 0.0 for x in run]
+        r["steady"] = sd / mean <= cv and wq[-1] <= wq[0] + 1
+    return rows
+
+
+def steady_spans(rows):
+    """[(first_window, last_window)] of consecutive steady windows."""
+    spans, start = [], None
+    for r in rows + [{"steady": False, "window": None}]:
+        if r["steady"] and start is None:
+            start = r["window"]
+        elif not r["steady"] and start is not None:
+            spans.append((start, prev))
+            start = None
+        prev = r["window"]
+    return spans
+
+
+def write_csv(rows, path):
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0]))
+        w.writeheader()
+        for r in rows:
+            w.writerow({k: ("" if v is None else round(v, 6) if isinstance(v, float) else v)
+                        for k, v in r.items()})
+
+
+def write_parquet(rows, path):
+    try:
+        import pyarrow as pa, pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("--parquet needs pyarrow: pip install pyarrow")
+    pq.write_table(pa.Table.from_pylist(rows), path)
@@ -1,11 +1,15 @@
 """Bridge nodes for LlamaCpp vision integration in ComfyUI."""
 
 import base64
+import http.client
 import io
 import json
 import re
-import urllib.request
+import select
+import threading
 import urllib.error
+import urllib.request
+from urllib.parse import urlsplit
 
 import numpy as np
 from PIL import Image
@@ -25,6 +29,73 @@ def _image_to_base64(image_tensor):
     return base64.b64encode(buffer.getvalue()).decode("utf-8")
 
 
+# Keep-alive connections to llama.cpp, shared across node executions. A fresh
+# TCP connection per call adds handshake time to every caption.
+_IDLE = {}
+_IDLE_LOCK = threading.Lock()
+
+
+def _dropped(conn):
+    """True if an idle pooled connection was closed by the server (EOF readable)."""
+    if conn.sock is None:
+        return True
+    readable, _, _ = select.select([conn.sock], [], [], 0)
+    return bool(readable)
+
+
+def _post_urllib(url, body, timeout):
+    req = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def _post_json(url, payload, timeout):
+    """POST JSON to llama.cpp; returns (status, body bytes).
+
+    Direct connections reuse a pooled keep-alive HTTP/1.1 connection. When an
+    HTTP(S)_PROXY applies to the host, the request goes through urllib as before.
+    Redirects are not followed; urllib would turn a redirected POST into a
+    bodyless GET anyway. Idle connections the server already closed are
+    discarded before sending, and a POST that fails once sent is never retried:
+    llama.cpp may already be generating for it.
+    """
+    u = urlsplit(url)
+    body = json.dumps(payload).encode("utf-8")
+    if u.scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(u.hostname or ""):
+        return _post_urllib(url, body, timeout)
+    key = (u.scheme, u.netloc)
+    cls = http.client.HTTPSConnection if u.scheme == "https" else http.client.HTTPConnection
+    path = (u.path or "/") + ("?" + u.query if u.query else "")
+    conn = None
+    with _IDLE_LOCK:
+        idle = _IDLE.get(key, [])
+        while idle and conn is None:
+            conn = idle.pop()
+            if _dropped(conn):
+                conn.close()
+                conn = None
+    if conn is None:
+        conn = cls(u.netloc, timeout=timeout)
+    try:
+        conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        data = resp.read()
+    except Exception:
+        conn.close()
+        raise
+    if resp.will_close:
+        conn.close()
+    else:
+        with _IDLE_LOCK:
+            _IDLE.setdefault(key, []).append(conn)
+    return resp.status, data
+
+
 def _chat_completion(server_url, model, messages, temperature, max_tokens):
     """Call llama.cpp /v1/chat/completions and return the text response."""
     payload = {
@@ -36,19 +107,14 @@ def _chat_completion(server_url, model, messages, temperature, max_tokens):
     }
 
     url = f"{server_url.rstrip('/')}/v1/chat/completions"
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-
     try:
-        with urllib.request.urlopen(req, timeout=120) as resp:
-            result = json.loads(resp.read().decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        body = e.read().decode("utf-8", errors="replace")
-        return f"[ERROR {e.code}] {body[:500]}"
+        status, data = _post_json(url, payload, timeout=120)
+    except Exception as e:
+        return f"[ERROR] {e}"
+    if status >= 400:
+        return f"[ERROR {status}] {data.decode('utf-8', errors='replace')[:500]}"
+    try:
+        result = json.loads(data.decode("utf-8"))
     except Exception as e:
         return f"[ERROR] {e}"
 
@@ -8,14 +8,32 @@ Read-only. Uses:
   - kubectl get --raw /apis/metrics.k8s.io/v1beta1/nodes
   - kubectl get --raw /apis/metrics.k8s.io/v1beta1/pods
 
+Collection backends (--backend):
+  - kubectl  one kubectl fork per call; pods listed at start and end only
+  - watch    one `kubectl proxy`, list+watch threads keeping pods and nodes
+             current (pods that come and go mid-run are inventoried), and
+             keep-alive HTTP for metrics.k8s.io — for short intervals over
+             long runs without re-listing every pod each tick
+  - --fixture DIR replaces the API server with a recorded one (see
+    FixtureServer); --record DIR writes such a fixture from a live run
+
+Daemon mode (--daemon) runs until SIGTERM/SIGINT into a stable folder:
+samples are appended (fsync'd) to rotated JSONL segments under samples/,
+1h/24h/7d aggregates are kept as bucketed sketches in fixed memory, and the
+reports below are rewritten every --summary-every seconds. A restart
+replays the store into the windows, so a crash loses at most one tick.
+
 Outputs:
   - summary.md
   - raw JSON snapshots
-  - CSV sample series
-  - pod/request inventory CSV
+  - CSV sample series (daemon: samples/ segments)
+  - pod/owner request and usage inventory CSVs
 
 Example:
   ./estimate-k8s-capacity.py --duration 3600 --interval 60
+  ./estimate-k8s-capacity.py --backend watch --duration 14400 --interval 5 --record fixture/
+  ./estimate-k8s-capacity.py --fixture fixture/ --duration 60 --interval 2
+  ./estimate-k8s-capacity.py --daemon --backend watch --interval 15 --outdir /var/lib/k8s-capacity
 """
 
 from __future__ import annotations
@@ -23,21 +41,30 @@ from __future__ import annotations
 import argparse
 import csv
 import datetime as dt
+import http.client
 import json
 import math
 import os
 import re
+import signal
 import statistics
 import subprocess
 import sys
+import threading
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 CPU_MILLI = 1000
 MEM_GIB = 1024 ** 3
+# Pods that hold no resources. "Deleted" marks a pod seen during the run but
+# gone by the end (churn), kept in the inventory for its observed usage.
+DONE_PHASES = ("Succeeded", "Failed", "Deleted")
 
 
 def sh_json(args: List[str]) -> Any:
@@ -195,9 +222,400 @@ def pod_resource_totals(pod: Dict[str, Any]) -> Dict[str, int]:
     return totals
 
 
-def get_metrics() -> Tuple[Dict[str, Dict[str, int]], Dict[Tuple[str, str], Dict[str, int]]]:
-    node_metrics_raw = sh_json(["kubectl", "get", "--raw", "/apis/metrics.k8s.io/v1beta1/nodes"])
-    pod_metrics_raw = sh_json(["kubectl", "get", "--raw", "/apis/metrics.k8s.io/v1beta1/pods"])
+NODE_METRICS_PATH = "/apis/metrics.k8s.io/v1beta1/nodes"
+POD_METRICS_PATH = "/apis/metrics.k8s.io/v1beta1/pods"
+WATCH_TIMEOUT_S = 300
+WATCH_BACKOFF_MAX_S = 60
+FIXTURE_RV = "fixture-list"
+
+
+def pod_key(obj: Dict[str, Any]) -> Tuple[str, str]:
+    meta = obj.get("metadata", {})
+    return meta.get("namespace", ""), meta.get("name", "")
+
+
+class Recorder:
+    """
+    Writes a fixture directory from a live run (the format FixtureServer reads):
+
+      nodes.json, pods.json            initial list responses
+      node-events.jsonl,
+      pod-events.jsonl                 watch events, {"offset_s", "type", "object"}
+      node-metrics.jsonl,
+      pod-metrics.jsonl                metrics.k8s.io responses, one per scrape
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.t0 = time.monotonic()
+        self.lock = threading.Lock()
+        for name in ("node-events.jsonl", "pod-events.jsonl", "node-metrics.jsonl", "pod-metrics.jsonl"):
+            (self.path / name).write_text("")
+
+    def _append(self, name: str, obj: Any) -> None:
+        with self.lock, (self.path / name).open("a") as f:
+            f.write(json.dumps(obj) + "\n")
+
+    def listed(self, resource: str, obj: Dict[str, Any]) -> None:
+        target = self.path / f"{resource}.json"
+        if not target.exists():
+            target.write_text(json.dumps(obj))
+
+    def event(self, resource: str, ev: Dict[str, Any]) -> None:
+        self._append(f"{resource[:-1]}-events.jsonl",
+                     {"offset_s": round(time.monotonic() - self.t0, 3), **ev})
+
+    def metrics(self, path: str, obj: Dict[str, Any]) -> None:
+        self._append("node-metrics.jsonl" if path == NODE_METRICS_PATH else "pod-metrics.jsonl", obj)
+
+
+class KubectlBackend:
+    """One kubectl fork per call; pods are a start-of-run snapshot until refresh()."""
+
+    name = "kubectl"
+
+    def __init__(self, recorder: Optional[Recorder] = None):
+        self.recorder = recorder
+        self._nodes: List[Dict[str, Any]] = []
+        self._pods: List[Dict[str, Any]] = []
+
+    def start(self) -> None:
+        self._nodes = self._list("nodes")
+        self._pods = self._list("pods")
+
+    def _list(self, resource: str) -> List[Dict[str, Any]]:
+        args = ["kubectl", "get", resource, "-o", "json"]
+        if resource == "pods":
+            args.insert(3, "-A")
+        obj = sh_json(args)
+        if self.recorder:
+            self.recorder.listed(resource, obj)
+        return obj.get("items", [])
+
+    def raw(self, path: str) -> Dict[str, Any]:
+        obj = sh_json(["kubectl", "get", "--raw", path])
+        if self.recorder:
+            self.recorder.metrics(path, obj)
+        return obj
+
+    def nodes(self) -> List[Dict[str, Any]]:
+        return list(self._nodes)
+
+    def pods(self) -> List[Dict[str, Any]]:
+        return list(self._pods)
+
+    def refresh(self) -> None:
+        self._pods = self._list("pods")
+
+    def close(self) -> None:
+        pass
+
+
+class WatchBackend:
+    """
+    List+watch against an API server base URL (kubectl proxy or a FixtureServer).
+
+    A thread per resource lists once, then follows ?watch=1 from the list's
+    resourceVersion and applies ADDED/MODIFIED/DELETED to an in-memory cache;
+    a 410 Gone or dropped stream re-lists. Metrics calls reuse one keep-alive
+    connection per calling thread instead of forking kubectl per scrape.
+    """
+
+    name = "watch"
+
+    def __init__(self, base_url: str, recorder: Optional[Recorder] = None, proxy: Optional[subprocess.Popen] = None):
+        host, _, port = base_url.split("://", 1)[-1].rstrip("/").partition(":")
+        self.host, self.port = host, int(port or 80)
+        self.recorder = recorder
+        self.proxy = proxy
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.cache: Dict[str, Dict[Any, Dict[str, Any]]] = {"nodes": {}, "pods": {}}
+        self.synced = {"nodes": threading.Event(), "pods": threading.Event()}
+        self.local = threading.local()
+        self.threads: List[threading.Thread] = []
+
+    @classmethod
+    def via_proxy(cls, recorder: Optional[Recorder] = None) -> "WatchBackend":
+        """Start `kubectl proxy` on a free local port and connect through it."""
+        proc = subprocess.Popen(["kubectl", "proxy", "--port=0"], stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True)
+        line = proc.stdout.readline() if proc.stdout else ""
+        m = re.search(r"127\.0\.0\.1:(\d+)", line)
+        if not m:
+            proc.terminate()
+            raise RuntimeError(f"kubectl proxy did not start: {line.strip() or proc.stderr.read()}")
+        return cls(f"http://127.0.0.1:{m.group(1)}", recorder, proc)
+
+    def _conn(self) -> http.client.HTTPConnection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        return conn
+
+    def get(self, path: str) -> Dict[str, Any]:
+        for attempt in (0, 1):
+            conn = self._conn()
+            try:
+                conn.request("GET", path, headers={"Accept": "application/json"})
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, OSError):
+                # server closed the idle keep-alive connection: retry once fresh
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    raise
+                continue
+            if resp.status != 200:
+                raise RuntimeError(f"GET {path}: HTTP {resp.status}: {body[:300]!r}")
+            return json.loads(body)
+        raise RuntimeError(f"GET {path}: unreachable")
+
+    def raw(self, path: str) -> Dict[str, Any]:
+        obj = self.get(path)
+        if self.recorder:
+            self.recorder.metrics(path, obj)
+        return obj
+
+    def _key(self, resource: str, obj: Dict[str, Any]) -> Any:
+        return pod_key(obj) if resource == "pods" else obj.get("metadata", {}).get("name", "")
+
+    def _relist(self, resource: str) -> str:
+        obj = self.get(f"/api/v1/{resource}")
+        if self.recorder:
+            self.recorder.listed(resource, obj)
+        with self.lock:
+            self.cache[resource] = {self._key(resource, o): o for o in obj.get("items", [])}
+        self.synced[resource].set()
+        return obj.get("metadata", {}).get("resourceVersion", "")
+
+    def _watch(self, resource: str) -> None:
+        rv = ""
+        backoff = 1.0  # doubles per failed attempt up to WATCH_BACKOFF_MAX_S, reset by a good stream
+        while not self.stop.is_set():
+            try:
+                if not rv:
+                    rv = self._relist(resource)
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=WATCH_TIMEOUT_S + 30)
+                conn.request("GET", f"/api/v1/{resource}?watch=1&allowWatchBookmarks=true"
+                                    f"&resourceVersion={rv}&timeoutSeconds={WATCH_TIMEOUT_S}")
+                resp = conn.getresponse()
+                if resp.status != 200:
+                    # e.g. RBAC allows list but not watch: do not spin re-listing
+                    print(f"WARN: {resource} watch: HTTP {resp.status} {resp.reason}; "
+                          f"re-listing in {backoff:g}s", file=sys.stderr)
+                    rv = ""
+                    conn.close()
+                    self.stop.wait(backoff)
+                    backoff = min(backoff * 2, WATCH_BACKOFF_MAX_S)
+                    continue
+                backoff = 1.0
+                for line in resp:
+                    if self.stop.is_set():
+                        break
+                    if not line.strip():
+                        continue
+                    ev = json.loads(line)
+                    obj = ev.get("object", {})
+                    kind = ev.get("type")
+                    if kind == "ERROR":
+                        rv = ""  # 410 Gone: resourceVersion too old, re-list
+                        break
+                    rv = obj.get("metadata", {}).get("resourceVersion", rv)
+                    if kind == "BOOKMARK":
+                        continue
+                    if self.recorder:
+                        self.recorder.event(resource, ev)
+                    with self.lock:
+                        if kind == "DELETED":
+                            self.cache[resource].pop(self._key(resource, obj), None)
+                        else:
+                            self.cache[resource][self._key(resource, obj)] = obj
+                conn.close()
+            except (http.client.HTTPException, OSError, ValueError, RuntimeError) as e:
+                print(f"WARN: {resource} watch: {e}; re-listing in {backoff:g}s", file=sys.stderr)
+                rv = ""
+                self.stop.wait(backoff)
+                backoff = min(backoff * 2, WATCH_BACKOFF_MAX_S)
+
+    def start(self) -> None:
+        for resource in ("nodes", "pods"):
+            t = threading.Thread(target=self._watch, args=(resource,), name=f"watch-{resource}", daemon=True)
+            t.start()
+            self.threads.append(t)
+        for resource, ev in self.synced.items():
+            if not ev.wait(60):
+                raise RuntimeError(f"initial {resource} list did not complete")
+
+    def nodes(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            return list(self.cache["nodes"].values())
+
+    def pods(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            return list(self.cache["pods"].values())
+
+    def refresh(self) -> None:
+        pass  # the watch already holds the current pods
+
+    def close(self) -> None:
+        self.stop.set()
+        if self.proxy:
+            self.proxy.terminate()
+
+
+class FixtureServer:
+    """
+    Local stand-in for the API server, replaying a Recorder directory.
+
+    List requests return nodes.json / pods.json; a watch streams the matching
+    *-events.jsonl, each event sent once its offset_s has elapsed since the
+    watch opened, then holds the stream until timeoutSeconds. Each metrics
+    request returns the next line of *-metrics.jsonl (the last one repeats).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.scrapes = {NODE_METRICS_PATH: 0, POD_METRICS_PATH: 0}
+        self.lock = threading.Lock()
+        self.closing = threading.Event()
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *a: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                path, _, query = self.path.partition("?")
+                if "watch=1" in query:
+                    return fixture.watch(self, path.rsplit("/", 1)[-1], query)
+                body = fixture.respond(path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def _lines(self, name: str) -> List[str]:
+        p = self.path / name
+        return [l for l in p.read_text().splitlines() if l.strip()] if p.exists() else []
+
+    def respond(self, path: str) -> Optional[Dict[str, Any]]:
+        if path in ("/api/v1/nodes", "/api/v1/pods"):
+            obj = json.loads((self.path / f"{path.rsplit('/', 1)[-1]}.json").read_text())
+            obj.setdefault("metadata", {})["resourceVersion"] = FIXTURE_RV
+            return obj
+        if path in self.scrapes:
+            lines = self._lines("node-metrics.jsonl" if path == NODE_METRICS_PATH else "pod-metrics.jsonl")
+            if not lines:
+                return None
+            with self.lock:
+                i = min(self.scrapes[path], len(lines) - 1)
+                self.scrapes[path] += 1
+            return json.loads(lines[i])
+        return None
+
+    def watch(self, h: BaseHTTPRequestHandler, resource: str, query: str) -> None:
+        m = re.search(r"timeoutSeconds=(\d+)", query)
+        timeout = int(m.group(1)) if m else WATCH_TIMEOUT_S
+        h.send_response(200)
+        h.send_header("Content-Type", "application/json")
+        h.send_header("Transfer-Encoding", "chunked")
+        h.end_headers()
+        t0 = time.monotonic()
+        try:
+            # a watch from the list's version replays every event; one resumed
+            # from an event's own resourceVersion has nothing left to send
+            if f"resourceVersion={FIXTURE_RV}&" in query + "&":
+                for line in self._lines(f"{resource[:-1]}-events.jsonl"):
+                    ev = json.loads(line)
+                    wait = ev.pop("offset_s", 0) - (time.monotonic() - t0)
+                    if wait > 0 and self.closing.wait(wait):
+                        break
+                    data = (json.dumps(ev) + "\n").encode()
+                    h.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    h.wfile.flush()
+            self.closing.wait(max(0.0, timeout - (time.monotonic() - t0)))
+            h.wfile.write(b"0\r\n\r\n")
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        self.closing.set()
+        self.httpd.shutdown()
+
+
+class TickScheduler:
+    """
+    Ticks on a fixed monotonic grid: tick k is due at start + k * interval.
+
+    Sleeping a fixed interval after each scrape drifts by the scrape time every
+    tick; here a slow scrape only delays that tick. A scrape that overruns the
+    next due time skips it (counted in `missed`) instead of bunching samples.
+    Setting `stop` (SIGINT/SIGTERM) ends the run at the next wait.
+    """
+
+    def __init__(self, interval: float, duration: float, stop: Optional[threading.Event] = None):
+        self.interval = interval
+        self.duration = duration
+        self.stop = stop or threading.Event()
+        self.start = time.monotonic()
+        self.k = 0
+        self.missed = 0
+
+    def wait(self) -> Optional[float]:
+        """Sleep until the next due tick; its skew in seconds, or None when the run is over."""
+        due = self.start + self.k * self.interval
+        if self.k * self.interval > self.duration:
+            return None
+        delay = due - time.monotonic()
+        if self.stop.wait(max(delay, 0)):
+            return None
+        return time.monotonic() - due
+
+    def advance(self) -> None:
+        nxt = math.ceil((time.monotonic() - self.start) / self.interval)
+        self.missed += max(0, nxt - self.k - 1)
+        self.k = max(self.k + 1, nxt)
+
+
+def timed(fn: Any, *args: Any) -> Tuple[Any, float]:
+    t = time.monotonic()
+    return fn(*args), time.monotonic() - t
+
+
+def get_metrics(
+    backend: Any, pool: Optional[ThreadPoolExecutor] = None
+) -> Tuple[Dict[str, Dict[str, int]], Dict[Tuple[str, str], Dict[str, int]], Dict[str, float]]:
+    """Node and pod metrics, fetched concurrently when `pool` is given, plus scrape timings (ms)."""
+    t0 = time.monotonic()
+    if pool:
+        node_f = pool.submit(timed, backend.raw, NODE_METRICS_PATH)
+        pod_f = pool.submit(timed, backend.raw, POD_METRICS_PATH)
+        (node_metrics_raw, node_s), (pod_metrics_raw, pod_s) = node_f.result(), pod_f.result()
+    else:
+        node_metrics_raw, node_s = timed(backend.raw, NODE_METRICS_PATH)
+        pod_metrics_raw, pod_s = timed(backend.raw, POD_METRICS_PATH)
+    timing = {
+        "scrape_ms": round((time.monotonic() - t0) * 1000, 1),
+        "node_scrape_ms": round(node_s * 1000, 1),
+        "pod_scrape_ms": round(pod_s * 1000, 1),
+    }
 
     node_metrics: Dict[str, Dict[str, int]] = {}
     for item in node_metrics_raw.get("items", []):
@@ -220,11 +638,245 @@ def get_metrics() -> Tuple[Dict[str, Dict[str, int]], Dict[Tuple[str, str], Dict
             mem_b += parse_mem_to_bytes(usage.get("memory"))
         pod_metrics[(ns, name)] = {"cpu_m": cpu_m, "mem_b": mem_b}
 
-    return node_metrics, pod_metrics
+    return node_metrics, pod_metrics, timing
+
+
+class QuantileSketch:
+    """
+    DDSketch-style streaming quantiles with bounded memory.
+
+    A value v > 0 lands in bucket ceil(log_gamma(v)), gamma = (1 + a) / (1 - a),
+    so every quantile is within relative error `a` of the true one. Values
+    <= 0 are counted separately. When more than `max_bins` buckets exist the
+    lowest are collapsed into one, trading accuracy only at the bottom of the
+    range; the top quantiles stay exact to `a`. Memory is O(max_bins) no
+    matter how many samples are added.
+    """
+
+    def __init__(self, rel_err: float = 0.01, max_bins: int = 512):
+        self.gamma = (1 + rel_err) / (1 - rel_err)
+        self.log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.bins: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, v: float) -> None:
+        self.count += 1
+        self.sum += v
+        self.min = min(self.min, v)
+        self.max = max(self.max, v)
+        if v <= 0:
+            self.zeros += 1
+            return
+        k = math.ceil(math.log(v) / self.log_gamma)
+        self.bins[k] = self.bins.get(k, 0) + 1
+        self._collapse()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Fold `other` (same rel_err) into this sketch."""
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.zeros += other.zeros
+        for k, n in other.bins.items():
+            self.bins[k] = self.bins.get(k, 0) + n
+        self._collapse()
+
+    def _collapse(self) -> None:
+        while len(self.bins) > self.max_bins:
+            keys = sorted(self.bins)
+            self.bins[keys[1]] += self.bins.pop(keys[0])
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q (0..100); 0.0 when empty."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return max(self.min, 0.0)
+        for k in sorted(self.bins):
+            seen += self.bins[k]
+            if rank < seen:
+                # bucket (gamma^(k-1), gamma^k]: midpoint in relative terms, but never
+                # outside the observed range (a constant series reports itself)
+                mid = 2 * self.gamma ** k / (self.gamma + 1)
+                return min(self.max, max(self.min, mid))
+        return self.max
+
+
+SKETCH_QUANTILES = (50, 95, 99)
+
+
+def sketch_columns(prefix: str, sketch: Optional[QuantileSketch]) -> Dict[str, float]:
+    return {f"{prefix}_p{q}": round(sketch.quantile(q)) if sketch else 0 for q in SKETCH_QUANTILES}
+
+
+def usage_ratio(usage: float, request: float) -> Any:
+    return round(usage / request, 3) if request > 0 else ""
+
+
+# (name, span seconds, buckets): daemon-mode aggregates. The longest window
+# feeds the recommendations; the sample store keeps a little more than it.
+ROLLING_WINDOWS = (("1h", 3600, 60), ("24h", 86400, 96), ("7d", 7 * 86400, 168))
+
+
+def sample_values(sample: Dict[str, Any]) -> Dict[str, float]:
+    """Flat metric -> value view of one sample, as fed to RollingWindow."""
+    out = {"cluster_cpu_m": sample["cluster_cpu_m"], "cluster_mem_b": sample["cluster_mem_b"]}
+    for role, m in sample.get("roles", {}).items():
+        out[f"role:{role}:cpu_m"] = m["cpu_m"]
+        out[f"role:{role}:mem_b"] = m["mem_b"]
+    return out
+
+
+class RollingWindow:
+    """
+    Sliding-window quantiles in fixed memory.
+
+    The span is cut into `buckets` time buckets, each holding one
+    QuantileSketch per metric; buckets older than the span are dropped and a
+    query merges the rest. The window edge is therefore exact to one bucket
+    (1 min for 1h, 15 min for 24h, 1 h for 7d), and memory is bounded by the
+    bucket count, not by how long the daemon has run.
+    """
+
+    def __init__(self, name: str, span_s: float, buckets: int):
+        self.name = name
+        self.span_s = span_s
+        self.width = span_s / buckets
+        self.buckets: deque = deque()  # [bucket_start, {metric: QuantileSketch}]
+
+    def add(self, t: float, values: Dict[str, float]) -> None:
+        start = t - t % self.width
+        if not self.buckets or self.buckets[-1][0] < start:
+            self.buckets.append([start, {}])
+        sketches = self.buckets[-1][1]
+        for k, v in values.items():
+            sketches.setdefault(k, QuantileSketch()).add(v)
+        self.expire(t)
+
+    def expire(self, now: float) -> None:
+        while self.buckets and self.buckets[0][0] + self.width <= now - self.span_s:
+            self.buckets.popleft()
+
+    def merged(self, now: float) -> Dict[str, QuantileSketch]:
+        self.expire(now)
+        out: Dict[str, QuantileSketch] = {}
+        for _, sketches in self.buckets:
+            for k, sk in sketches.items():
+                out.setdefault(k, QuantileSketch()).merge(sk)
+        return out
+
+    def summary(self, now: float) -> Dict[str, Any]:
+        """Same shape as summarize_samples(), over this window."""
+        merged = self.merged(now)
+
+        def stats(k: str) -> Dict[str, float]:
+            sk = merged.get(k)
+            if not sk or not sk.count:
+                return {"min": 0, "avg": 0, "p50": 0, "p95": 0, "max": 0}
+            return {"min": sk.min, "avg": sk.sum / sk.count, "p50": sk.quantile(50),
+                    "p95": sk.quantile(95), "max": sk.max}
+
+        out: Dict[str, Any] = {
+            "count": merged["cluster_cpu_m"].count if "cluster_cpu_m" in merged else 0,
+            "cluster_cpu_m": stats("cluster_cpu_m"),
+            "cluster_mem_b": stats("cluster_mem_b"),
+            "roles": {},
+        }
+        for k in sorted(merged):
+            if k.startswith("role:"):
+                _, role, metric = k.split(":")
+                st = stats(k)
+                out["roles"].setdefault(role, {})[metric] = {"avg": st["avg"], "p95": st["p95"], "max": st["max"]}
+        return out
+
+
+class SampleStore:
+    """
+    Append-only on-disk sample log for daemon mode.
+
+    samples/samples-<epoch>.jsonl segments, one JSON sample per line, each
+    line flushed and fsync'd before the next tick. A new segment starts every
+    `segment_s` and on every start, so a crash can only leave a torn last
+    line in a segment nobody appends to again; replay() skips it. Segments
+    entirely older than `retain_s` are deleted.
+    """
+
+    def __init__(self, root: Path, segment_s: float, retain_s: float):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_s = segment_s
+        self.retain_s = retain_s
+        self.f: Optional[Any] = None
+        self.opened = 0.0
+
+    def segments(self) -> List[Tuple[float, Path]]:
+        out = []
+        for path in self.root.glob("samples-*.jsonl"):
+            try:
+                out.append((float(path.stem.split("-", 1)[1]), path))
+            except ValueError:
+                continue
+        return sorted(out)
+
+    def replay(self, since: float) -> Iterable[Dict[str, Any]]:
+        """Stored samples with t >= since, oldest first."""
+        segs = self.segments()
+        for i, (start, path) in enumerate(segs):
+            if i + 1 < len(segs) and segs[i + 1][0] < since:
+                continue
+            with path.open("rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        sample = json.loads(line)
+                    except ValueError:
+                        continue
+                    if sample.get("t", 0) >= since:
+                        yield sample
+
+    def append(self, sample: Dict[str, Any]) -> None:
+        t = sample["t"]
+        if self.f is None or t - self.opened >= self.segment_s:
+            self.rotate(t)
+        self.f.write(json.dumps(sample, separators=(",", ":")) + "\n")
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def rotate(self, t: float) -> None:
+        if self.f:
+            self.f.close()
+        self.opened = t
+        self.f = (self.root / f"samples-{t:.0f}.jsonl").open("a")
+        dir_fd = os.open(self.root, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)  # the new segment's directory entry survives a crash too
+        finally:
+            os.close(dir_fd)
+        self.prune(t)
+
+    def prune(self, now: float) -> None:
+        segs = self.segments()
+        for (_, path), (next_start, _) in zip(segs, segs[1:]):
+            if next_start < now - self.retain_s:
+                path.unlink()
+
+    def close(self) -> None:
+        if self.f:
+            self.f.close()
+            self.f = None
 
 
 def summarize_samples(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
-    out: Dict[str, Any] = {}
+    out: Dict[str, Any] = {"count": len(samples)}
     keys = [
         "cluster_cpu_m",
         "cluster_mem_b",
@@ -256,11 +908,206 @@ def summarize_samples(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
     return out
 
 
+# Proxmox VM shapes the packing simulator may recommend (cores, GiB), and
+# the kubelet default pod limit each simulated node gets.
+VM_CORES = (2, 4, 6, 8, 12, 16, 24, 32, 48, 64)
+VM_MEM_GIB = (8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 256, 384)
+MAX_PODS_PER_NODE = 110
+# Owner kinds with one pod per node: charged to every node, never packed.
+PER_NODE_OWNERS = ("DaemonSet", "Node")
+
+
+def pack(items: List[Tuple[float, float, int]], bins: List[List[float]]) -> Optional[List[List[int]]]:
+    """
+    First-fit decreasing. items are (cpu_m, mem_b, gpu); bins are
+    [cpu_m, mem_b, gpu, pods] free capacity and are consumed in place.
+    Items are ordered by dominant share of the largest bin. Returns the item
+    indexes placed on each bin, or None if some item fits nowhere.
+    """
+    ref_cpu = max((b[0] for b in bins), default=0) or 1
+    ref_mem = max((b[1] for b in bins), default=0) or 1
+    order = sorted(range(len(items)), key=lambda i: max(items[i][0] / ref_cpu, items[i][1] / ref_mem), reverse=True)
+    placed: List[List[int]] = [[] for _ in bins]
+    for i in order:
+        cpu, mem, gpu = items[i]
+        for j, b in enumerate(bins):
+            if cpu <= b[0] and mem <= b[1] and gpu <= b[2] and b[3] >= 1:
+                b[0] -= cpu
+                b[1] -= mem
+                b[2] -= gpu
+                b[3] -= 1
+                placed[j].append(i)
+                break
+        else:
+            return None
+    return placed
+
+
+def lost_node_fails(items: List[Tuple[float, float, int]], bins: List[List[float]], placed: List[List[int]]) -> Optional[int]:
+    """
+    "Lose any one node": for each bin, re-place its items best-fit onto the
+    free space the others have left (the scheduler moves evicted pods, it
+    does not repack the cluster). The first bin whose loss strands a pod,
+    or None when every single loss is survivable.
+    """
+    for lost in range(len(bins)):
+        free = [list(b) for j, b in enumerate(bins) if j != lost]
+        for i in sorted(placed[lost], key=lambda i: (items[i][1], items[i][0]), reverse=True):
+            cpu, mem, gpu = items[i]
+            fits = [b for b in free if cpu <= b[0] and mem <= b[1] and gpu <= b[2] and b[3] >= 1]
+            if not fits:
+                return lost
+            # best fit: the node left tightest on memory, then CPU
+            b = min(fits, key=lambda b: (b[1] - mem, b[0] - cpu))
+            b[0] -= cpu
+            b[1] -= mem
+            b[2] -= gpu
+            b[3] -= 1
+    return None
+
+
+def simulate_role(
+    items: List[Tuple[float, float, int]], capacities: List[Tuple[float, float, int]]
+) -> Tuple[bool, bool]:
+    """(all items fit, and still fit after losing any one node) on these node capacities."""
+    bins = [[c, m, g, MAX_PODS_PER_NODE] for c, m, g in capacities]
+    placed = pack(items, bins)
+    if placed is None:
+        return False, False
+    return True, len(bins) > 1 and lost_node_fails(items, bins, placed) is None
+
+
+def simulate_packing(
+    pod_inventory: List[Dict[str, Any]],
+    node_inventory: Dict[str, Dict[str, Any]],
+    headroom: Dict[str, float],
+) -> Dict[str, Any]:
+    """
+    Pod-granular sizing per node role.
+
+    Each pod's demand is the larger of its observed P95 and its requests,
+    with the same headroom as the aggregate estimate; GPU pods need a node
+    with free GPUs. DaemonSet and static pods are charged to every node of
+    their role. Pending pods join worker (or gpu-worker if they want a GPU).
+
+    For the current nodes, and for every Proxmox shape in VM_CORES x
+    VM_MEM_GIB at the role's current node count, the pods are packed first-
+    fit decreasing and then every single-node loss is replayed. A shape's
+    allocatable is its size minus what Talos/kubelet reserve on today's nodes.
+    Shapes that cannot fit by totals or by their largest pod are rejected
+    before any packing, and per core count the memory scan stops at the first
+    fit, so a full report runs a few dozen packs per role.
+    """
+    def demand(p: Dict[str, Any]) -> Tuple[float, float, int]:
+        cpu = max(p.get("cpu_m_p95", 0) * headroom["cpu_observed"], p["req_cpu_m"] * headroom["cpu_request"])
+        mem = max(p.get("mem_b_p95", 0) * headroom["mem_observed"], p["req_mem_b"] * headroom["mem_request"])
+        return cpu, mem, p["req_gpu"]
+
+    out: Dict[str, Any] = {}
+    for role in sorted({v["role"] for v in node_inventory.values()}):
+        role_nodes = [v for v in node_inventory.values() if v["role"] == role]
+        names = {v["node"] for v in role_nodes}
+        overhead: Dict[str, List[float]] = {n: [0.0, 0.0, 0] for n in names}
+        items: List[Tuple[float, float, int]] = []
+        for p in pod_inventory:
+            if p["phase"] in DONE_PHASES:
+                continue
+            if p["node"] in names:
+                if p["owner"].split("/", 1)[0] in PER_NODE_OWNERS:
+                    o = overhead[p["node"]]
+                    cpu, mem, gpu = demand(p)
+                    o[0] += cpu
+                    o[1] += mem
+                    o[2] += gpu
+                    continue
+                items.append(demand(p))
+            elif not p["node"] and role == ("gpu-worker" if p["req_gpu"] else "worker"):
+                items.append(demand(p))
+
+        per_node = [max(o[k] for o in overhead.values()) for k in range(3)]
+        res_cpu = max(v["cap_cpu_m"] - v["alloc_cpu_m"] for v in role_nodes)
+        res_mem = max(v["cap_mem_b"] - v["alloc_mem_b"] for v in role_nodes)
+        gpus = max(v["gpu_allocatable"] for v in role_nodes)
+        count = len(role_nodes)
+
+        current = [(v["alloc_cpu_m"] - per_node[0], v["alloc_mem_b"] - per_node[1], v["gpu_allocatable"] - per_node[2])
+                   for v in role_nodes]
+        current_fits, current_nplus1 = simulate_role(items, current)
+
+        tot_cpu = sum(i[0] for i in items)
+        tot_mem = sum(i[1] for i in items)
+        tot_gpu = sum(i[2] for i in items)
+        big_cpu = max((i[0] for i in items), default=0)
+        big_mem = max((i[1] for i in items), default=0)
+        big_gpu = max((i[2] for i in items), default=0)
+
+        def shape_capacity(cores: int, gib: int) -> Tuple[float, float, int]:
+            return (cores * CPU_MILLI - res_cpu - per_node[0], gib * MEM_GIB - res_mem - per_node[1], gpus - per_node[2])
+
+        def bound_ok(cap: Tuple[float, float, int], n: int) -> bool:
+            return (n > 0 and cap[0] >= big_cpu and cap[1] >= big_mem and cap[2] >= big_gpu
+                    and n * cap[0] >= tot_cpu and n * cap[1] >= tot_mem and n * cap[2] >= tot_gpu
+                    and n * MAX_PODS_PER_NODE >= len(items))
+
+        fit_shapes: List[Tuple[int, int]] = []
+        nplus1_shapes: List[Tuple[int, int]] = []
+        packs = 0
+        for target, need_nplus1 in ((fit_shapes, False), (nplus1_shapes, True)):
+            if need_nplus1 and count < 2:
+                continue
+            best_gib = math.inf
+            for cores in VM_CORES:
+                for gib in VM_MEM_GIB:
+                    if gib >= best_gib:
+                        break  # a smaller-core shape already fits with this much memory
+                    cap = shape_capacity(cores, gib)
+                    if not bound_ok(cap, count - 1 if need_nplus1 else count):
+                        continue
+                    packs += 1
+                    fits, survives = simulate_role(items, [cap] * count)
+                    if survives if need_nplus1 else fits:
+                        target.append((cores, gib))
+                        best_gib = gib
+                        break
+
+        # nodes of today's largest shape needed to ride out a single loss
+        largest = max(role_nodes, key=lambda v: (v["alloc_mem_b"], v["alloc_cpu_m"]))
+        cap = (largest["alloc_cpu_m"] - per_node[0], largest["alloc_mem_b"] - per_node[1], largest["gpu_allocatable"] - per_node[2])
+        min_nodes = None
+        for n in range(2, 2 * count + 3):
+            if not bound_ok(cap, n - 1):
+                continue
+            packs += 1
+            if simulate_role(items, [cap] * n)[1]:
+                min_nodes = n
+                break
+
+        out[role] = {
+            "count": count,
+            "pods_packed": len(items),
+            "per_node_overhead_cpu_m": per_node[0],
+            "per_node_overhead_mem_b": per_node[1],
+            "reserved_cpu_m": res_cpu,
+            "reserved_mem_b": res_mem,
+            "gpus_per_node": gpus,
+            "demand_cpu_m": tot_cpu,
+            "demand_mem_b": tot_mem,
+            "current_fits": current_fits,
+            "current_nplus1": current_nplus1,
+            "fit_shapes": fit_shapes,
+            "nplus1_shapes": nplus1_shapes,
+            "min_nodes_current_shape_nplus1": min_nodes,
+            "packs_run": packs,
+        }
+    return out
+
+
 def make_recommendations(
     nodes: List[Dict[str, Any]],
     pods: List[Dict[str, Any]],
     samples_summary: Dict[str, Any],
     node_inventory: Dict[str, Dict[str, Any]],
+    pod_inventory: Optional[List[Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
     """
     Produce conservative-ish estimates.
@@ -269,6 +1116,8 @@ def make_recommendations(
       - observed-based = p95 live usage * headroom
       - request-based = current pod requests
       - N+1 worker = fit worker role workload if one worker disappears
+      - packing (with pod_inventory) = per-pod bin-packing over Proxmox VM
+        shapes, including single-node loss; see simulate_packing
     """
 
     role_counts = defaultdict(int)
@@ -290,7 +1139,7 @@ def make_recommendations(
     for pod in pods:
         phase = pod.get("status", {}).get("phase")
         node = pod.get("spec", {}).get("nodeName")
-        if not node or phase in ("Succeeded", "Failed"):
+        if not node or phase in DONE_PHASES:
             continue
         role = node_inventory.get(node, {}).get("role", "unknown")
         totals = pod_resource_totals(pod)
@@ -369,6 +1218,14 @@ def make_recommendations(
         "suggested_mem_gib": ceil_gib(cluster_mem_need, 16),
     }
 
+    if pod_inventory is not None:
+        rec["packing"] = simulate_packing(pod_inventory, node_inventory, {
+            "cpu_observed": cpu_observed_headroom,
+            "mem_observed": mem_observed_headroom,
+            "cpu_request": cpu_request_headroom,
+            "mem_request": mem_request_headroom,
+        })
+
     return rec
 
 
@@ -378,24 +1235,26 @@ def write_summary(
     pods: List[Dict[str, Any]],
     node_inventory: Dict[str, Dict[str, Any]],
     pod_inventory: List[Dict[str, Any]],
+    owner_inventory: List[Dict[str, Any]],
     samples: List[Dict[str, Any]],
     samples_summary: Dict[str, Any],
     rec: Dict[str, Any],
     args: argparse.Namespace,
+    rolling: Optional[Dict[str, Dict[str, Any]]] = None,
 ) -> None:
     total_alloc_cpu = sum(v["alloc_cpu_m"] for v in node_inventory.values())
     total_alloc_mem = sum(v["alloc_mem_b"] for v in node_inventory.values())
     total_capacity_cpu = sum(v["cap_cpu_m"] for v in node_inventory.values())
     total_capacity_mem = sum(v["cap_mem_b"] for v in node_inventory.values())
 
-    total_req_cpu = sum(p["req_cpu_m"] for p in pod_inventory if p["phase"] not in ("Succeeded", "Failed"))
-    total_req_mem = sum(p["req_mem_b"] for p in pod_inventory if p["phase"] not in ("Succeeded", "Failed"))
-    total_lim_cpu = sum(p["lim_cpu_m"] for p in pod_inventory if p["phase"] not in ("Succeeded", "Failed"))
-    total_lim_mem = sum(p["lim_mem_b"] for p in pod_inventory if p["phase"] not in ("Succeeded", "Failed"))
+    total_req_cpu = sum(p["req_cpu_m"] for p in pod_inventory if p["phase"] not in DONE_PHASES)
+    total_req_mem = sum(p["req_mem_b"] for p in pod_inventory if p["phase"] not in DONE_PHASES)
+    total_lim_cpu = sum(p["lim_cpu_m"] for p in pod_inventory if p["phase"] not in DONE_PHASES)
+    total_lim_mem = sum(p["lim_mem_b"] for p in pod_inventory if p["phase"] not in DONE_PHASES)
 
-    missing_cpu_req = sum(p["containers_missing_cpu_req"] for p in pod_inventory if p["phase"] not in ("Succeeded", "Failed"))
-    missing_mem_req = sum(p["containers_missing_mem_req"] for p in pod_inventory if p["phase"] not in ("Succeeded", "Failed"))
-    total_containers = sum(p["containers"] for p in pod_inventory if p["phase"] not in ("Succeeded", "Failed"))
+    missing_cpu_req = sum(p["containers_missing_cpu_req"] for p in pod_inventory if p["phase"] not in DONE_PHASES)
+    missing_mem_req = sum(p["containers_missing_mem_req"] for p in pod_inventory if p["phase"] not in DONE_PHASES)
+    total_containers = sum(p["containers"] for p in pod_inventory if p["phase"] not in DONE_PHASES)
 
     latest = samples[-1] if samples else {}
 
@@ -413,7 +1272,7 @@ def write_summary(
 
     ns_agg = defaultdict(lambda: {"req_cpu_m": 0, "req_mem_b": 0, "obs_cpu_m_max": 0, "obs_mem_b_max": 0})
     for p in pod_inventory:
-        if p["phase"] in ("Succeeded", "Failed"):
+        if p["phase"] in DONE_PHASES:
             continue
         ns = p["namespace"]
         ns_agg[ns]["req_cpu_m"] += p["req_cpu_m"]
@@ -429,9 +1288,14 @@ def write_summary(
     lines.append("")
     lines.append(f"- Context: `{args.context}`")
     lines.append(f"- Label: `{args.label}`")
-    lines.append(f"- Samples: `{len(samples)}`")
-    lines.append(f"- Duration requested: `{args.duration}s`")
-    lines.append(f"- Interval: `{args.interval}s`")
+    lines.append(f"- Backend: `{'fixture' if args.fixture else args.backend}`")
+    if args.daemon:
+        lines.append(f"- Mode: `daemon`, running since `{args.started}`, store `samples/`")
+        lines.append(f"- Samples in the {ROLLING_WINDOWS[-1][0]} window: `{samples_summary['count']}`")
+    else:
+        lines.append(f"- Samples: `{samples_summary['count']}`")
+        lines.append(f"- Duration requested: `{args.duration}s`")
+    lines.append(f"- Interval: `{args.interval:g}s`")
     lines.append(f"- Generated UTC: `{dt.datetime.utcnow().isoformat()}Z`")
     lines.append("")
     lines.append("## Cluster capacity")
@@ -450,6 +1314,19 @@ def write_summary(
     lines.append(f"| Containers missing CPU request | {missing_cpu_req}/{total_containers} |")
     lines.append(f"| Containers missing memory request | {missing_mem_req}/{total_containers} |")
     lines.append("")
+    skews = [float(x["skew_ms"]) for x in samples]
+    scrapes = [float(x["scrape_ms"]) for x in samples]
+    lines.append("## Sampling")
+    lines.append("")
+    lines.append("Ticks run on a fixed monotonic grid; node and pod metrics are scraped concurrently."
+                 + (" Latencies cover the last hour." if args.daemon else ""))
+    lines.append("")
+    lines.append("| Metric | P50 | P95 | Max |")
+    lines.append("|---|---:|---:|---:|")
+    lines.append(f"| Tick skew (start - due) | {percentile(skews, 50):.0f} ms | {percentile(skews, 95):.0f} ms | {max(skews, default=0):.0f} ms |")
+    lines.append(f"| Scrape latency | {percentile(scrapes, 50):.0f} ms | {percentile(scrapes, 95):.0f} ms | {max(scrapes, default=0):.0f} ms |")
+    lines.append(f"| Missed ticks (scrape overran the grid) | {getattr(args, 'missed_ticks', 0)} | | |")
+    lines.append("")
     lines.append("## Observed usage from metrics-server")
     lines.append("")
     lines.append("| Metric | Avg | P95 | Max |")
@@ -465,6 +1342,18 @@ def write_summary(
         f"{fmt_mem(samples_summary['cluster_mem_b']['max'])} |"
     )
     lines.append("")
+    if rolling:
+        lines.append("## Rolling windows")
+        lines.append("")
+        lines.append("| Window | Samples | CPU avg | CPU P95 | CPU max | Mem avg | Mem P95 | Mem max |")
+        lines.append("|---|---:|---:|---:|---:|---:|---:|---:|")
+        for name, w in rolling.items():
+            cpu, mem = w["cluster_cpu_m"], w["cluster_mem_b"]
+            lines.append(
+                f"| {name} | {w['count']} | {fmt_cpu(cpu['avg'])} | {fmt_cpu(cpu['p95'])} | {fmt_cpu(cpu['max'])} | "
+                f"{fmt_mem(mem['avg'])} | {fmt_mem(mem['p95'])} | {fmt_mem(mem['max'])} |"
+            )
+        lines.append("")
     lines.append("## Estimated cluster need")
     lines.append("")
     lines.append("This is a planning estimate, not a scheduler proof. It uses the larger of observed P95-with-headroom and current requests-with-headroom.")
@@ -503,6 +1392,29 @@ def write_summary(
             f"{str(r['nplus1_per_node_mem_gib']) + ' GiB' if r['nplus1_per_node_mem_gib'] else 'n/a'} |"
         )
     lines.append("")
+    if rec.get("packing"):
+        lines.append("## Packing simulation")
+        lines.append("")
+        lines.append("Pods packed one by one (first-fit decreasing) at max(P95, requests) with headroom, then every single-node loss replayed. "
+                     "VM sizes are Proxmox cores / memory at the role's current node count; only the smallest that fit are listed.")
+        lines.append("")
+        lines.append("| Role | Nodes | Pods | Per-node DaemonSet/static | Today fits | Today survives N-1 | Smallest VMs that fit | Smallest VMs surviving N-1 | Nodes of today's largest for N-1 |")
+        lines.append("|---|---:|---:|---:|---|---|---|---|---:|")
+
+        def shapes(xs: List[Any]) -> str:
+            return ", ".join(f"{c}c/{g}G" for c, g in xs) or "none"
+
+        for role, r in rec["packing"].items():
+            lines.append(
+                f"| {role} | {r['count']} | {r['pods_packed']} | "
+                f"{fmt_cpu(r['per_node_overhead_cpu_m'])}, {fmt_mem(r['per_node_overhead_mem_b'])} | "
+                f"{'yes' if r['current_fits'] else 'NO'} | "
+                f"{'yes' if r['current_nplus1'] else 'n/a (1 node)' if r['count'] < 2 else 'NO'} | "
+                f"{shapes(r['fit_shapes'])} | "
+                f"{shapes(r['nplus1_shapes']) if r['count'] > 1 else 'n/a'} | "
+                f"{r['min_nodes_current_shape_nplus1'] or 'n/a'} |"
+            )
+        lines.append("")
     lines.append("## Current nodes")
     lines.append("")
     lines.append("| Node | Role | Alloc CPU | Alloc Mem | Latest CPU | Latest Mem |")
@@ -560,65 +1472,99 @@ def write_summary(
             f"{fmt_cpu(p['lim_cpu_m'])} | {fmt_mem(p['lim_mem_b'])} |"
         )
     lines.append("")
+    over_req = sorted(
+        [o for o in owner_inventory if o["req_mem_b"] > 0 and o["usage_samples"]],
+        key=lambda o: o["req_mem_b"] - o["mem_b_p95"],
+        reverse=True,
+    )[:20]
+    lines.append("## Right-sizing by owner")
+    lines.append("")
+    lines.append("Owners with the most memory requested above their P95 usage. Usage is the sum over the owner's pods at each tick.")
+    lines.append("")
+    lines.append("| Namespace | Owner | Pods | Mem P50 | Mem P95 | Mem P99 | Req mem | P95/req | CPU P95 | Req CPU | P95/req |")
+    lines.append("|---|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|")
+    for o in over_req:
+        lines.append(
+            f"| {o['namespace']} | {o['owner']} | {o['running_pods']} | "
+            f"{fmt_mem(o['mem_b_p50'])} | {fmt_mem(o['mem_b_p95'])} | {fmt_mem(o['mem_b_p99'])} | "
+            f"{fmt_mem(o['req_mem_b'])} | {o['mem_p95_over_req']} | "
+            f"{fmt_cpu(o['cpu_m_p95'])} | {fmt_cpu(o['req_cpu_m'])} | {o['cpu_p95_over_req'] or 'n/a'} |"
+        )
+    lines.append("")
     lines.append("## How to interpret")
     lines.append("")
     lines.append("- **Observed usage** is real usage during this sample window only.")
     lines.append("- **Requests** are what the scheduler reserves. If requests are missing or too low, observed usage is more useful.")
     lines.append("- **Estimated need** intentionally includes headroom. It is not the minimum bootable cluster size.")
     lines.append("- **N+1 per-node** is the rough per-node size needed for a role to survive losing one node in that role.")
+    lines.append("- **Packing simulation** respects pod size, GPU pinning, the 110-pod limit and per-node fragmentation, which the N+1 division above ignores; prefer it when the two disagree.")
+    lines.append("- Pods with phase **Deleted** were seen during the run but gone at the end; they keep their observed usage but hold no requests.")
+    if args.daemon:
+        lines.append(f"- In daemon mode, observed figures and the estimate use the {ROLLING_WINDOWS[-1][0]} window; "
+                     "per-pod and per-owner quantiles cover the time since the daemon started.")
+    lines.append("- **P50/P95/P99** per pod and per owner come from streaming sketches accurate to about 1%; they cover every sample, not a window.")
     lines.append("- For your hardware decision, compare the rounded planning target against possible VM layouts like 384G, 512G, etc.")
     lines.append("")
     lines.append("## Files")
     lines.append("")
-    lines.append("- `samples.csv`: cluster and role time series")
+    if args.daemon:
+        lines.append("- `samples/`: append-only JSONL segments, one sample per line (cluster, roles, nodes, timing)")
+    else:
+        lines.append("- `samples.csv`: cluster and role time series, with tick, skew and scrape latency per sample")
     lines.append("- `node_inventory.csv`: node capacity and role classification")
-    lines.append("- `pod_inventory.csv`: pod requests, limits, observed max usage")
+    lines.append("- `pod_inventory.csv`: pod requests, limits, observed max and P50/P95/P99 usage, P95/request ratios")
+    lines.append("- `owner_inventory.csv`: the same per owning workload, usage summed over its pods")
     lines.append("- `raw/`: raw Kubernetes JSON snapshots")
     lines.append("")
 
-    (outdir / "summary.md").write_text("\n".join(lines))
-
-
-def main() -> int:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--duration", type=int, default=900, help="sample duration in seconds")
-    parser.add_argument("--interval", type=int, default=30, help="sample interval in seconds")
-    parser.add_argument("--label", default="baseline", help="label for this run")
-    args = parser.parse_args()
-
-    try:
-        context = sh_text(["kubectl", "config", "current-context"]).strip()
-    except Exception as e:
-        print(f"ERROR: kubectl not working: {e}", file=sys.stderr)
-        return 1
-
-    args.context = context
-
-    ts = dt.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-    safe_ctx = re.sub(r"[^A-Za-z0-9_.-]+", "_", context)
-    safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", args.label)
-    outdir = Path(f"k8s-capacity-estimate-{safe_ctx}-{safe_label}-{ts}")
-    rawdir = outdir / "raw"
-    outdir.mkdir(parents=True, exist_ok=True)
-    rawdir.mkdir(parents=True, exist_ok=True)
-
-    print(f"Writing to: {outdir}")
-    print(f"Context: {context}")
-    print(f"Duration: {args.duration}s, interval: {args.interval}s")
-    print("Read-only collection starting...")
-
-    nodes_raw = sh_json(["kubectl", "get", "nodes", "-o", "json"])
-    pods_raw = sh_json(["kubectl", "get", "pods", "-A", "-o", "json"])
+    with atomic_open(outdir / "summary.md") as f:
+        f.write("\n".join(lines))
 
-    (rawdir / "nodes.json").write_text(json.dumps(nodes_raw, indent=2))
-    (rawdir / "pods-initial.json").write_text(json.dumps(pods_raw, indent=2))
 
-    nodes = nodes_raw.get("items", [])
-    pods = pods_raw.get("items", [])
+def owner_rows(
+    pod_inventory: List[Dict[str, Any]],
+    owner_sketches: Dict[Tuple[str, str], Tuple[QuantileSketch, QuantileSketch]],
+) -> List[Dict[str, Any]]:
+    """
+    One row per (namespace, owner): usage quantiles of the owner's summed pod
+    usage, against the requests of its pods still holding resources at the end.
+    """
+    rows: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for p in pod_inventory:
+        key = (p["namespace"], p["owner"])
+        r = rows.setdefault(key, {"namespace": key[0], "owner": key[1], "pods": 0,
+                                  "running_pods": 0, "req_cpu_m": 0, "req_mem_b": 0})
+        r["pods"] += 1
+        if p["phase"] not in DONE_PHASES:
+            r["running_pods"] += 1
+            r["req_cpu_m"] += p["req_cpu_m"]
+            r["req_mem_b"] += p["req_mem_b"]
+    for key, r in rows.items():
+        cpu_sk, mem_sk = owner_sketches.get(key, (None, None))
+        r["usage_samples"] = cpu_sk.count if cpu_sk else 0
+        r.update(sketch_columns("cpu_m", cpu_sk))
+        r.update(sketch_columns("mem_b", mem_sk))
+        r["cpu_p95_over_req"] = usage_ratio(r["cpu_m_p95"], r["req_cpu_m"])
+        r["mem_p95_over_req"] = usage_ratio(r["mem_b_p95"], r["req_mem_b"])
+    return sorted(rows.values(), key=lambda x: (x["namespace"], x["owner"]))
+
+
+def update_inventories(
+    nodes: List[Dict[str, Any]],
+    pods: List[Dict[str, Any]],
+    node_inventory: Dict[str, Dict[str, Any]],
+    pod_inventory_map: Dict[Tuple[str, str], Dict[str, Any]],
+) -> None:
+    """
+    Add nodes/pods not seen before; refresh placement and phase of known pods.
 
-    node_inventory: Dict[str, Dict[str, Any]] = {}
+    Observed maxima are kept, and pods that disappear stay in the inventory,
+    so churn during the run is reported rather than lost.
+    """
     for n in nodes:
         name = n["metadata"]["name"]
+        if name in node_inventory:
+            continue
         cap = n.get("status", {}).get("capacity", {})
         alloc = n.get("status", {}).get("allocatable", {})
         role = node_role(n)
@@ -633,12 +1579,17 @@ def main() -> int:
             "gpu_allocatable": int(alloc.get("nvidia.com/gpu", 0) or 0),
         }
 
-    pod_inventory_map: Dict[Tuple[str, str], Dict[str, Any]] = {}
     for pod in pods:
-        ns = pod.get("metadata", {}).get("namespace", "")
-        name = pod.get("metadata", {}).get("name", "")
+        ns, name = pod_key(pod)
         node = pod.get("spec", {}).get("nodeName", "")
         phase = pod.get("status", {}).get("phase", "")
+        known = pod_inventory_map.get((ns, name))
+        if known is not None:
+            if node:
+                known["node"] = node
+                known["node_role"] = node_inventory.get(node, {}).get("role", "unscheduled")
+            known["phase"] = phase
+            continue
         totals = pod_resource_totals(pod)
 
         pod_inventory_map[(ns, name)] = {
@@ -653,72 +1604,51 @@ def main() -> int:
             "observed_mem_b_max": 0,
         }
 
-    samples: List[Dict[str, Any]] = []
-    start = time.time()
-    sample_num = 0
 
-    while True:
-        sample_num += 1
-        now = dt.datetime.utcnow().isoformat() + "Z"
+@contextmanager
+def atomic_open(path: Path) -> Iterator[Any]:
+    """Write to path.tmp and rename over `path`: readers never see a half-written report."""
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", newline="") as f:
+        yield f
+    os.replace(tmp, path)
 
-        try:
-            node_metrics, pod_metrics = get_metrics()
-        except Exception as e:
-            print(f"WARN: metrics collection failed: {e}", file=sys.stderr)
-            if not samples:
-                print("ERROR: no metrics collected. Is metrics-server installed?", file=sys.stderr)
-                return 2
-            break
-
-        cluster_cpu_m = sum(v["cpu_m"] for v in node_metrics.values())
-        cluster_mem_b = sum(v["mem_b"] for v in node_metrics.values())
-
-        roles = defaultdict(lambda: {"cpu_m": 0, "mem_b": 0})
-        for node, m in node_metrics.items():
-            role = node_inventory.get(node, {}).get("role", "unknown")
-            roles[role]["cpu_m"] += m["cpu_m"]
-            roles[role]["mem_b"] += m["mem_b"]
-
-        for (ns, pod), m in pod_metrics.items():
-            if (ns, pod) in pod_inventory_map:
-                pod_inventory_map[(ns, pod)]["observed_cpu_m_max"] = max(
-                    pod_inventory_map[(ns, pod)]["observed_cpu_m_max"], m["cpu_m"]
-                )
-                pod_inventory_map[(ns, pod)]["observed_mem_b_max"] = max(
-                    pod_inventory_map[(ns, pod)]["observed_mem_b_max"], m["mem_b"]
-                )
-
-        sample = {
-            "ts": now,
-            "cluster_cpu_m": cluster_cpu_m,
-            "cluster_mem_b": cluster_mem_b,
-            "roles": dict(roles),
-            "nodes": node_metrics,
-        }
-        samples.append(sample)
-
-        print(
-            f"[{sample_num}] {now} cluster={fmt_cpu(cluster_cpu_m)}, {fmt_mem(cluster_mem_b)}",
-            flush=True,
-        )
 
-        elapsed = time.time() - start
-        if elapsed >= args.duration:
-            break
-
-        sleep_for = max(1, min(args.interval, args.duration - elapsed))
-        time.sleep(sleep_for)
-
-    # Refresh pods at end to catch reschedules/new pods.
-    pods_final_raw = sh_json(["kubectl", "get", "pods", "-A", "-o", "json"])
-    (rawdir / "pods-final.json").write_text(json.dumps(pods_final_raw, indent=2))
+def reconcile_pods(
+    backend: Any,
+    node_inventory: Dict[str, Dict[str, Any]],
+    pod_inventory_map: Dict[Tuple[str, str], Dict[str, Any]],
+    now: float,
+) -> List[Dict[str, Any]]:
+    """Re-read pods, update the inventory and mark pods no longer listed as Deleted."""
+    backend.refresh()
+    pods = backend.pods()
+    update_inventories(backend.nodes(), pods, node_inventory, pod_inventory_map)
+    current = {pod_key(p) for p in pods}
+    for key, p in pod_inventory_map.items():
+        if key not in current:
+            p["phase"] = "Deleted"
+            p.setdefault("last_seen", now)
+    return pods
+
+
+def prune_inventory(
+    pod_inventory_map: Dict[Tuple[str, str], Dict[str, Any]],
+    pod_sketches: Dict[Tuple[str, str], Tuple[QuantileSketch, QuantileSketch]],
+    owner_sketches: Dict[Tuple[str, str], Tuple[QuantileSketch, QuantileSketch]],
+    cutoff: float,
+) -> None:
+    """Forget Deleted pods last seen before `cutoff`, and owners left without pods."""
+    for key in [k for k, p in pod_inventory_map.items() if p["phase"] == "Deleted" and p["last_seen"] < cutoff]:
+        del pod_inventory_map[key]
+        pod_sketches.pop(key, None)
+    owners = {(p["namespace"], p["owner"]) for p in pod_inventory_map.values()}
+    for key in [k for k in owner_sketches if k not in owners]:
+        del owner_sketches[key]
 
-    pod_inventory = list(pod_inventory_map.values())
-    samples_summary = summarize_samples(samples)
-    rec = make_recommendations(nodes, pods, samples_summary, node_inventory)
 
-    # Write CSVs.
-    with (outdir / "samples.csv").open("w", newline="") as f:
+def write_samples_csv(path: Path, samples: Iterable[Dict[str, Any]]) -> None:
+    with path.open("w", newline="") as f:
         fieldnames = [
             "ts",
             "cluster_cpu_m",
@@ -729,6 +1659,11 @@ def main() -> int:
             "worker_mem_b",
             "gpu_worker_cpu_m",
             "gpu_worker_mem_b",
+            "tick",
+            "skew_ms",
+            "scrape_ms",
+            "node_scrape_ms",
+            "pod_scrape_ms",
         ]
         w = csv.DictWriter(f, fieldnames=fieldnames)
         w.writeheader()
@@ -744,30 +1679,294 @@ def main() -> int:
                 "worker_mem_b": roles.get("worker", {}).get("mem_b", 0),
                 "gpu_worker_cpu_m": roles.get("gpu-worker", {}).get("cpu_m", 0),
                 "gpu_worker_mem_b": roles.get("gpu-worker", {}).get("mem_b", 0),
+                "tick": s["tick"],
+                "skew_ms": s["skew_ms"],
+                "scrape_ms": s["scrape_ms"],
+                "node_scrape_ms": s["node_scrape_ms"],
+                "pod_scrape_ms": s["pod_scrape_ms"],
             })
 
-    with (outdir / "node_inventory.csv").open("w", newline="") as f:
+
+def write_report(
+    outdir: Path,
+    nodes: List[Dict[str, Any]],
+    pods: List[Dict[str, Any]],
+    node_inventory: Dict[str, Dict[str, Any]],
+    pod_inventory_map: Dict[Tuple[str, str], Dict[str, Any]],
+    pod_sketches: Dict[Tuple[str, str], Tuple[QuantileSketch, QuantileSketch]],
+    owner_sketches: Dict[Tuple[str, str], Tuple[QuantileSketch, QuantileSketch]],
+    samples: Iterable[Dict[str, Any]],
+    samples_summary: Dict[str, Any],
+    args: argparse.Namespace,
+    rolling: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> None:
+    """Inventory CSVs, recommendations.json and summary.md, each replaced atomically."""
+    for key, p in pod_inventory_map.items():
+        cpu_sk, mem_sk = pod_sketches.get(key, (None, None))
+        p["usage_samples"] = cpu_sk.count if cpu_sk else 0
+        p.update(sketch_columns("cpu_m", cpu_sk))
+        p.update(sketch_columns("mem_b", mem_sk))
+        p["cpu_p95_over_req"] = usage_ratio(p["cpu_m_p95"], p["req_cpu_m"])
+        p["mem_p95_over_req"] = usage_ratio(p["mem_b_p95"], p["req_mem_b"])
+    pod_inventory = list(pod_inventory_map.values())
+    owner_inventory = owner_rows(pod_inventory, owner_sketches)
+    rec = make_recommendations(nodes, pods, samples_summary, node_inventory, pod_inventory)
+
+    with atomic_open(outdir / "node_inventory.csv") as f:
         fieldnames = ["node", "role", "cap_cpu_m", "cap_mem_b", "alloc_cpu_m", "alloc_mem_b", "gpu_allocatable"]
         w = csv.DictWriter(f, fieldnames=fieldnames)
         w.writeheader()
         for v in sorted(node_inventory.values(), key=lambda x: (x["role"], x["node"])):
             w.writerow(v)
 
-    with (outdir / "pod_inventory.csv").open("w", newline="") as f:
+    with atomic_open(outdir / "pod_inventory.csv") as f:
         fieldnames = [
             "namespace", "pod", "node", "node_role", "phase", "owner",
             "req_cpu_m", "req_mem_b", "lim_cpu_m", "lim_mem_b",
             "req_gpu", "lim_gpu",
             "containers", "containers_missing_cpu_req", "containers_missing_mem_req",
             "observed_cpu_m_max", "observed_mem_b_max",
+            "usage_samples",
+            "cpu_m_p50", "cpu_m_p95", "cpu_m_p99", "mem_b_p50", "mem_b_p95", "mem_b_p99",
+            "cpu_p95_over_req", "mem_p95_over_req",
         ]
         w = csv.DictWriter(f, fieldnames=fieldnames)
         w.writeheader()
         for p in sorted(pod_inventory, key=lambda x: (x["namespace"], x["pod"])):
             w.writerow({k: p.get(k, "") for k in fieldnames})
 
-    (outdir / "recommendations.json").write_text(json.dumps(rec, indent=2))
-    write_summary(outdir, nodes, pods, node_inventory, pod_inventory, samples, samples_summary, rec, args)
+    with atomic_open(outdir / "owner_inventory.csv") as f:
+        fieldnames = [
+            "namespace", "owner", "pods", "running_pods", "req_cpu_m", "req_mem_b", "usage_samples",
+            "cpu_m_p50", "cpu_m_p95", "cpu_m_p99", "mem_b_p50", "mem_b_p95", "mem_b_p99",
+            "cpu_p95_over_req", "mem_p95_over_req",
+        ]
+        w = csv.DictWriter(f, fieldnames=fieldnames)
+        w.writeheader()
+        for o in owner_inventory:
+            w.writerow({k: o.get(k, "") for k in fieldnames})
+
+    with atomic_open(outdir / "recommendations.json") as f:
+        f.write(json.dumps(rec, indent=2))
+    write_summary(outdir, nodes, pods, node_inventory, pod_inventory, owner_inventory,
+                  list(samples), samples_summary, rec, args, rolling)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=int, help="sample duration in seconds (default 900; daemon: until stopped)")
+    parser.add_argument("--interval", type=float, default=30, help="sample interval in seconds (ticks on a fixed grid)")
+    parser.add_argument("--label", default="baseline", help="label for this run")
+    parser.add_argument("--backend", choices=["kubectl", "watch"], default="kubectl",
+                        help="kubectl: fork per call; watch: kubectl proxy + list/watch + keep-alive metrics")
+    parser.add_argument("--fixture", type=Path, help="replay a recorded fixture directory instead of a cluster")
+    parser.add_argument("--record", type=Path, help="write a fixture directory from this run")
+    parser.add_argument("--daemon", action="store_true",
+                        help="run until SIGTERM/SIGINT: samples go to an on-disk store, reports are rewritten periodically")
+    parser.add_argument("--outdir", type=Path, help="output folder (default: timestamped; daemon: stable, so a restart resumes)")
+    parser.add_argument("--summary-every", type=float, default=300, help="daemon: seconds between report rewrites")
+    parser.add_argument("--segment-hours", type=float, default=1, help="daemon: start a new sample segment this often")
+    parser.add_argument("--retain-days", type=float, default=8, help="daemon: delete sample segments older than this")
+    args = parser.parse_args()
+
+    if args.interval <= 0:
+        parser.error("--interval must be positive")
+    if args.daemon and args.record:
+        parser.error("--record keeps every response; use it for bounded runs, not --daemon")
+    if args.duration is None:
+        args.duration = math.inf if args.daemon else 900
+    if args.fixture:
+        context = f"fixture:{args.fixture.name}"
+    else:
+        try:
+            context = sh_text(["kubectl", "config", "current-context"]).strip()
+        except Exception as e:
+            print(f"ERROR: kubectl not working: {e}", file=sys.stderr)
+            return 1
+
+    args.context = context
+
+    ts = dt.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    safe_ctx = re.sub(r"[^A-Za-z0-9_.-]+", "_", context)
+    safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", args.label)
+    if args.outdir:
+        outdir = args.outdir
+    elif args.daemon:
+        outdir = Path(f"k8s-capacity-daemon-{safe_ctx}-{safe_label}")
+    else:
+        outdir = Path(f"k8s-capacity-estimate-{safe_ctx}-{safe_label}-{ts}")
+    rawdir = outdir / "raw"
+    outdir.mkdir(parents=True, exist_ok=True)
+    rawdir.mkdir(parents=True, exist_ok=True)
+
+    print(f"Writing to: {outdir}")
+    print(f"Context: {context}")
+    print(f"Duration: {'until stopped' if math.isinf(args.duration) else f'{args.duration}s'}, interval: {args.interval:g}s")
+    print(f"Backend: {'fixture ' + str(args.fixture) if args.fixture else args.backend}")
+    print("Read-only collection starting...")
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    recorder = Recorder(args.record) if args.record else None
+    fixture = FixtureServer(args.fixture) if args.fixture else None
+    try:
+        if fixture:
+            backend: Any = WatchBackend(fixture.url, recorder)
+        elif args.backend == "watch":
+            backend = WatchBackend.via_proxy(recorder)
+        else:
+            backend = KubectlBackend(recorder)
+        backend.start()
+    except Exception as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    nodes = backend.nodes()
+    pods = backend.pods()
+
+    (rawdir / "nodes.json").write_text(json.dumps({"kind": "List", "items": nodes}, indent=2))
+    (rawdir / "pods-initial.json").write_text(json.dumps({"kind": "List", "items": pods}, indent=2))
+
+    node_inventory: Dict[str, Dict[str, Any]] = {}
+    pod_inventory_map: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    update_inventories(nodes, pods, node_inventory, pod_inventory_map)
+
+    # One-shot runs keep every sample for samples.csv; the daemon keeps the
+    # last hour (for the Sampling section) and leaves the rest to the store.
+    samples: Any = deque(maxlen=math.ceil(3600 / args.interval)) if args.daemon else []
+    sample_num = 0
+    # (cpu_m, mem_b) usage sketches: fixed memory per pod/owner however long the run
+    pod_sketches: Dict[Tuple[str, str], Tuple[QuantileSketch, QuantileSketch]] = {}
+    owner_sketches: Dict[Tuple[str, str], Tuple[QuantileSketch, QuantileSketch]] = {}
+    store: Optional[SampleStore] = None
+    windows: List[RollingWindow] = []
+    if args.daemon:
+        store = SampleStore(outdir / "samples", args.segment_hours * 3600, args.retain_days * 86400)
+        windows = [RollingWindow(*w) for w in ROLLING_WINDOWS]
+        replayed = 0
+        for sample in store.replay(time.time() - windows[-1].span_s):
+            for win in windows:
+                win.add(sample["t"], sample_values(sample))
+            replayed += 1
+        print(f"Store: {store.root} ({replayed} samples replayed into the rolling windows)")
+        args.started = dt.datetime.utcnow().isoformat() + "Z"
+    next_report = time.monotonic() + args.summary_every
+    sched = TickScheduler(args.interval, args.duration, stop)
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="scrape")
+
+    while True:
+        skew_s = sched.wait()
+        if skew_s is None:
+            break
+        sample_num += 1
+        now_t = time.time()
+        now = dt.datetime.utcnow().isoformat() + "Z"
+
+        if backend.name == "watch":
+            # pods started or rescheduled since the last tick join the inventory
+            update_inventories(backend.nodes(), backend.pods(), node_inventory, pod_inventory_map)
+
+        try:
+            node_metrics, pod_metrics, timing = get_metrics(backend, pool)
+        except Exception as e:
+            print(f"WARN: metrics collection failed: {e}", file=sys.stderr)
+            if args.daemon and samples:
+                sched.advance()
+                continue  # transient in a long run: skip the tick, keep going
+            if not samples:
+                print("ERROR: no metrics collected. Is metrics-server installed?", file=sys.stderr)
+                backend.close()
+                return 2
+            break
+
+        cluster_cpu_m = sum(v["cpu_m"] for v in node_metrics.values())
+        cluster_mem_b = sum(v["mem_b"] for v in node_metrics.values())
+
+        roles = defaultdict(lambda: {"cpu_m": 0, "mem_b": 0})
+        for node, m in node_metrics.items():
+            role = node_inventory.get(node, {}).get("role", "unknown")
+            roles[role]["cpu_m"] += m["cpu_m"]
+            roles[role]["mem_b"] += m["mem_b"]
+
+        owner_tick: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0, 0])
+        for (ns, pod), m in pod_metrics.items():
+            if (ns, pod) in pod_inventory_map:
+                pod_inventory_map[(ns, pod)]["observed_cpu_m_max"] = max(
+                    pod_inventory_map[(ns, pod)]["observed_cpu_m_max"], m["cpu_m"]
+                )
+                pod_inventory_map[(ns, pod)]["observed_mem_b_max"] = max(
+                    pod_inventory_map[(ns, pod)]["observed_mem_b_max"], m["mem_b"]
+                )
+                pod_inventory_map[(ns, pod)]["last_seen"] = now_t
+                cpu_sk, mem_sk = pod_sketches.setdefault((ns, pod), (QuantileSketch(), QuantileSketch()))
+                cpu_sk.add(m["cpu_m"])
+                mem_sk.add(m["mem_b"])
+                acc = owner_tick[(ns, pod_inventory_map[(ns, pod)]["owner"])]
+                acc[0] += m["cpu_m"]
+                acc[1] += m["mem_b"]
+        # an owner's series is the sum over its pods at each tick, so replica
+        # churn inside a Deployment does not split its history
+        for key, (cpu_m, mem_b) in owner_tick.items():
+            cpu_sk, mem_sk = owner_sketches.setdefault(key, (QuantileSketch(), QuantileSketch()))
+            cpu_sk.add(cpu_m)
+            mem_sk.add(mem_b)
+
+        sample = {
+            "ts": now,
+            "t": round(now_t, 3),
+            "cluster_cpu_m": cluster_cpu_m,
+            "cluster_mem_b": cluster_mem_b,
+            "roles": dict(roles),
+            "nodes": node_metrics,
+            "tick": sched.k,
+            "skew_ms": round(skew_s * 1000, 1),
+            **timing,
+        }
+        samples.append(sample)
+        if store:
+            store.append(sample)
+            for win in windows:
+                win.add(now_t, sample_values(sample))
+
+        print(
+            f"[{sample_num}] {now} cluster={fmt_cpu(cluster_cpu_m)}, {fmt_mem(cluster_mem_b)} "
+            f"(scrape {timing['scrape_ms']:.0f}ms, skew {sample['skew_ms']:.0f}ms)",
+            flush=True,
+        )
+
+        if args.daemon and time.monotonic() >= next_report:
+            args.missed_ticks = sched.missed
+            pods = reconcile_pods(backend, node_inventory, pod_inventory_map, now_t)
+            prune_inventory(pod_inventory_map, pod_sketches, owner_sketches, now_t - windows[-1].span_s)
+            rolling = {w.name: w.summary(now_t) for w in windows}
+            write_report(outdir, backend.nodes(), pods, node_inventory, pod_inventory_map, pod_sketches,
+                         owner_sketches, samples, rolling[windows[-1].name], args, rolling)
+            next_report = time.monotonic() + args.summary_every
+        sched.advance()
+
+    pool.shutdown()
+    args.missed_ticks = sched.missed
+
+    # Refresh pods at end to catch reschedules/new pods.
+    pods_final = reconcile_pods(backend, node_inventory, pod_inventory_map, time.time())
+    (rawdir / "pods-final.json").write_text(json.dumps({"kind": "List", "items": pods_final}, indent=2))
+    backend.close()
+    if fixture:
+        fixture.close()
+
+    if args.daemon:
+        store.close()
+        now_t = time.time()
+        prune_inventory(pod_inventory_map, pod_sketches, owner_sketches, now_t - windows[-1].span_s)
+        rolling = {w.name: w.summary(now_t) for w in windows}
+        write_report(outdir, backend.nodes(), pods_final, node_inventory, pod_inventory_map, pod_sketches,
+                     owner_sketches, samples, rolling[windows[-1].name], args, rolling)
+    else:
+        write_samples_csv(outdir / "samples.csv", samples)
+        write_report(outdir, nodes, pods, node_inventory, pod_inventory_map, pod_sketches,
+                     owner_sketches, samples, summarize_samples(samples), args)
 
     print("")
     print("Done.")